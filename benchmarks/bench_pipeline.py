@@ -0,0 +1,355 @@
+"""
+キャプチャ → 前処理 → OCR → 翻訳 のベンチマーク
+
+正解テキスト付きのコーパスをリプレイバックエンドで再生し、
+ステージごとのレイテンシ（パーセンタイル）・スループット・最大メモリ使用量・OCR精度を測定する。
+翻訳はオフラインで動くスタブを使うため、ネットワークなしで再現性のある結果が得られる。
+
+使い方:
+    python benchmarks/bench_pipeline.py --engines tesseract easyocr --output result.json
+    python benchmarks/bench_pipeline.py --output new.json --baseline result.json
+"""
+
+from typing import Dict, List, Optional, Tuple
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+# リポジトリのルートをパスに追加
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.capture_backends import ReplayCaptureBackend
+from src.ocr_engine import create_ocr_engine, preprocess_image
+from src.text_detection import DetectingOCR
+from src.translation_providers import TranslationProvider
+from src.translator import Translator
+from benchmarks.corpus import generate_corpus, load_corpus
+
+
+class StubTranslator(TranslationProvider):
+    """
+    オフラインで動作する翻訳のスタブ
+    リモートの翻訳サービスと同じく、複数の行を改行で連結した1リクエストとして受け取る
+    """
+    
+    name = "stub"
+    max_workers = 4
+    pack_lines = True
+    
+    def __init__(self, latency: float = 0.0):
+        """
+        Args:
+            latency: 1リクエストあたりの疑似的な遅延（秒）
+        """
+        self.latency = latency
+        self.requests = 0
+    
+    def translate(self, text: str) -> str:
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return '\n'.join(f"[ja] {line}" for line in text.split('\n'))
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """
+    レイテンシの統計値を計算する
+    
+    Args:
+        samples: 測定値（秒）のリスト
+    
+    Returns:
+        ミリ秒単位の mean, min, p50, p90, p99, max
+    """
+    if not samples:
+        return {}
+    
+    ordered = sorted(samples)
+    
+    def rank(p: float) -> float:
+        # 最近接順位法
+        index = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered) + 0.5)) - 1))
+        return ordered[index] * 1000
+    
+    return {
+        'mean_ms': sum(ordered) / len(ordered) * 1000,
+        'min_ms': ordered[0] * 1000,
+        'p50_ms': rank(50),
+        'p90_ms': rank(90),
+        'p99_ms': rank(99),
+        'max_ms': ordered[-1] * 1000,
+    }
+
+
+def levenshtein(a: str, b: str) -> int:
+    """2つの文字列の編集距離"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        current = [i]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def ocr_accuracy(expected: str, actual: str) -> Tuple[float, float]:
+    """
+    OCR精度を計算する
+    
+    Args:
+        expected: 正解テキスト
+        actual: 認識結果
+    
+    Returns:
+        (文字精度, 単語再現率)
+    """
+    expected_norm = ' '.join(expected.split())
+    actual_norm = ' '.join(actual.split())
+    char = max(0.0, 1.0 - levenshtein(expected_norm, actual_norm) / max(1, len(expected_norm)))
+    
+    remaining = actual_norm.split()
+    found = 0
+    for word in expected_norm.split():
+        if word in remaining:
+            remaining.remove(word)
+            found += 1
+    word = found / max(1, len(expected_norm.split()))
+    return char, word
+
+
+def peak_rss_mb() -> Optional[float]:
+    """プロセスの最大メモリ使用量（MB）"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linuxは KB、macOS は bytes
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def git_revision() -> Optional[str]:
+    """現在のコミットID"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def bench_engine(engine_type: str, corpus_dir: str, samples: List[Tuple[str, str]],
+                 repeat: int, translate_latency: float, gpu: bool, text_detection: bool = False,
+                 tesseract_backend: Optional[str] = None, translation_url: Optional[str] = None) -> dict:
+    """
+    1つのOCRエンジンでコーパス全体を処理して測定する
+    
+    Args:
+        engine_type: "tesseract" または "easyocr"
+        corpus_dir: コーパスのフォルダ
+        samples: (画像パス, 正解テキスト) のリスト
+        repeat: コーパスを繰り返す回数
+        translate_latency: スタブ翻訳の疑似遅延（秒）
+        gpu: EasyOCRでGPUを使うか
+        text_detection: 文字領域を検出してその部分だけを認識するか
+        tesseract_backend: Tesseractの実行方式（"tesserocr" / "cli"、Noneで自動選択）
+        translation_url: スタブの代わりにGoogle翻訳と同じ形式で応答するHTTPサーバーのURL
+    
+    Returns:
+        測定結果
+    """
+    if engine_type == "tesseract":
+        engine = create_ocr_engine("tesseract", lang="eng", backend=tesseract_backend)
+    else:
+        engine = create_ocr_engine("easyocr", languages=["en"], gpu=gpu)
+    ocr_backend = getattr(engine, 'backend', None)
+    if text_detection:
+        engine = DetectingOCR(engine)
+    
+    if translation_url:
+        # 接続の使い回しや相乗りを含めたHTTPクライアントの処理時間を測る
+        stub = None
+        translator = Translator(source_lang="en", target_lang="ja", service="google", base_url=translation_url)
+    else:
+        stub = StubTranslator(translate_latency)
+        translator = Translator(source_lang="en", target_lang="ja", provider=stub)
+    
+    backend = ReplayCaptureBackend(corpus_dir, loop=True)
+    if backend.frame_count != len(samples):
+        raise ValueError("コーパスの画像と正解テキストの数が一致しません")
+    
+    # 初回のモデル読み込み等を測定から除外
+    engine.recognize(backend.capture(ReplayCaptureBackend.REPLAY_HWND))
+    backend.frame_index = 0
+    if text_detection:
+        engine.reset()
+    
+    timings: Dict[str, List[float]] = {name: [] for name in ('capture', 'preprocess', 'ocr', 'translate', 'total')}
+    char_scores: List[float] = []
+    word_scores: List[float] = []
+    per_sample = []
+    
+    preprocess_elapsed = 0.0
+    started = time.perf_counter()
+    for iteration in range(repeat):
+        for image_path, expected in samples:
+            t0 = time.perf_counter()
+            image = backend.capture(ReplayCaptureBackend.REPLAY_HWND)
+            t1 = time.perf_counter()
+            # エンジンは認識の中で自前の倍率で前処理するため、この前処理は参考値として測り、合計には含めない
+            preprocess_image(image)
+            t2 = time.perf_counter()
+            text = engine.recognize_full(image).text
+            t3 = time.perf_counter()
+            translator.translate(text)
+            t4 = time.perf_counter()
+            
+            timings['capture'].append(t1 - t0)
+            timings['preprocess'].append(t2 - t1)
+            timings['ocr'].append(t3 - t2)
+            timings['translate'].append(t4 - t3)
+            timings['total'].append((t1 - t0) + (t4 - t2))
+            preprocess_elapsed += t2 - t1
+            
+            if iteration == 0:
+                char, word = ocr_accuracy(expected, text)
+                char_scores.append(char)
+                word_scores.append(word)
+                per_sample.append({
+                    'image': os.path.basename(image_path),
+                    'char_accuracy': char,
+                    'word_recall': word,
+                    'recognized': text,
+                })
+    elapsed = time.perf_counter() - started - preprocess_elapsed
+    
+    frames = repeat * len(samples)
+    return {
+        'stages': {name: percentiles(values) for name, values in timings.items()},
+        'frames': frames,
+        'throughput_fps': frames / elapsed if elapsed else 0.0,
+        'translate_requests': stub.requests if stub is not None else translator.provider.get_stats()['requests'],
+        'accuracy': {
+            'char': sum(char_scores) / len(char_scores),
+            'word_recall': sum(word_scores) / len(word_scores),
+            'per_sample': per_sample,
+        },
+        'ocr_backend': ocr_backend,
+        'resolution': engine.resolution.get_stats() if engine.resolution is not None else None,
+        'text_detection': engine.get_stats() if text_detection else None,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def compare(baseline: dict, current: dict) -> List[str]:
+    """
+    基準の結果と比較した差分を文字列で返す
+    
+    Args:
+        baseline: 基準の結果
+        current: 今回の結果
+    
+    Returns:
+        表示用の行のリスト
+    """
+    lines = [f"基準: {baseline['meta'].get('git_revision')} → 今回: {current['meta'].get('git_revision')}"]
+    for engine, result in current['engines'].items():
+        base = baseline['engines'].get(engine)
+        if not base or 'stages' not in base or 'stages' not in result:
+            continue
+        lines.append(f"[{engine}]")
+        for stage, stats in result['stages'].items():
+            base_stats = base['stages'].get(stage)
+            if not base_stats or not stats:
+                continue
+            for key in ('p50_ms', 'p99_ms'):
+                delta = stats[key] - base_stats[key]
+                ratio = delta / base_stats[key] * 100 if base_stats[key] else 0.0
+                lines.append(f"  {stage:<10} {key}: {base_stats[key]:9.2f} → {stats[key]:9.2f} ({ratio:+.1f}%)")
+        lines.append(f"  char accuracy: {base['accuracy']['char']:.3f} → {result['accuracy']['char']:.3f}")
+        lines.append(f"  throughput: {base['throughput_fps']:.2f} → {result['throughput_fps']:.2f} fps")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="キャプチャ→OCR→翻訳パイプラインのベンチマーク")
+    parser.add_argument("--engines", nargs="+", default=["tesseract", "easyocr"],
+                        choices=["tesseract", "easyocr"], help="測定するOCRエンジン")
+    parser.add_argument("--corpus", help="コーパスのフォルダ（省略時は一時フォルダに生成）")
+    parser.add_argument("--repeat", type=int, default=3, help="コーパスを繰り返す回数")
+    parser.add_argument("--translate-latency-ms", type=float, default=0.0,
+                        help="スタブ翻訳の疑似遅延（ミリ秒）")
+    parser.add_argument("--gpu", action="store_true", help="EasyOCRでGPUを使う")
+    parser.add_argument("--text-detection", action="store_true",
+                        help="文字領域を検出してその部分だけを認識する")
+    parser.add_argument("--tesseract-backend", choices=["tesserocr", "cli"],
+                        help="Tesseractの実行方式（省略時はtesserocrがあれば常駐、無ければコマンド実行）")
+    parser.add_argument("--translation-url",
+                        help="スタブの代わりに翻訳を送るHTTPサーバーのURL（Google翻訳と同じ形式で応答するもの）")
+    parser.add_argument("--output", help="結果のJSONを保存するパス")
+    parser.add_argument("--baseline", help="比較する基準のJSON")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        corpus_dir = args.corpus or temp_dir
+        samples = load_corpus(corpus_dir) if args.corpus else generate_corpus(corpus_dir)
+        
+        result = {
+            'meta': {
+                'git_revision': git_revision(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'processor': platform.processor(),
+                'repeat': args.repeat,
+                'translate_latency_ms': args.translate_latency_ms,
+                'text_detection': args.text_detection,
+                'translation_url': args.translation_url,
+            },
+            'corpus': {'path': args.corpus or '(generated)', 'samples': len(samples)},
+            'engines': {},
+        }
+        
+        for engine_type in args.engines:
+            print(f"⏱️  {engine_type} を測定中...", file=sys.stderr)
+            try:
+                result['engines'][engine_type] = bench_engine(
+                    engine_type, corpus_dir, samples, args.repeat,
+                    args.translate_latency_ms / 1000, args.gpu, args.text_detection,
+                    args.tesseract_backend, args.translation_url
+                )
+            except Exception as e:
+                # エンジンが使えない環境では記録だけしてスキップ
+                print(f"  スキップ: {e}", file=sys.stderr)
+                result['engines'][engine_type] = {'skipped': str(e)}
+    
+    output = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+        print(f"💾 保存しました: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        print('\n'.join(compare(baseline, result)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+前処理のマイクロベンチマーク
+
+従来の PIL による前処理（LANCZOS 縮小 → グレースケール化 → コントラスト強調 → np.array）と、
+確保済みバッファを使う NumPy の前処理（Preprocessor）の1フレームあたりの時間と確保メモリを比較する。
+
+使い方:
+    python benchmarks/bench_preprocess.py
+    python benchmarks/bench_preprocess.py --sizes 1920x1080 2560x1440 --scales 1.0 0.5 --output result.json
+"""
+
+from PIL import Image, ImageEnhance
+from typing import Callable, Dict, List, Tuple
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+# リポジトリのルートをパスに追加
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from src.preprocess import Preprocessor, scaled_size
+from benchmarks.corpus import CORPUS_SPEC, render_sample
+
+
+def legacy_preprocess(image: Image.Image, scale: float) -> np.ndarray:
+    """変更前の前処理（EasyOCR に渡すまで）"""
+    if scale < 1.0:
+        image = image.resize(scaled_size(image.size, scale), Image.Resampling.LANCZOS)
+    if image.mode != 'L':
+        image = image.convert('L')
+    image = ImageEnhance.Contrast(image).enhance(1.5)
+    return np.array(image)
+
+
+def make_frame(size: Tuple[int, int]) -> Image.Image:
+    """コーパスのサンプルを指定サイズに並べたフレームを作る"""
+    frame = Image.new('RGB', size)
+    for index, (lines, font_size, background, foreground, noise) in enumerate(CORPUS_SPEC):
+        sample = render_sample(lines, font_size, background, foreground, noise, seed=index)
+        columns = max(1, size[0] // sample.width + 1)
+        frame.paste(sample, ((index % columns) * sample.width, (index // columns) * sample.height))
+    return frame
+
+
+def measure(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """
+    関数の1回あたりの時間と確保メモリを測定する
+    
+    Args:
+        func: 測定する関数
+        repeat: 繰り返し回数
+    
+    Returns:
+        mean_ms, min_ms, allocated_kb（2回目以降の1回あたりの確保量）
+    """
+    func()  # バッファの確保やキャッシュを測定から除外
+    
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        'mean_ms': sum(samples) / len(samples) * 1000,
+        'min_ms': min(samples) * 1000,
+        'allocated_kb': peak / 1024,
+    }
+
+
+def parse_size(text: str) -> Tuple[int, int]:
+    """"1920x1080" 形式の文字列をサイズに変換する"""
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR前処理のマイクロベンチマーク")
+    parser.add_argument("--sizes", nargs="+", default=["1280x720", "1920x1080", "2560x1440"],
+                        help="フレームサイズ（幅x高さ）")
+    parser.add_argument("--scales", nargs="+", type=float, default=[1.0, 0.6, 0.35],
+                        help="縮小率")
+    parser.add_argument("--repeat", type=int, default=20, help="繰り返し回数")
+    parser.add_argument("--output", help="結果のJSONを保存するパス")
+    args = parser.parse_args()
+    
+    variants = {
+        'legacy': None,
+        'numpy': Preprocessor(),
+        'numpy+binarize': Preprocessor(binarize=True),
+    }
+    
+    results: List[dict] = []
+    print(f"{'size':>10} {'scale':>6} {'variant':>15} {'mean_ms':>9} {'min_ms':>9} {'alloc_kb':>10}")
+    for size_text in args.sizes:
+        frame = make_frame(parse_size(size_text))
+        for scale in args.scales:
+            for name, preprocessor in variants.items():
+                if preprocessor is None:
+                    stats = measure(lambda: legacy_preprocess(frame, scale), args.repeat)
+                else:
+                    stats = measure(lambda: preprocessor.process(frame, scale), args.repeat)
+                results.append({'size': size_text, 'scale': scale, 'variant': name, **stats})
+                print(f"{size_text:>10} {scale:>6.2f} {name:>15} {stats['mean_ms']:>9.2f} "
+                      f"{stats['min_ms']:>9.2f} {stats['allocated_kb']:>10.0f}")
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 保存しました: {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
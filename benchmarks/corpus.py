@@ -0,0 +1,118 @@
+"""
+ベンチマーク用コーパス
+正解テキスト付きのスクリーンショットを決まった内容で生成・読み込みする
+
+生成したコーパスは NNN.png（画像）と NNN.txt（正解テキスト）の組で保存される。
+実際のスクリーンショットを使う場合も同じ形式でフォルダに置けばよい。
+"""
+
+from PIL import Image, ImageDraw, ImageFont
+from typing import List, Tuple
+import os
+import random
+
+# (正解テキストの行, 文字サイズ, 背景色, 文字色, ノイズの有無)
+CORPUS_SPEC = [
+    (["File  Edit  View  Help"], 14, (240, 240, 240), (20, 20, 20), False),
+    (["Press any key to continue"], 32, (10, 10, 30), (255, 255, 255), False),
+    (["Quest updated: Find the lost sword.", "Reward: 250 gold"], 22, (30, 30, 45), (230, 220, 180), True),
+    (["Your connection was interrupted.", "Please check your network settings and try again."], 18,
+     (255, 255, 255), (40, 40, 40), False),
+    (["Player1: anyone up for a raid tonight?", "Player2: sure, meet at the gate",
+      "Player3: I will bring potions"], 16, (20, 24, 28), (200, 230, 255), True),
+    (["Settings saved successfully"], 24, (245, 248, 255), (0, 90, 180), False),
+    (["The quick brown fox jumps over the lazy dog."], 12, (255, 255, 255), (0, 0, 0), False),
+    (["WARNING", "Low battery. Connect your charger."], 28, (60, 10, 10), (255, 210, 0), True),
+]
+
+CORPUS_IMAGE_SIZE = (960, 540)
+
+
+def _load_font(size: int):
+    """指定サイズのフォントを読み込む（FreeTypeがない環境ではビットマップフォント）"""
+    try:
+        return ImageFont.load_default(size=size)
+    except (TypeError, OSError):
+        return ImageFont.load_default()
+
+
+def render_sample(lines: List[str], size: int, background: Tuple[int, int, int],
+                  foreground: Tuple[int, int, int], noise: bool, seed: int) -> Image.Image:
+    """
+    1枚のサンプル画像を描画する
+    
+    Args:
+        lines: 描画するテキストの行
+        size: 文字サイズ
+        background: 背景色
+        foreground: 文字色
+        noise: 背景にノイズ（UI部品風の矩形）を入れるか
+        seed: 乱数シード
+    
+    Returns:
+        生成した画像
+    """
+    rng = random.Random(seed)
+    image = Image.new('RGB', CORPUS_IMAGE_SIZE, background)
+    draw = ImageDraw.Draw(image)
+    
+    if noise:
+        for _ in range(12):
+            x, y = rng.randrange(CORPUS_IMAGE_SIZE[0]), rng.randrange(CORPUS_IMAGE_SIZE[1])
+            shade = tuple(min(255, c + rng.randrange(10, 40)) for c in background)
+            draw.rectangle((x, y, x + rng.randrange(20, 200), y + rng.randrange(5, 40)), fill=shade)
+    
+    font = _load_font(size)
+    x = rng.randrange(20, 120)
+    y = rng.randrange(20, 200)
+    for line in lines:
+        draw.text((x, y), line, fill=foreground, font=font)
+        y += int(size * 1.6)
+    
+    return image
+
+
+def generate_corpus(directory: str) -> List[Tuple[str, str]]:
+    """
+    コーパスを生成してフォルダに保存する（内容は常に同じ）
+    
+    Args:
+        directory: 保存先のフォルダ
+    
+    Returns:
+        (画像パス, 正解テキスト) のリスト
+    """
+    os.makedirs(directory, exist_ok=True)
+    samples = []
+    for index, (lines, size, background, foreground, noise) in enumerate(CORPUS_SPEC):
+        image = render_sample(lines, size, background, foreground, noise, seed=index)
+        image_path = os.path.join(directory, f"{index:03d}.png")
+        image.save(image_path)
+        text = '\n'.join(lines)
+        with open(os.path.join(directory, f"{index:03d}.txt"), 'w', encoding='utf-8') as f:
+            f.write(text)
+        samples.append((image_path, text))
+    return samples
+
+
+def load_corpus(directory: str) -> List[Tuple[str, str]]:
+    """
+    フォルダからコーパスを読み込む
+    
+    Args:
+        directory: NNN.png と NNN.txt の組が置かれたフォルダ
+    
+    Returns:
+        (画像パス, 正解テキスト) のリスト（ファイル名順）
+    """
+    samples = []
+    for name in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() not in ('.png', '.jpg', '.jpeg', '.bmp'):
+            continue
+        text_path = os.path.join(directory, stem + '.txt')
+        if not os.path.exists(text_path):
+            continue
+        with open(text_path, encoding='utf-8') as f:
+            samples.append((os.path.join(directory, name), f.read().strip()))
+    return samples
@@ -5,25 +5,53 @@ Window Translator - メインGUIアプリケーション
 
 import customtkinter as ctk
 from PIL import Image, ImageTk
-import threading
-import time
-from typing import Optional
+import argparse
+import multiprocessing
+from typing import Optional, Sequence
 import sys
 import os
 
 # srcディレクトリをパスに追加
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.window_capture import get_window_list, capture_window, find_window_by_title
+from src.window_capture import get_window_list, capture_window, capture_window_region, find_window_by_title, set_capture_backend
+from src.capture_backends import create_capture_backend
 from src.ocr_engine import create_ocr_engine, TesseractOCR, EasyOCREngine
+from src.ocr_pool import get_engine_pool, make_engine_key
 from src.translator import Translator
+from src.translation_router import ProviderRouter
+from src.text_dedup import TextDeduplicator
+from src.translation_memory import TranslationMemory, default_memory_path
 from src.overlay import OverlayWindow
+from src.frame_diff import FrameDiffDetector
+from src.tile_ocr import TiledOCR
+from src.text_detection import DetectingOCR
+from src.confidence_filter import ConfidenceFilter
+from src.ocr_cache import CachingOCR, OCRCache
+from src.pipeline import CapturePipeline
+
+# 高速モードで1回のOCRにかけてよい秒数（超えそうな場合は画像を縮小する）
+FAST_MODE_LATENCY_BUDGET = 0.25
 
 
 class WindowTranslatorApp(ctk.CTk):
     """メインアプリケーションウィンドウ"""
     
-    def __init__(self):
+    def __init__(self, ocr_workers: int = 0, text_detection: bool = True, min_confidence: float = 60.0,
+                 translation_service: str = "google", phrase_table: Optional[str] = None,
+                 translation_fallbacks: Sequence[str] = ("mymemory",), translation_hedge: Optional[float] = None,
+                 dedup_noise: int = 1):
+        """
+        Args:
+            ocr_workers: OCRを実行するワーカープロセス数（0ならアプリのプロセス内で実行）
+            text_detection: 文字領域を検出してその部分だけを認識するか
+            min_confidence: 翻訳に送る認識結果の信頼度の下限（0〜100、0で選別しない）
+            translation_service: 翻訳サービス（"google", "mymemory", "argos", "phrase_table"）
+            phrase_table: フレーズ表のファイル（phrase_table 用、Noneなら組み込みの表）
+            translation_fallbacks: 翻訳サービスが失敗・遮断中の時に切り替えるサービス（優先順）
+            translation_hedge: 翻訳の応答がこの秒数より遅い時に次のサービスにも送る（Noneなら送らない）
+            dedup_noise: OCRの揺れとみなす記号の違いの数（0で取り違えやすい文字と大文字小文字・空白の違いだけを無視）
+        """
         super().__init__()
         
         # ウィンドウ設定
@@ -37,11 +65,34 @@ class WindowTranslatorApp(ctk.CTk):
         # 状態変数
         self.selected_hwnd: Optional[int] = None
         self.ocr_engine = None
-        self.translator = Translator(source_lang="en", target_lang="ja")
+        self.tiled_ocr: Optional[TiledOCR] = None
+        self.detecting_ocr: Optional[DetectingOCR] = None
+        self.confidence_filter: Optional[ConfidenceFilter] = None
+        # 画面の内容 → 認識結果（タブやメニューを行き来した時に認識を省く、全エンジンで共有）
+        self.ocr_cache = OCRCache()
+        self.engine_pool = get_engine_pool()
+        self.ocr_workers = ocr_workers
+        self.text_detection = text_detection
+        self.min_confidence = min_confidence
+        self._ocr_wrappers = {}
+        self._pending_action = None
+        self._pending_future = None
+        # OCRの揺れ（取り違えやすい文字・余計な記号・空白の違い）だけの文は翻訳し直さない
+        self.text_dedup = TextDeduplicator(max_noise=dedup_noise)
+        self.translator = self._create_translator(translation_service, phrase_table, translation_fallbacks,
+                                                  translation_hedge)
         self.is_capturing = False
-        self.capture_thread: Optional[threading.Thread] = None
+        self.pipeline: Optional[CapturePipeline] = None
+        # 開始を要求するたびに進む番号（前回のパイプラインの終了待ち中に停止・再開された場合に古い要求を捨てる）
+        self._launch_id = 0
+        self.capture_interval = 1.0
+        self._shown_frame_id = 0
+        self._shown_result_id = 0
         self.current_image: Optional[Image.Image] = None
         
+        # 変化のないフレームのOCRをスキップするための差分検出
+        self.frame_diff = FrameDiffDetector(threshold=0.0)
+        
         # オーバーレイウィンドウ
         self.overlay: Optional[OverlayWindow] = None
         self.overlay_enabled = False
@@ -51,6 +102,9 @@ class WindowTranslatorApp(ctk.CTk):
         
         # ウィンドウ一覧を更新
         self._refresh_window_list()
+        
+        # 最初のキャプチャで待たないよう、選択中のOCRエンジンを裏で読み込んでおく
+        self._preload_ocr_engine()
     
     def _build_ui(self):
         """UIを構築する"""
@@ -78,11 +132,13 @@ class WindowTranslatorApp(ctk.CTk):
         
         self.ocr_var = ctk.StringVar(value="easyocr")
         ocr_easyocr = ctk.CTkRadioButton(settings_frame, text="EasyOCR (高精度・推奨)", 
-                                         variable=self.ocr_var, value="easyocr")
+                                         variable=self.ocr_var, value="easyocr",
+                                         command=self._preload_ocr_engine)
         ocr_easyocr.grid(row=1, column=1, padx=5, pady=5, sticky="w")
         
         ocr_tesseract = ctk.CTkRadioButton(settings_frame, text="Tesseract (要インストール)", 
-                                           variable=self.ocr_var, value="tesseract")
+                                           variable=self.ocr_var, value="tesseract",
+                                           command=self._preload_ocr_engine)
         ocr_tesseract.grid(row=1, column=2, padx=5, pady=5, sticky="w")
         
         # キャプチャ間隔
@@ -101,9 +157,18 @@ class WindowTranslatorApp(ctk.CTk):
         self.fast_mode_var = ctk.BooleanVar(value=True)
         self.fast_mode_check = ctk.CTkCheckBox(settings_frame, text="⚡ 高速モード（画像を縮小して処理）", 
                                                 variable=self.fast_mode_var,
+                                                command=self._apply_fast_mode,
                                                 font=("Yu Gothic UI", 11))
         self.fast_mode_check.grid(row=3, column=1, padx=5, pady=5, sticky="w")
         
+        # キャプチャ領域（空欄ならウィンドウ全体）
+        region_label = ctk.CTkLabel(settings_frame, text="キャプチャ領域:", font=("Yu Gothic UI", 12))
+        region_label.grid(row=4, column=0, padx=5, pady=5, sticky="w")
+        
+        self.region_entry = ctk.CTkEntry(settings_frame, width=400,
+                                         placeholder_text="x, y, 幅, 高さ（空欄でウィンドウ全体）")
+        self.region_entry.grid(row=4, column=1, padx=5, pady=5, sticky="w")
+        
         # === 操作ボタン ===
         button_frame = ctk.CTkFrame(self.main_frame)
         button_frame.pack(fill="x", padx=5, pady=5)
@@ -164,8 +229,31 @@ class WindowTranslatorApp(ctk.CTk):
         self.status_label = ctk.CTkLabel(self.main_frame, text="準備完了", font=("Yu Gothic UI", 11))
         self.status_label.pack(fill="x", padx=5, pady=5)
     
+    def _open_translation_memory(self) -> TranslationMemory:
+        """翻訳メモリを開く（ディスクに保存できない場合はメモリのみ）"""
+        try:
+            return TranslationMemory(default_memory_path())
+        except Exception as e:
+            print(f"翻訳メモリを開けませんでした: {e}")
+            return TranslationMemory()
+    
+    def _create_translator(self, service: str, phrase_table: Optional[str], fallbacks: Sequence[str] = (),
+                           hedge_after: Optional[float] = None) -> Translator:
+        """翻訳機能を作成する（オフライン翻訳を使えない場合はGoogle翻訳）"""
+        memory = self._open_translation_memory()
+        fallbacks = [fallback for fallback in fallbacks if fallback != service]
+        options = {"path": phrase_table} if phrase_table and "phrase_table" in (service, *fallbacks) else {}
+        try:
+            return Translator(source_lang="en", target_lang="ja", service=service, memory=memory,
+                              fallback_services=fallbacks, hedge_after=hedge_after, dedup=self.text_dedup,
+                              **options)
+        except Exception as e:
+            print(f"翻訳サービス ({service}) を使用できません（Google翻訳を使用）: {e}")
+            return Translator(source_lang="en", target_lang="ja", memory=memory, dedup=self.text_dedup)
+    
     def _update_interval_label(self, value):
         """スライダーの値ラベルを更新"""
+        self.capture_interval = value
         self.interval_value_label.configure(text=f"{value:.1f}秒")
     
     def _refresh_window_list(self):
@@ -189,33 +277,146 @@ class WindowTranslatorApp(ctk.CTk):
         selected = self.window_combo.get()
         return self.window_data.get(selected)
     
-    def _init_ocr_engine(self):
-        """OCRエンジンを初期化する"""
-        engine_type = self.ocr_var.get()
+    def _get_capture_region(self):
+        """
+        入力されたキャプチャ領域を取得する
+        
+        Returns:
+            (x, y, width, height)、空欄の場合はNone
+        
+        Raises:
+            ValueError: 入力が不正な場合
+        """
+        text = self.region_entry.get().strip()
+        if not text:
+            return None
+        
+        values = [int(v) for v in text.replace("、", ",").split(",")]
+        if len(values) != 4 or values[2] <= 0 or values[3] <= 0:
+            raise ValueError("x, y, 幅, 高さ の4つの数値を入力してください")
+        return tuple(values)
+    
+    def _make_capture_func(self, hwnd: int):
+        """
+        キャプチャ関数を作成する（領域指定があれば領域だけを転送）
         
-        self._set_status(f"OCRエンジン ({engine_type}) を初期化中...")
-        self.update()
+        Args:
+            hwnd: ウィンドウハンドル
         
+        Returns:
+            引数なしで画像を返す関数、領域の入力が不正な場合はNone
+        """
         try:
-            if engine_type == "tesseract":
-                self.ocr_engine = create_ocr_engine("tesseract", lang="eng")
-            else:
-                # GPUがあれば使用（高速化）
-                try:
-                    import torch
-                    gpu_available = torch.cuda.is_available()
-                except:
-                    gpu_available = False
-                
-                self.ocr_engine = create_ocr_engine("easyocr", languages=["en"], gpu=gpu_available)
-                if gpu_available:
-                    self._set_status(f"OCRエンジン ({engine_type}) 準備完了 [GPU使用]")
-                    return
+            region = self._get_capture_region()
+        except ValueError as e:
+            self._set_status(f"キャプチャ領域が不正です: {e}")
+            return None
+        
+        if region is None:
+            return lambda: capture_window(hwnd)
+        return lambda: capture_window_region(hwnd, region)
+    
+    def _get_engine_options(self, engine_type: str) -> dict:
+        """OCRエンジンの作成オプション（プールのキーにもなる）"""
+        if engine_type == "tesseract":
+            options = {"lang": "eng"}
+        elif self.ocr_workers:
+            # ワーカープロセスごとにモデルを持つため、複数プロセス時はCPUで実行する
+            options = {"languages": ["en"], "gpu": False}
+        else:
+            # GPUの有無は読み込みスレッドで判定する（torchのimportが重いため）
+            options = {"languages": ["en"], "gpu": None}
+        
+        if self.ocr_workers:
+            options["workers"] = self.ocr_workers
+        return options
+    
+    def _apply_fast_mode(self):
+        """高速モードの設定をOCRエンジンのレイテンシ予算に反映する"""
+        if self.ocr_engine is None or self.ocr_engine.resolution is None:
+            return
+        # オフでも文字が大きい場合は読める高さまで縮小する（予算による縮小だけを止める）
+        budget = FAST_MODE_LATENCY_BUDGET if self.fast_mode_var.get() else None
+        self.ocr_engine.resolution.latency_budget = budget
+    
+    def _preload_ocr_engine(self):
+        """選択中のOCRエンジンをバックグラウンドで読み込む"""
+        engine_type = self.ocr_var.get()
+        self.engine_pool.preload(engine_type, **self._get_engine_options(engine_type))
+    
+    def _resolve_ocr_engine(self) -> bool:
+        """
+        選択中のOCRエンジンをプールから取得する（待たない）
+        
+        Returns:
+            エンジンが使用可能な場合True
+        """
+        engine_type = self.ocr_var.get()
+        options = self._get_engine_options(engine_type)
+        
+        engine = self.engine_pool.get_if_ready(engine_type, **options)
+        if engine is not None:
+            if engine_type not in self._ocr_wrappers:
+                # 文字領域の検出 → 信頼度による選別 → 結果のキャッシュ → 変化したタイルのみ再認識、の順に重ねる
+                detecting = DetectingOCR(engine) if self.text_detection else None
+                wrapped = detecting if detecting is not None else engine
+                confidence = None
+                if self.min_confidence > 0:
+                    confidence = ConfidenceFilter(wrapped, min_confidence=self.min_confidence,
+                                                  drop_below=self.min_confidence / 2, retry_engine=engine)
+                    wrapped = confidence
+                config = (make_engine_key(engine_type, **options), self.text_detection, self.min_confidence)
+                wrapped = CachingOCR(wrapped, self.ocr_cache, config)
+                self._ocr_wrappers[engine_type] = (wrapped, TiledOCR(wrapped), detecting, confidence)
+            self.ocr_engine, self.tiled_ocr, self.detecting_ocr, self.confidence_filter = \
+                self._ocr_wrappers[engine_type]
             
-            self._set_status(f"OCRエンジン ({engine_type}) 準備完了")
-        except Exception as e:
-            self._set_status(f"OCRエンジンの初期化に失敗: {e}")
-            self.ocr_engine = None
+            if self.confidence_filter is not None:
+                # もう一方のエンジンが読み込み済みなら、低信頼度の領域はそちらで再認識する
+                other_type = "easyocr" if engine_type == "tesseract" else "tesseract"
+                self.confidence_filter.fallback = self.engine_pool.get_if_ready(
+                    other_type, **self._get_engine_options(other_type)
+                )
+            self._apply_fast_mode()
+            return True
+        
+        # 読み込み中でなければ開始する（以前に失敗した設定はここで再試行される）
+        self._pending_future = self.engine_pool.preload(engine_type, **options)
+        self._set_status(f"OCRエンジン ({engine_type}) を読み込み中...")
+        return False
+    
+    def _run_when_engine_ready(self, action):
+        """
+        OCRエンジンの読み込み完了後に処理を実行する（UIは止めずに待つ）
+        
+        Args:
+            action: 読み込み完了後に呼ぶ関数（最後に要求されたものだけを実行）
+        """
+        waiting = self._pending_action is not None
+        self._pending_action = action
+        if not waiting:
+            self.after(200, self._poll_engine_ready)
+    
+    def _poll_engine_ready(self):
+        """OCRエンジンの読み込み状況を確認する（メインスレッドで定期実行）"""
+        future = self._pending_future
+        if future is not None and not future.done():
+            self.after(200, self._poll_engine_ready)
+            return
+        
+        action, self._pending_action = self._pending_action, None
+        self._pending_future = None
+        if future is not None and future.exception() is not None:
+            self._set_status(f"OCRエンジンの初期化に失敗: {future.exception()}")
+            return
+        
+        if future is not None:
+            suffix = " [GPU使用]" if getattr(future.result(), 'gpu', False) else ""
+            self._set_status(f"OCRエンジン準備完了{suffix}")
+        
+        # 待っている間にエンジンが切り替えられた場合は、実行時に改めて取得される
+        if action is not None:
+            action()
     
     def _capture_once(self):
         """1回キャプチャして翻訳する"""
@@ -224,17 +425,20 @@ class WindowTranslatorApp(ctk.CTk):
             self._set_status("ウィンドウを選択してください")
             return
         
-        # OCRエンジンが未初期化なら初期化
-        if self.ocr_engine is None:
-            self._init_ocr_engine()
-            if self.ocr_engine is None:
-                return
+        # OCRエンジンの読み込みが終わっていなければ、完了後に実行する
+        if not self._resolve_ocr_engine():
+            self._run_when_engine_ready(self._capture_once)
+            return
+        
+        capture_func = self._make_capture_func(hwnd)
+        if capture_func is None:
+            return
         
         self._set_status("キャプチャ中...")
         self.update()
         
         # キャプチャ
-        image = capture_window(hwnd)
+        image = capture_func()
         if image is None:
             self._set_status("キャプチャに失敗しました")
             return
@@ -247,7 +451,7 @@ class WindowTranslatorApp(ctk.CTk):
         self.update()
         
         try:
-            ocr_text = self.ocr_engine.recognize(image)
+            ocr_text = self.ocr_engine.recognize_full(image).text
             self.ocr_text.delete("1.0", "end")
             self.ocr_text.insert("1.0", ocr_text)
         except Exception as e:
@@ -301,62 +505,121 @@ class WindowTranslatorApp(ctk.CTk):
             self._set_status("ウィンドウを選択してください")
             return
         
-        # OCRエンジンが未初期化なら初期化
-        if self.ocr_engine is None:
-            self._init_ocr_engine()
-            if self.ocr_engine is None:
-                return
+        # OCRエンジンの読み込みが終わっていなければ、完了後に開始する
+        if not self._resolve_ocr_engine():
+            self._run_when_engine_ready(self._start_auto_capture)
+            return
+        
+        capture_func = self._make_capture_func(hwnd)
+        if capture_func is None:
+            return
         
         self.is_capturing = True
         self.start_btn.configure(text="⏹️ 自動キャプチャ停止", fg_color="red", hover_color="darkred")
         self.capture_once_btn.configure(state="disabled")
         
-        # キャプチャスレッドを開始
-        self.capture_thread = threading.Thread(target=self._auto_capture_loop, daemon=True)
-        self.capture_thread.start()
+        self._launch_id += 1
+        self._launch_pipeline(capture_func, self._launch_id)
+    
+    def _launch_pipeline(self, capture_func, launch_id: int):
+        """
+        前回のパイプラインの終了を待ってから新しいパイプラインを開始する（メインスレッドで実行）
+        
+        Args:
+            capture_func: キャプチャ関数
+            launch_id: 開始の要求番号（待っている間に停止・再開された場合は何もしない）
+        """
+        if not self.is_capturing or launch_id != self._launch_id:
+            return
+        
+        # 前回のパイプラインがまだ処理中なら終了を待つ（OCRエンジンを共有するため、UIは止めずに待つ）
+        if self.pipeline is not None and self.pipeline.is_running:
+            self._set_status("前回の処理の終了を待っています...")
+            self.after(100, lambda: self._launch_pipeline(capture_func, launch_id))
+            return
+        
+        # 前回のパイプラインが使い終わってから状態を初期化する
+        self.frame_diff.reset()
+        self.tiled_ocr.reset()
+        if self.detecting_ocr is not None:
+            self.detecting_ocr.reset()
+        if self.confidence_filter is not None:
+            self.confidence_filter.reset()
+        
+        # キャプチャ・OCR・翻訳を別スレッドで並行実行
+        self.pipeline = CapturePipeline(
+            capture_func=capture_func,
+            ocr_engine=self.tiled_ocr,
+            translator=self.translator,
+            interval_func=lambda: self.capture_interval,
+            frame_diff=self.frame_diff,
+            on_error=lambda e: self.after(0, lambda: self._set_status(f"エラー: {e}")),
+            dedup=self.text_dedup,
+        )
+        self.pipeline.start()
+        self._shown_frame_id = 0
+        self._shown_result_id = 0
+        self.after(100, self._poll_pipeline)
         
         self._set_status("自動キャプチャ開始")
     
     def _stop_auto_capture(self):
         """自動キャプチャを停止する"""
         self.is_capturing = False
+        if self.pipeline is not None:
+            self.pipeline.stop()
         self.start_btn.configure(text="▶️ 自動キャプチャ開始", fg_color="green", hover_color="darkgreen")
         self.capture_once_btn.configure(state="normal")
-        self._set_status("自動キャプチャ停止")
+        
+        stats = self.frame_diff.get_stats()
+        ocr_area = self.tiled_ocr.get_stats()['ocr_area_ratio']
+        if self.detecting_ocr is not None:
+            # 変化したタイルのうち、さらに文字が検出された部分だけを認識している
+            ocr_area *= self.detecting_ocr.get_stats()['text_area_ratio']
+        status = (
+            f"自動キャプチャ停止 (OCR実行: {stats['changed']}回 / "
+            f"スキップ: {stats['skipped']}回, {stats['skip_rate']:.0%} / "
+            f"OCR面積: {ocr_area:.0%}"
+        )
+        status += f" / OCRキャッシュ: {self.ocr_cache.get_stats()['hit_rate']:.0%}"
+        if self.confidence_filter is not None:
+            status += f" / 低信頼度で除外: {self.confidence_filter.get_stats()['dropped']}件"
+        fuzzy_hits = self.text_dedup.get_stats()['fuzzy_hits']
+        if fuzzy_hits:
+            status += f" / 揺れとして翻訳を再利用: {fuzzy_hits}件"
+        if self.pipeline is not None and self.pipeline.discarded:
+            status += f" / 古い翻訳を破棄: {self.pipeline.discarded}件"
+        if isinstance(self.translator.provider, ProviderRouter):
+            status += f" / 翻訳の切り替え: {self.translator.provider.get_stats()['failovers']}回"
+        self._set_status(status + ")")
     
-    def _auto_capture_loop(self):
-        """自動キャプチャのループ"""
-        while self.is_capturing:
-            hwnd = self._get_selected_hwnd()
-            if not hwnd:
-                break
-            
-            try:
-                # キャプチャ
-                image = capture_window(hwnd)
-                if image:
-                    self.current_image = image
-                    self.after(0, lambda img=image: self._update_preview(img))
-                    
-                    # OCR
-                    ocr_text = self.ocr_engine.recognize(image)
-                    self.after(0, lambda t=ocr_text: self._update_ocr_text(t))
-                    
-                    # 翻訳
-                    if ocr_text.strip():
-                        translated = self.translator.translate(ocr_text)
-                        self.after(0, lambda t=translated: self._update_trans_text(t))
-                
-            except Exception as e:
-                self.after(0, lambda e=e: self._set_status(f"エラー: {e}"))
+    def _poll_pipeline(self):
+        """パイプラインの最新結果をUIに反映する（メインスレッドで定期実行）"""
+        if not self.is_capturing or self.pipeline is None:
+            return
+        
+        frame = self.pipeline.get_latest_frame()
+        if frame is not None and frame.frame_id > self._shown_frame_id:
+            self._shown_frame_id = frame.frame_id
+            self.current_image = frame.image
+            self._update_preview(frame.image)
+        
+        # 完了した結果のうち最新のものだけを表示
+        result = self.pipeline.get_latest_result()
+        if result is not None and result.frame_id > self._shown_result_id:
+            self._shown_result_id = result.frame_id
+            self._update_ocr_text(result.ocr_text)
+            self._update_trans_text(result.translated)
             
-            # 指定間隔待機
-            interval = self.interval_slider.get()
-            wait_cycles = int(interval * 10)
-            for _ in range(wait_cycles):
-                if not self.is_capturing:
-                    break
-                time.sleep(0.1)
+            timings = self.pipeline.get_timings()
+            stages = " / ".join(
+                f"{name} {timings[key]['avg_ms']:.0f}ms"
+                for key, name in (('capture', 'キャプチャ'), ('ocr', 'OCR'), ('translate', '翻訳'), ('latency', '合計'))
+                if key in timings
+            )
+            self._set_status(f"自動キャプチャ中 ({stages})")
+        
+        self.after(100, self._poll_pipeline)
     
     def _update_ocr_text(self, text: str):
         """OCRテキストを更新する（メインスレッド用）"""
@@ -438,14 +701,64 @@ class WindowTranslatorApp(ctk.CTk):
     def on_closing(self):
         """ウィンドウを閉じる時の処理"""
         self.is_capturing = False
+        if self.pipeline is not None:
+            self.pipeline.stop()
         if self.overlay:
             self.overlay.destroy()
+        self.translator.close()
+        if self.translator.memory is not None:
+            self.translator.memory.close()
+        self.engine_pool.close()
         self.destroy()
 
 
+def parse_args(argv=None) -> argparse.Namespace:
+    """コマンドライン引数を解析する"""
+    parser = argparse.ArgumentParser(description="Window Translator - 英日翻訳")
+    parser.add_argument("--capture-backend", choices=["gdi", "mss", "replay"],
+                        help="キャプチャ方式（省略時はWindowsならgdi、それ以外はmss）")
+    parser.add_argument("--replay-path",
+                        help="リプレイする画像フォルダまたは動画ファイル（--capture-backend replay 用）")
+    parser.add_argument("--ocr-workers", type=int, default=0,
+                        help="OCRを実行するワーカープロセス数（CPUのみの環境で領域を並列に認識、0で無効）")
+    parser.add_argument("--no-text-detection", action="store_true",
+                        help="文字領域の検出を行わず、画面全体を認識する")
+    parser.add_argument("--min-confidence", type=float, default=60.0,
+                        help="翻訳に送る認識結果の信頼度の下限（0〜100、0で選別しない）")
+    parser.add_argument("--translation-service", default="google",
+                        choices=["google", "mymemory", "argos", "phrase_table"],
+                        help="翻訳サービス（argos と phrase_table はオフラインで翻訳）")
+    parser.add_argument("--phrase-table",
+                        help="phrase_table で使うフレーズ表（UTF-8、1行に「原文<TAB>訳文」）")
+    parser.add_argument("--translation-fallback", nargs="*", default=["mymemory"],
+                        choices=["google", "mymemory", "argos", "phrase_table"],
+                        help="翻訳サービスが失敗・遮断中の時に切り替えるサービス（優先順、指定なしで切り替えない）")
+    parser.add_argument("--dedup-noise", type=int, default=1,
+                        help="OCRの揺れとみなして前回の翻訳を再利用する記号の違いの数（0で取り違えやすい文字と大文字小文字・空白の違いだけを無視）")
+    parser.add_argument("--translation-hedge", type=float,
+                        help="翻訳の応答がこの秒数より遅い時に次のサービスにも同時に送り、早い方を使う")
+    args = parser.parse_args(argv)
+    if args.capture_backend == "replay" and not args.replay_path:
+        parser.error("--capture-backend replay には --replay-path の指定が必要です")
+    return args
+
+
 def main():
     """アプリケーションのエントリーポイント"""
-    app = WindowTranslatorApp()
+    # PyInstaller でビルドした実行ファイルからワーカープロセスを起動できるようにする
+    multiprocessing.freeze_support()
+    args = parse_args()
+    
+    # キャプチャ方式を切り替え（リプレイ指定時はファイルからフレームを読み込む）
+    if args.capture_backend or args.replay_path:
+        backend_name = args.capture_backend or "replay"
+        backend_kwargs = {"path": args.replay_path} if backend_name == "replay" else {}
+        set_capture_backend(create_capture_backend(backend_name, **backend_kwargs))
+    
+    app = WindowTranslatorApp(ocr_workers=args.ocr_workers, text_detection=not args.no_text_detection,
+                              min_confidence=args.min_confidence, translation_service=args.translation_service,
+                              phrase_table=args.phrase_table, translation_fallbacks=args.translation_fallback,
+                              translation_hedge=args.translation_hedge, dedup_noise=args.dedup_noise)
     app.protocol("WM_DELETE_WINDOW", app.on_closing)
     app.mainloop()
 
@@ -3,16 +3,41 @@ Window Translator Package
 ウィンドウの文字認識と翻訳を行うパッケージ
 """
 
-from .window_capture import get_window_list, find_window_by_title, capture_window
+from .window_capture import (
+    get_window_list, find_window_by_title, capture_window, capture_window_region,
+    capture_window_regions, get_capture_backend, set_capture_backend
+)
+from .capture_backends import (
+    CaptureBackend, GdiCaptureBackend, MssCaptureBackend, ReplayCaptureBackend, create_capture_backend
+)
 from .ocr_engine import create_ocr_engine, TesseractOCR, EasyOCREngine
+from .ocr_pool import OCREnginePool, get_engine_pool
 from .translator import Translator
+from .translation_providers import TranslationError, TranslationProvider, create_translation_provider
+from .translation_router import ProviderRouter, create_provider_router
 
 __all__ = [
     'get_window_list',
     'find_window_by_title', 
     'capture_window',
+    'capture_window_region',
+    'capture_window_regions',
+    'get_capture_backend',
+    'set_capture_backend',
+    'CaptureBackend',
+    'GdiCaptureBackend',
+    'MssCaptureBackend',
+    'ReplayCaptureBackend',
+    'create_capture_backend',
     'create_ocr_engine',
     'TesseractOCR',
     'EasyOCREngine',
-    'Translator'
+    'OCREnginePool',
+    'get_engine_pool',
+    'Translator',
+    'TranslationError',
+    'TranslationProvider',
+    'create_translation_provider',
+    'ProviderRouter',
+    'create_provider_router'
 ]
@@ -0,0 +1,126 @@
+"""
+適応解像度モジュール
+前フレームの文字の高さと処理時間から、OCRに渡す画像の縮小率をフレームごとに決める
+"""
+
+from typing import List, Optional, Tuple
+import math
+import threading
+
+
+class ResolutionController:
+    """
+    OCRの作業解像度を決めるコントローラ
+    文字の高さが target_glyph_height になるよう縮小し、
+    レイテンシ予算が設定されている場合は min_glyph_height を下限にさらに縮小する
+    """
+    
+    def __init__(self, target_glyph_height: float = 24.0, min_glyph_height: float = 12.0,
+                 latency_budget: Optional[float] = None, default_max_width: int = 1200,
+                 min_scale: float = 0.2, smoothing: float = 0.3):
+        """
+        Args:
+            target_glyph_height: 縮小後の文字の高さの目標（ピクセル）
+            min_glyph_height: レイテンシ予算のために縮小する場合でも守る文字の高さ（ピクセル）
+            latency_budget: 1回の認識にかけてよい秒数（Noneなら予算による縮小をしない）
+            default_max_width: 文字の高さが分からない間に使う最大幅
+            min_scale: 縮小率の下限
+            smoothing: 文字の高さと処理コストの指数移動平均の係数
+        """
+        self.target_glyph_height = target_glyph_height
+        self.min_glyph_height = min_glyph_height
+        self.latency_budget = latency_budget
+        self.default_max_width = default_max_width
+        self.min_scale = min_scale
+        self.smoothing = smoothing
+        
+        self._lock = threading.Lock()
+        self._text_height: Optional[float] = None  # 元画像での文字の高さ
+        self._cost_per_pixel: Optional[float] = None  # 縮小後の1ピクセルあたりの処理秒数
+        self.last_scale = 1.0
+    
+    def _smooth(self, previous: Optional[float], value: float) -> float:
+        """指数移動平均で値を更新する"""
+        if previous is None:
+            return value
+        return previous + self.smoothing * (value - previous)
+    
+    def choose_scale(self, size: Tuple[int, int]) -> float:
+        """
+        画像の縮小率を決める
+        
+        Args:
+            size: 元画像の (幅, 高さ)
+        
+        Returns:
+            縮小率（1.0で等倍、拡大はしない）
+        """
+        width, height = size
+        if width <= 0 or height <= 0:
+            return 1.0
+        
+        with self._lock:
+            text_height = self._text_height
+            cost_per_pixel = self._cost_per_pixel
+        
+        if text_height:
+            # 文字が十分に大きければ目標の高さまで縮小する
+            scale = self.target_glyph_height / text_height
+            floor = self.min_glyph_height / text_height
+        else:
+            scale = self.default_max_width / width
+            floor = self.min_scale
+        
+        if self.latency_budget and cost_per_pixel:
+            # 処理時間は画素数にほぼ比例するので、面積が予算に収まる縮小率を求める
+            budget_scale = math.sqrt(self.latency_budget / (cost_per_pixel * width * height))
+            scale = min(scale, max(budget_scale, floor))
+        
+        scale = max(self.min_scale, min(1.0, scale))
+        self.last_scale = scale
+        return scale
+    
+    def update(self, box_heights: List[float], elapsed: float, processed_pixels: int):
+        """
+        認識結果から文字の高さと処理コストの推定を更新する
+        
+        Args:
+            box_heights: 認識したボックスの高さ（元画像の座標）
+            elapsed: 認識にかかった秒数
+            processed_pixels: 認識した（縮小後の）画像の画素数
+        """
+        with self._lock:
+            if box_heights:
+                ordered = sorted(box_heights)
+                median = ordered[len(ordered) // 2]
+                self._text_height = self._smooth(self._text_height, median)
+            if processed_pixels > 0 and elapsed > 0:
+                self._cost_per_pixel = self._smooth(self._cost_per_pixel, elapsed / processed_pixels)
+    
+    @property
+    def text_height(self) -> Optional[float]:
+        """推定した文字の高さ（元画像のピクセル）"""
+        return self._text_height
+    
+    def reset(self):
+        """推定値を破棄する（対象ウィンドウが変わった時など）"""
+        with self._lock:
+            self._text_height = None
+            self._cost_per_pixel = None
+            self.last_scale = 1.0
+    
+    def get_stats(self) -> dict:
+        """
+        現在の推定値を取得する
+        
+        Returns:
+            text_height, cost_per_megapixel_ms, last_scale, latency_budget を含む辞書
+        """
+        with self._lock:
+            cost = self._cost_per_pixel
+            return {
+                'text_height': self._text_height,
+                'cost_per_megapixel_ms': cost * 1e6 * 1000 if cost is not None else None,
+                'last_scale': self.last_scale,
+                'latency_budget': self.latency_budget,
+            }
@@ -0,0 +1,404 @@
+"""
+キャプチャバックエンドモジュール
+Windows(GDI)・画面キャプチャ(MSS/X11)・リプレイ（画像フォルダ/動画）を同じインターフェースで扱う
+"""
+
+from PIL import Image
+from typing import Dict, List, Optional, Tuple
+import os
+import sys
+import threading
+
+from .capture_surface import WindowCapturer
+
+# (x, y, width, height)
+Region = Tuple[int, int, int, int]
+
+# リプレイで読み込む画像の拡張子
+REPLAY_IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff', '.webp')
+
+
+class CaptureBackend:
+    """キャプチャバックエンドの基底クラス"""
+    
+    name = ""
+    
+    def get_window_list(self) -> List[Tuple[int, str]]:
+        """(ウィンドウID, タイトル) のリストを取得する"""
+        raise NotImplementedError
+    
+    def get_window_rect(self, hwnd: int) -> Optional[Tuple[int, int, int, int]]:
+        """ウィンドウの画面上の位置 (left, top, right, bottom) を取得する"""
+        return None
+    
+    def capture(self, hwnd: int) -> Optional[Image.Image]:
+        """ウィンドウ全体をキャプチャする"""
+        raise NotImplementedError
+    
+    def capture_regions(self, hwnd: int, regions: Dict[str, Region]) -> Optional[Dict[str, Image.Image]]:
+        """
+        ウィンドウ内の複数の領域をキャプチャする
+        既定の実装は全体をキャプチャして切り抜く
+        
+        Args:
+            hwnd: ウィンドウID
+            regions: 領域名 → (x, y, width, height)
+        
+        Returns:
+            領域名 → 画像、失敗した場合はNone
+        """
+        image = self.capture(hwnd)
+        if image is None:
+            return None
+        return {
+            name: image.crop((x, y, x + width, y + height))
+            for name, (x, y, width, height) in regions.items()
+        }
+    
+    def bring_to_front(self, hwnd: int) -> bool:
+        """ウィンドウを前面に持ってくる"""
+        return False
+    
+    def close(self):
+        """バックエンドが保持しているリソースを解放する"""
+        pass
+
+
+class GdiCaptureBackend(CaptureBackend):
+    """
+    Windows GDI によるウィンドウキャプチャ
+    ウィンドウごとに WindowCapturer を保持してバッファを再利用する
+    """
+    
+    name = "gdi"
+    
+    def __init__(self):
+        import win32gui
+        
+        self.win32gui = win32gui
+        self._capturers: Dict[int, WindowCapturer] = {}
+        self._lock = threading.Lock()
+    
+    def get_window_list(self) -> List[Tuple[int, str]]:
+        windows = []
+        
+        def enum_callback(hwnd, results):
+            if self.win32gui.IsWindowVisible(hwnd):
+                title = self.win32gui.GetWindowText(hwnd)
+                if title:  # タイトルがあるウィンドウのみ
+                    results.append((hwnd, title))
+            return True
+        
+        self.win32gui.EnumWindows(enum_callback, windows)
+        return windows
+    
+    def get_window_rect(self, hwnd: int) -> Optional[Tuple[int, int, int, int]]:
+        if not self.win32gui.IsWindow(hwnd):
+            return None
+        return self.win32gui.GetWindowRect(hwnd)
+    
+    def get_capturer(self, hwnd: int) -> WindowCapturer:
+        """
+        ウィンドウのキャプチャオブジェクトを取得する（ウィンドウごとに1つを使い回す）
+        
+        Args:
+            hwnd: ウィンドウハンドル
+        
+        Returns:
+            WindowCapturer
+        """
+        with self._lock:
+            capturer = self._capturers.get(hwnd)
+            if capturer is None:
+                capturer = WindowCapturer(hwnd)
+                self._capturers[hwnd] = capturer
+            return capturer
+    
+    def release_capturer(self, hwnd: int):
+        """
+        ウィンドウのキャプチャオブジェクトを解放する
+        
+        Args:
+            hwnd: ウィンドウハンドル
+        """
+        with self._lock:
+            capturer = self._capturers.pop(hwnd, None)
+        if capturer is not None:
+            capturer.close()
+    
+    def capture(self, hwnd: int) -> Optional[Image.Image]:
+        if not self.win32gui.IsWindow(hwnd):
+            self.release_capturer(hwnd)
+            return None
+        
+        try:
+            # デバイスコンテキストとビットマップはフレーム間で再利用
+            return self.get_capturer(hwnd).capture()
+        except Exception:
+            self.release_capturer(hwnd)
+            raise
+    
+    def capture_regions(self, hwnd: int, regions: Dict[str, Region]) -> Optional[Dict[str, Image.Image]]:
+        if not self.win32gui.IsWindow(hwnd):
+            self.release_capturer(hwnd)
+            return None
+        
+        try:
+            images = self.get_capturer(hwnd).capture_regions(regions)
+            if images is not None:
+                return images
+        except Exception as e:
+            print(f"領域キャプチャエラー: {e}")
+        
+        # 領域の転送に失敗した場合は全体をキャプチャして切り抜く
+        return super().capture_regions(hwnd, regions)
+    
+    def bring_to_front(self, hwnd: int) -> bool:
+        self.win32gui.SetForegroundWindow(hwnd)
+        return True
+    
+    def close(self):
+        with self._lock:
+            capturers = list(self._capturers.values())
+            self._capturers.clear()
+        for capturer in capturers:
+            capturer.close()
+
+
+class MssCaptureBackend(CaptureBackend):
+    """
+    MSS による画面キャプチャ（Linux/X11・macOS・Windows）
+    モニターを負のIDのウィンドウとして扱い、python-xlib があればX11のウィンドウも列挙する
+    """
+    
+    name = "mss"
+    
+    def __init__(self):
+        import mss
+        
+        self._mss_module = mss
+        # MSSのインスタンスは作成したスレッドでしか使えないためスレッドごとに持つ
+        self._local = threading.local()
+        # close で全てのスレッドの分を閉じられるよう、作成したインスタンスを記録する
+        self._instances: list = []
+        self._lock = threading.Lock()
+        
+        try:
+            from Xlib import display as xdisplay
+            self._xdisplay = xdisplay.Display()
+        except Exception:
+            self._xdisplay = None
+    
+    def _sct(self):
+        """現在のスレッド用のMSSインスタンスを取得する"""
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = self._mss_module.mss()
+            self._local.sct = sct
+            with self._lock:
+                self._instances.append(sct)
+        return sct
+    
+    def get_window_list(self) -> List[Tuple[int, str]]:
+        windows = []
+        for index, monitor in enumerate(self._sct().monitors[1:], start=1):
+            windows.append((-index, f"モニター {index} ({monitor['width']}x{monitor['height']})"))
+        windows.extend(self._x11_windows())
+        return windows
+    
+    def _x11_windows(self) -> List[Tuple[int, str]]:
+        """X11のトップレベルウィンドウを列挙する"""
+        if self._xdisplay is None:
+            return []
+        
+        try:
+            root = self._xdisplay.screen().root
+            client_list = root.get_full_property(self._xdisplay.intern_atom('_NET_CLIENT_LIST'), 0)
+            if client_list is None:
+                return []
+            
+            windows = []
+            for window_id in client_list.value:
+                window = self._xdisplay.create_resource_object('window', window_id)
+                title = window.get_wm_name()
+                if title:
+                    windows.append((int(window_id), str(title)))
+            return windows
+        except Exception as e:
+            print(f"X11ウィンドウ一覧の取得エラー: {e}")
+            return []
+    
+    def get_window_rect(self, hwnd: int) -> Optional[Tuple[int, int, int, int]]:
+        if hwnd < 0:
+            monitors = self._sct().monitors
+            if -hwnd >= len(monitors):
+                return None
+            monitor = monitors[-hwnd]
+            return (monitor['left'], monitor['top'],
+                    monitor['left'] + monitor['width'], monitor['top'] + monitor['height'])
+        
+        if self._xdisplay is None:
+            return None
+        
+        try:
+            window = self._xdisplay.create_resource_object('window', hwnd)
+            geometry = window.get_geometry()
+            position = window.translate_coords(self._xdisplay.screen().root, 0, 0)
+            left, top = -position.x, -position.y
+            return (left, top, left + geometry.width, top + geometry.height)
+        except Exception:
+            return None
+    
+    def _grab(self, left: int, top: int, width: int, height: int) -> Image.Image:
+        """画面の指定範囲をキャプチャする"""
+        shot = self._sct().grab({'left': left, 'top': top, 'width': width, 'height': height})
+        return Image.frombuffer('RGB', shot.size, shot.bgra, 'raw', 'BGRX', 0, 1)
+    
+    def capture(self, hwnd: int) -> Optional[Image.Image]:
+        rect = self.get_window_rect(hwnd)
+        if rect is None:
+            return None
+        left, top, right, bottom = rect
+        if right <= left or bottom <= top:
+            return None
+        return self._grab(left, top, right - left, bottom - top)
+    
+    def capture_regions(self, hwnd: int, regions: Dict[str, Region]) -> Optional[Dict[str, Image.Image]]:
+        rect = self.get_window_rect(hwnd)
+        if rect is None:
+            return None
+        
+        # 領域ごとに画面から直接取得する
+        left, top = rect[0], rect[1]
+        return {
+            name: self._grab(left + x, top + y, width, height)
+            for name, (x, y, width, height) in regions.items()
+            if width > 0 and height > 0
+        }
+    
+    def close(self):
+        # 呼び出したスレッドの分だけでなく、キャプチャスレッドなどで作成した分（X11接続）も閉じる
+        with self._lock:
+            instances, self._instances = self._instances, []
+            # 閉じたインスタンスを使わないよう、次に使う時は各スレッドで作り直す
+            self._local = threading.local()
+        for sct in instances:
+            sct.close()
+
+
+class ReplayCaptureBackend(CaptureBackend):
+    """
+    記録済みのフレームを再生するバックエンド
+    画像フォルダ（ファイル名順）または動画ファイル（OpenCVが必要）からフレームを読み込む
+    """
+    
+    name = "replay"
+    
+    REPLAY_HWND = 1
+    
+    def __init__(self, path: Optional[str] = None, loop: bool = True):
+        """
+        Args:
+            path: 画像フォルダまたは動画ファイルのパス
+            loop: 最後まで再生したら最初に戻るかどうか
+        
+        Raises:
+            ValueError: パスが指定されていない・見つからない・再生できるフレームがない場合
+        """
+        if not path:
+            raise ValueError("リプレイする画像フォルダまたは動画ファイルのパスを指定してください")
+        
+        self.path = path
+        self.loop = loop
+        self.frame_index = 0
+        self._lock = threading.Lock()
+        self._video = None
+        self._files: List[str] = []
+        
+        if os.path.isdir(path):
+            self._files = sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(REPLAY_IMAGE_EXTENSIONS)
+            )
+            if not self._files:
+                raise ValueError(f"リプレイ用の画像がありません: {path}")
+        elif os.path.isfile(path):
+            import cv2
+            self._cv2 = cv2
+            self._video = cv2.VideoCapture(path)
+            if not self._video.isOpened():
+                raise ValueError(f"動画を開けませんでした: {path}")
+        else:
+            raise ValueError(f"リプレイのパスが見つかりません: {path}")
+    
+    @property
+    def frame_count(self) -> int:
+        """フレーム数"""
+        if self._video is not None:
+            return int(self._video.get(self._cv2.CAP_PROP_FRAME_COUNT))
+        return len(self._files)
+    
+    def get_window_list(self) -> List[Tuple[int, str]]:
+        return [(self.REPLAY_HWND, f"リプレイ: {os.path.basename(os.path.normpath(self.path))}")]
+    
+    def _next_video_frame(self) -> Optional[Image.Image]:
+        """動画の次のフレームを読み込む"""
+        ok, frame = self._video.read()
+        if not ok and self.loop:
+            self._video.set(self._cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = self._video.read()
+        if not ok:
+            return None
+        return Image.fromarray(self._cv2.cvtColor(frame, self._cv2.COLOR_BGR2RGB))
+    
+    def capture(self, hwnd: int) -> Optional[Image.Image]:
+        with self._lock:
+            if self._video is not None:
+                image = self._next_video_frame()
+            else:
+                if self.frame_index >= len(self._files):
+                    if not self.loop:
+                        return None
+                    self.frame_index = 0
+                with Image.open(self._files[self.frame_index]) as frame:
+                    image = frame.convert('RGB')
+            
+            if image is not None:
+                self.frame_index += 1
+            return image
+    
+    def close(self):
+        if self._video is not None:
+            self._video.release()
+
+
+def default_backend_name() -> str:
+    """
+    実行環境に合ったバックエンド名を取得する
+    
+    Returns:
+        Windowsなら"gdi"、それ以外は"mss"
+    """
+    return "gdi" if sys.platform == "win32" else "mss"
+
+
+def create_capture_backend(name: Optional[str] = None, **kwargs) -> CaptureBackend:
+    """
+    キャプチャバックエンドを作成するファクトリー関数
+    
+    Args:
+        name: "gdi", "mss", "replay"（Noneの場合は実行環境に合わせて選択）
+        **kwargs: バックエンド固有のオプション（replay の path など）
+    
+    Returns:
+        キャプチャバックエンド
+    """
+    name = (name or default_backend_name()).lower()
+    if name == "gdi":
+        return GdiCaptureBackend(**kwargs)
+    elif name == "mss":
+        return MssCaptureBackend(**kwargs)
+    elif name == "replay":
+        return ReplayCaptureBackend(**kwargs)
+    else:
+        raise ValueError(f"不明なキャプチャバックエンド: {name}")
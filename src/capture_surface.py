@@ -0,0 +1,377 @@
+"""
+キャプチャバッファモジュール
+ウィンドウごとにデバイスコンテキストとDIBセクションを保持し、フレーム間で再利用する
+"""
+
+from PIL import Image
+from typing import Dict, Optional, Tuple
+import threading
+
+# (x, y, width, height)
+Region = Tuple[int, int, int, int]
+
+# Windows API定数
+PW_RENDERFULLCONTENT = 2
+SRCCOPY = 0x00CC0020
+DIB_RGB_COLORS = 0
+BI_RGB = 0
+
+
+class CaptureSurface:
+    """
+    キャプチャの描画先バッファの基底クラス
+    Win32 API呼び出しをこのインターフェースの裏に隠し、
+    バッファ再利用のロジックを他のプラットフォームでもテストできるようにする
+    """
+    
+    def get_window_size(self, hwnd: int) -> Tuple[int, int]:
+        """ウィンドウのサイズ (幅, 高さ) を取得する"""
+        raise NotImplementedError
+    
+    def allocate(self, hwnd: int, width: int, height: int):
+        """指定サイズの描画先バッファを確保する"""
+        raise NotImplementedError
+    
+    def render(self, hwnd: int) -> bool:
+        """ウィンドウの内容をバッファに描画する"""
+        raise NotImplementedError
+    
+    def blit(self, hwnd: int, region: Region, dest: Tuple[int, int]) -> bool:
+        """ウィンドウの指定領域だけをバッファの dest の位置に転送する"""
+        raise NotImplementedError
+    
+    def buffer(self) -> memoryview:
+        """描画結果のピクセル（BGRA、上から下、行間の余白なし）"""
+        raise NotImplementedError
+    
+    def release(self):
+        """確保したバッファを解放する"""
+        raise NotImplementedError
+
+
+class GdiSurface(CaptureSurface):
+    """
+    GDIのDIBセクションを使う描画先バッファ
+    ピクセルメモリを直接参照できるため GetBitmapBits によるコピーが不要
+    """
+    
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        
+        self._ctypes = ctypes
+        self._user32 = ctypes.windll.user32
+        self._gdi32 = ctypes.windll.gdi32
+        
+        # 64bit環境でハンドルが切り詰められないよう型を指定
+        handle = ctypes.c_void_p
+        self._user32.GetWindowDC.argtypes = [wintypes.HWND]
+        self._user32.GetWindowDC.restype = handle
+        self._user32.ReleaseDC.argtypes = [wintypes.HWND, handle]
+        self._user32.PrintWindow.argtypes = [wintypes.HWND, handle, wintypes.UINT]
+        self._user32.GetWindowRect.argtypes = [wintypes.HWND, ctypes.POINTER(wintypes.RECT)]
+        self._gdi32.CreateCompatibleDC.argtypes = [handle]
+        self._gdi32.CreateCompatibleDC.restype = handle
+        self._gdi32.CreateDIBSection.argtypes = [handle, ctypes.c_void_p, wintypes.UINT,
+                                                 ctypes.POINTER(ctypes.c_void_p), handle, wintypes.DWORD]
+        self._gdi32.CreateDIBSection.restype = handle
+        self._gdi32.SelectObject.argtypes = [handle, handle]
+        self._gdi32.SelectObject.restype = handle
+        self._gdi32.DeleteObject.argtypes = [handle]
+        self._gdi32.DeleteDC.argtypes = [handle]
+        self._gdi32.BitBlt.argtypes = [handle, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                       handle, ctypes.c_int, ctypes.c_int, wintypes.DWORD]
+        
+        class BITMAPINFOHEADER(ctypes.Structure):
+            _fields_ = [
+                ('biSize', wintypes.DWORD),
+                ('biWidth', wintypes.LONG),
+                ('biHeight', wintypes.LONG),
+                ('biPlanes', wintypes.WORD),
+                ('biBitCount', wintypes.WORD),
+                ('biCompression', wintypes.DWORD),
+                ('biSizeImage', wintypes.DWORD),
+                ('biXPelsPerMeter', wintypes.LONG),
+                ('biYPelsPerMeter', wintypes.LONG),
+                ('biClrUsed', wintypes.DWORD),
+                ('biClrImportant', wintypes.DWORD),
+            ]
+        
+        self._header_type = BITMAPINFOHEADER
+        self._rect_type = wintypes.RECT
+        
+        self._hwnd: Optional[int] = None
+        self._window_dc = None
+        self._mem_dc = None
+        self._dib = None
+        self._old_bitmap = None
+        self._pixels: Optional[memoryview] = None
+        self._size = (0, 0)
+    
+    def get_window_size(self, hwnd: int) -> Tuple[int, int]:
+        rect = self._rect_type()
+        self._user32.GetWindowRect(hwnd, self._ctypes.byref(rect))
+        return rect.right - rect.left, rect.bottom - rect.top
+    
+    def allocate(self, hwnd: int, width: int, height: int):
+        self.release()
+        ctypes = self._ctypes
+        
+        self._hwnd = hwnd
+        self._window_dc = self._user32.GetWindowDC(hwnd)
+        self._mem_dc = self._gdi32.CreateCompatibleDC(self._window_dc)
+        
+        header = self._header_type()
+        header.biSize = ctypes.sizeof(self._header_type)
+        header.biWidth = width
+        header.biHeight = -height  # 負の値でトップダウン（行の並びをPILと揃える）
+        header.biPlanes = 1
+        header.biBitCount = 32
+        header.biCompression = BI_RGB
+        
+        bits = ctypes.c_void_p()
+        self._dib = self._gdi32.CreateDIBSection(self._mem_dc, ctypes.byref(header), DIB_RGB_COLORS,
+                                                 ctypes.byref(bits), None, 0)
+        if not self._dib:
+            self.release()
+            raise OSError("CreateDIBSection に失敗しました")
+        
+        self._old_bitmap = self._gdi32.SelectObject(self._mem_dc, self._dib)
+        self._pixels = memoryview((ctypes.c_ubyte * (width * height * 4)).from_address(bits.value)).cast('B')
+        self._size = (width, height)
+    
+    def render(self, hwnd: int) -> bool:
+        width, height = self._size
+        result = self._user32.PrintWindow(hwnd, self._mem_dc, PW_RENDERFULLCONTENT)
+        
+        if result == 0:
+            # PrintWindowが失敗した場合はBitBltを試す
+            result = self._gdi32.BitBlt(self._mem_dc, 0, 0, width, height, self._window_dc, 0, 0, SRCCOPY)
+        
+        # 描画が完了してからピクセルを読む
+        self._gdi32.GdiFlush()
+        return bool(result)
+    
+    def blit(self, hwnd: int, region: Region, dest: Tuple[int, int]) -> bool:
+        # PrintWindowは全体しか描画できないため、領域の転送はBitBltで行う
+        x, y, width, height = region
+        result = self._gdi32.BitBlt(self._mem_dc, dest[0], dest[1], width, height,
+                                    self._window_dc, x, y, SRCCOPY)
+        self._gdi32.GdiFlush()
+        return bool(result)
+    
+    def buffer(self) -> memoryview:
+        return self._pixels
+    
+    def release(self):
+        self._pixels = None
+        if self._mem_dc:
+            if self._old_bitmap:
+                self._gdi32.SelectObject(self._mem_dc, self._old_bitmap)
+            self._gdi32.DeleteDC(self._mem_dc)
+        if self._dib:
+            self._gdi32.DeleteObject(self._dib)
+        if self._window_dc:
+            self._user32.ReleaseDC(self._hwnd, self._window_dc)
+        self._window_dc = self._mem_dc = self._dib = self._old_bitmap = None
+        self._size = (0, 0)
+
+
+class WindowCapturer:
+    """
+    ウィンドウごとのキャプチャ
+    描画先バッファをフレーム間で使い回し、ウィンドウサイズが変わった時だけ確保し直す
+    """
+    
+    def __init__(self, hwnd: int, surface: Optional[CaptureSurface] = None,
+                 region_surface: Optional[CaptureSurface] = None):
+        """
+        Args:
+            hwnd: ウィンドウハンドル
+            surface: ウィンドウ全体用の描画先バッファ（Noneの場合はGDI）
+            region_surface: 領域キャプチャ用の描画先バッファ（Noneの場合は初回使用時にGDIで作成）
+        """
+        self.hwnd = hwnd
+        self.surface = surface if surface is not None else GdiSurface()
+        self.size = (0, 0)
+        self.allocations = 0
+        self._lock = threading.Lock()
+        
+        # 全体キャプチャと交互に使っても確保し直さないよう、領域用は別のバッファにする
+        self.region_surface = region_surface
+        self.region_buffer_size = (0, 0)
+        # 領域の転送（BitBlt）が黒い画素しか返さないウィンドウ（DWM・GPU描画）では全体を描画して切り抜く
+        self.blit_unreliable = False
+    
+    def _render(self) -> Optional[memoryview]:
+        """ウィンドウを描画し、ピクセルバッファを返す（ロック取得済みで呼ぶ）"""
+        width, height = self.surface.get_window_size(self.hwnd)
+        if width <= 0 or height <= 0:
+            return None
+        
+        if (width, height) != self.size:
+            self.surface.allocate(self.hwnd, width, height)
+            self.size = (width, height)
+            self.allocations += 1
+        
+        self.surface.render(self.hwnd)
+        return self.surface.buffer()
+    
+    def capture_array(self):
+        """
+        ウィンドウをキャプチャし、バッファをコピーせずにNumPy配列として返す
+        配列は次のキャプチャで上書きされるため、保持する場合はコピーすること
+        
+        Returns:
+            (高さ, 幅, 4) のBGRA配列、失敗した場合はNone
+        """
+        import numpy as np
+        
+        with self._lock:
+            pixels = self._render()
+            if pixels is None:
+                return None
+            width, height = self.size
+            return np.frombuffer(pixels, dtype=np.uint8).reshape(height, width, 4)
+    
+    def capture(self) -> Optional[Image.Image]:
+        """
+        ウィンドウをキャプチャする
+        
+        Returns:
+            キャプチャした画像（PIL Image）、失敗した場合はNone
+        """
+        with self._lock:
+            pixels = self._render()
+            if pixels is None:
+                return None
+            # BGRX → RGB の変換と同時に新しい画像へ書き出す（中間のbytesは作らない）
+            return Image.frombuffer('RGB', self.size, pixels, 'raw', 'BGRX', 0, 1)
+    
+    def capture_regions(self, regions: Dict[str, Region]) -> Optional[Dict[str, Image.Image]]:
+        """
+        ウィンドウ内の複数の領域を1回でキャプチャする
+        各領域だけを転送するため、ウィンドウ全体を描画してから切り抜くより軽い
+        転送した領域が真っ黒な場合は PrintWindow で全体を描画して確かめ、
+        そちらに内容があればこのウィンドウでは以降も全体を描画して切り抜く
+        
+        Args:
+            regions: 領域名 → (x, y, width, height)（ウィンドウ左上からの座標）
+        
+        Returns:
+            領域名 → 画像（PIL Image）、転送に失敗した場合はNone
+        """
+        with self._lock:
+            if self.blit_unreliable:
+                return self._crop_rendered(regions)
+            
+            if self.region_surface is None:
+                self.region_surface = GdiSurface()
+            
+            window_width, window_height = self.region_surface.get_window_size(self.hwnd)
+            
+            # ウィンドウ内に収まるよう切り詰め、縦に並べて1つのバッファに詰める
+            layout = {}
+            buffer_width = buffer_height = 0
+            for name, region in regions.items():
+                region = self._clip(region, window_width, window_height)
+                if region is None:
+                    continue
+                layout[name] = (region, buffer_height)
+                buffer_width = max(buffer_width, region[2])
+                buffer_height += region[3]
+            
+            if not layout:
+                return {}
+            
+            if (buffer_width, buffer_height) != self.region_buffer_size:
+                self.region_surface.allocate(self.hwnd, buffer_width, buffer_height)
+                self.region_buffer_size = (buffer_width, buffer_height)
+                self.allocations += 1
+            
+            for region, offset in layout.values():
+                if not self.region_surface.blit(self.hwnd, region, (0, offset)):
+                    return None
+            
+            pixels = self.region_surface.buffer()
+            stride = buffer_width * 4
+            images = {}
+            for name, ((x, y, width, height), offset) in layout.items():
+                rows = pixels[offset * stride:(offset + height) * stride]
+                image = Image.frombuffer('RGB', (buffer_width, height), rows, 'raw', 'BGRX', 0, 1)
+                images[name] = image if width == buffer_width else image.crop((0, 0, width, height))
+            
+            black = [name for name, image in images.items() if image.getbbox() is None]
+            if not black:
+                return images
+            
+            # DWMで合成されるウィンドウはウィンドウDCからの転送が黒くなるため、全体の描画と比べる
+            rendered = self._crop_rendered(regions)
+            if rendered is None:
+                return images
+            if any(rendered[name].getbbox() is not None for name in black if name in rendered):
+                self.blit_unreliable = True
+            return rendered
+    
+    @staticmethod
+    def _clip(region: Region, window_width: int, window_height: int) -> Optional[Region]:
+        """領域をウィンドウ内に収まるよう切り詰める（はみ出して空になる場合はNone）"""
+        x, y, width, height = region
+        x, y = max(0, x), max(0, y)
+        width = min(width, window_width - x)
+        height = min(height, window_height - y)
+        if width <= 0 or height <= 0:
+            return None
+        return x, y, width, height
+    
+    def _crop_rendered(self, regions: Dict[str, Region]) -> Optional[Dict[str, Image.Image]]:
+        """
+        PrintWindow でウィンドウ全体を描画先バッファに描画し、各領域を切り抜く（ロック取得済みで呼ぶ）
+        
+        Args:
+            regions: 領域名 → (x, y, width, height)
+        
+        Returns:
+            領域名 → 画像（PIL Image）、描画に失敗した場合はNone
+        """
+        pixels = self._render()
+        if pixels is None:
+            return None
+        
+        window_width, window_height = self.size
+        stride = window_width * 4
+        images = {}
+        for name, region in regions.items():
+            region = self._clip(region, window_width, window_height)
+            if region is None:
+                continue
+            x, y, width, height = region
+            # 領域の行だけを読み、横方向は切り抜く
+            rows = pixels[y * stride:(y + height) * stride]
+            image = Image.frombuffer('RGB', (window_width, height), rows, 'raw', 'BGRX', 0, 1)
+            images[name] = image.crop((x, 0, x + width, height))
+        return images
+    
+    def capture_region(self, region: Region) -> Optional[Image.Image]:
+        """
+        ウィンドウ内の1つの領域をキャプチャする
+        
+        Args:
+            region: (x, y, width, height)
+        
+        Returns:
+            キャプチャした画像（PIL Image）、失敗した場合はNone
+        """
+        images = self.capture_regions({'region': region})
+        if not images:
+            return None
+        return images['region']
+    
+    def close(self):
+        """描画先バッファを解放する"""
+        with self._lock:
+            self.surface.release()
+            self.size = (0, 0)
+            if self.region_surface is not None:
+                self.region_surface.release()
+                self.region_buffer_size = (0, 0)
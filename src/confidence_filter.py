@@ -0,0 +1,188 @@
+"""
+信頼度フィルタモジュール
+信頼度の低い認識結果を翻訳に送らないよう除外し、境界付近のものは1回だけ再認識する
+"""
+
+from PIL import Image
+from typing import List, Optional, Tuple
+
+from .ocr_engine import OCREngine
+from .ocr_result import LINE_KEY, normalize_confidence
+
+# (left, top, right, bottom)
+Rect = Tuple[int, int, int, int]
+
+
+class ConfidenceFilter(OCREngine):
+    """
+    信頼度で認識結果を選別するラッパーエンジン
+    min_confidence 以上はそのまま使い、drop_below 未満は捨てる
+    その間のものは拡大した切り抜き（または別のエンジン）で再認識し、信頼度が上がったものだけを残す
+    """
+    
+    def __init__(self, engine: OCREngine, min_confidence: float = 60.0, drop_below: float = 30.0,
+                 retry_engine: Optional[OCREngine] = None, fallback: Optional[OCREngine] = None,
+                 retry_scale: float = 2.0, max_scale: float = 3.0, padding: int = 4,
+                 max_retries: int = 8):
+        """
+        Args:
+            engine: 実際に認識を行うOCRエンジン
+            min_confidence: 翻訳に送る信頼度の下限（0〜100）
+            drop_below: これ未満の信頼度は再認識せずに捨てる
+            retry_engine: 再認識に使うエンジン（Noneの場合は engine、
+                          engine が検出などのラッパーの場合は元のエンジンを渡す）
+            fallback: 読み込み済みの別のOCRエンジン（指定した場合は再認識に優先して使う）
+            retry_scale: 再認識で1回目の作業解像度に掛ける倍率
+            max_scale: 再認識の倍率の上限（元画像に対する倍率）
+            padding: 再認識する切り抜きの周囲に追加する余白
+            max_retries: 1フレームで再認識する最大数（処理時間の上限）
+        """
+        self.engine = engine
+        self.resolution = engine.resolution
+        self.min_confidence = min_confidence
+        self.drop_below = drop_below
+        self.retry_engine = retry_engine if retry_engine is not None else engine
+        self.fallback = fallback
+        self.retry_scale = retry_scale
+        self.max_scale = max_scale
+        self.padding = padding
+        self.max_retries = max_retries
+        
+        # 統計情報
+        self.boxes = 0
+        self.dropped = 0
+        self.retried = 0
+        self.recovered = 0
+    
+    def _retry(self, image: Image.Image, box: dict) -> List[dict]:
+        """
+        信頼度が境界付近のボックスを拡大して再認識する
+        
+        Args:
+            image: 元画像
+            box: 再認識するボックス
+        
+        Returns:
+            信頼度が min_confidence 以上になった認識結果（座標は元画像基準）
+        """
+        rect = (
+            max(0, box['left'] - self.padding),
+            max(0, box['top'] - self.padding),
+            min(image.width, box['left'] + box['width'] + self.padding),
+            min(image.height, box['top'] + box['height'] + self.padding),
+        )
+        if rect[2] <= rect[0] or rect[3] <= rect[1]:
+            return []
+        
+        # 1回目に縮小して認識していれば、その倍率より細かく読み直す
+        base_scale = self.resolution.last_scale if self.resolution is not None else 1.0
+        scale = min(self.max_scale, max(1.0, base_scale * self.retry_scale))
+        
+        engine = self.fallback if self.fallback is not None else self.retry_engine
+        results = []
+        for retried in engine.recognize_scaled(image.crop(rect), scale):
+            if normalize_confidence(retried.get('confidence')) < self.min_confidence:
+                continue
+            retried = dict(retried)
+            retried['left'] += rect[0]
+            retried['top'] += rect[1]
+            # 切り抜きを認識した行の番号は元の結果と対応しないため、元の単語の行に入れる
+            retried.pop(LINE_KEY, None)
+            if box.get(LINE_KEY) is not None:
+                retried[LINE_KEY] = box[LINE_KEY]
+            results.append(retried)
+        return results
+    
+    def filter_boxes(self, image: Image.Image, boxes: List[dict]) -> List[dict]:
+        """
+        認識結果を信頼度で選別する
+        
+        Args:
+            image: 認識した画像（再認識に使う）
+            boxes: 認識結果のリスト（座標は image 基準）
+        
+        Returns:
+            信頼度が十分な認識結果のリスト
+        """
+        kept = []
+        uncertain = []
+        for box in boxes:
+            confidence = normalize_confidence(box.get('confidence'))
+            if confidence >= self.min_confidence:
+                kept.append(box)
+            elif confidence >= self.drop_below:
+                uncertain.append(box)
+            else:
+                self.dropped += 1
+        self.boxes += len(boxes)
+        
+        # 信頼度の高い順に再認識する（上限を超えた分は捨てる）
+        uncertain.sort(key=lambda b: normalize_confidence(b.get('confidence')), reverse=True)
+        for index, box in enumerate(uncertain):
+            if index >= self.max_retries:
+                self.dropped += 1
+                continue
+            self.retried += 1
+            try:
+                retried = self._retry(image, box)
+            except Exception as e:
+                print(f"再認識エラー: {e}")
+                retried = []
+            if retried:
+                self.recovered += 1
+                kept.extend(retried)
+            else:
+                self.dropped += 1
+        return kept
+    
+    def recognize_with_boxes(self, image: Image.Image) -> List[dict]:
+        """
+        画像から文字を認識し、信頼度の十分な結果だけを返す
+        
+        Args:
+            image: 入力画像
+        
+        Returns:
+            認識結果のリスト
+        """
+        return self.filter_boxes(image, self.engine.recognize_with_boxes(image))
+    
+    def recognize_regions(self, image: Image.Image, rects: List[Rect]) -> List[List[dict]]:
+        """
+        画像内の複数の領域を認識し、領域ごとに信頼度で選別する
+        
+        Args:
+            image: 入力画像
+            rects: (left, top, right, bottom) のリスト
+        
+        Returns:
+            領域ごとの認識結果のリスト（座標は元画像基準）
+        """
+        # 領域の認識はエンジンに任せる（プロセスプールなら並列のまま）
+        return [self.filter_boxes(image, boxes) for boxes in self.engine.recognize_regions(image, rects)]
+    
+    def warm_up(self):
+        """元のエンジンをウォームアップする"""
+        self.engine.warm_up()
+    
+    def reset(self):
+        """統計情報をリセットする"""
+        self.boxes = 0
+        self.dropped = 0
+        self.retried = 0
+        self.recovered = 0
+    
+    def get_stats(self) -> dict:
+        """
+        統計情報を取得する
+        
+        Returns:
+            boxes, dropped, retried, recovered, drop_rate を含む辞書
+        """
+        return {
+            'boxes': self.boxes,
+            'dropped': self.dropped,
+            'retried': self.retried,
+            'recovered': self.recovered,
+            'drop_rate': self.dropped / self.boxes if self.boxes else 0.0,
+        }
@@ -0,0 +1,115 @@
+"""
+フレーム差分検出モジュール
+前回のキャプチャと比較して、変化のないフレームのOCR・翻訳をスキップする
+"""
+
+from PIL import Image, ImageChops
+from typing import Optional, Tuple
+
+
+class FrameDiffDetector:
+    """
+    縮小したグレースケール画像（知覚ハッシュ的なシグネチャ）で
+    フレーム間の変化量を判定するクラス
+    """
+    
+    def __init__(self, threshold: float = 0.0, hash_width: int = 160, pixel_tolerance: int = 4):
+        """
+        Args:
+            threshold: 変化したセルの割合（0.0〜1.0）がこの値以下ならスキップする
+            hash_width: シグネチャの横幅（縦はアスペクト比から決定）
+            pixel_tolerance: セルを「変化あり」とみなす輝度差（0〜255）
+        """
+        self.threshold = threshold
+        self.hash_width = hash_width
+        self.pixel_tolerance = pixel_tolerance
+        
+        self._previous: Optional[Image.Image] = None
+        self._lut = [255 if v > pixel_tolerance else 0 for v in range(256)]
+        
+        # 統計情報
+        self.changed_frames = 0
+        self.skipped_frames = 0
+    
+    def _signature(self, image: Image.Image) -> Image.Image:
+        """
+        比較用の縮小グレースケール画像を作成する
+        
+        Args:
+            image: 入力画像
+        
+        Returns:
+            シグネチャ画像
+        """
+        height = max(1, round(image.height * self.hash_width / max(1, image.width)))
+        # 先に縮小してからグレースケール化（全画素への変換を避ける）
+        small = image.resize((self.hash_width, height), Image.Resampling.BILINEAR, reducing_gap=2.0)
+        return small.convert('L')
+    
+    def change_ratio(self, image: Image.Image) -> float:
+        """
+        前フレームに対する変化量を計算する（状態は更新しない）
+        
+        Args:
+            image: 入力画像
+        
+        Returns:
+            変化したセルの割合（0.0〜1.0）、前フレームがない場合は1.0
+        """
+        return self._compare(self._signature(image))[0]
+    
+    def _compare(self, signature: Image.Image) -> Tuple[float, Image.Image]:
+        """シグネチャを前フレームと比較する"""
+        previous = self._previous
+        if previous is None or previous.size != signature.size:
+            return 1.0, signature
+        
+        diff = ImageChops.difference(signature, previous).point(self._lut)
+        changed = diff.histogram()[255]
+        return changed / (signature.width * signature.height), signature
+    
+    def has_changed(self, image: Image.Image) -> bool:
+        """
+        フレームに変化があるかを判定し、統計と前フレームを更新する
+        
+        Args:
+            image: 入力画像
+        
+        Returns:
+            OCRが必要な場合True、スキップしてよい場合False
+        """
+        ratio, signature = self._compare(self._signature(image))
+        
+        if ratio > self.threshold:
+            # 変化があったフレームのみ基準を更新（ゆっくりした変化の蓄積も検出できる）
+            self._previous = signature
+            self.changed_frames += 1
+            return True
+        
+        self.skipped_frames += 1
+        return False
+    
+    def reset(self):
+        """前フレームと統計情報をリセットする"""
+        self._previous = None
+        self.changed_frames = 0
+        self.skipped_frames = 0
+    
+    @property
+    def skip_rate(self) -> float:
+        """スキップしたフレームの割合"""
+        total = self.changed_frames + self.skipped_frames
+        return self.skipped_frames / total if total else 0.0
+    
+    def get_stats(self) -> dict:
+        """
+        統計情報を取得する
+        
+        Returns:
+            changed（処理したフレーム数）, skipped（スキップ数）, skip_rate
+        """
+        return {
+            'changed': self.changed_frames,
+            'skipped': self.skipped_frames,
+            'skip_rate': self.skip_rate,
+        }
@@ -0,0 +1,281 @@
+"""
+HTTP翻訳クライアントモジュール
+オンライン翻訳サービスへの接続をセッションで使い回し（keep-alive）、同時接続数を制限する
+同じ内容のリクエストが処理中なら相乗りし、新しいフレームに置き換わった送信前のリクエストは取り消す
+"""
+
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+import html
+import re
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .translation_providers import SERVICE_LIMITS, TranslationCancelled, TranslationError, TranslationProvider
+
+# 各サービスの既定のURL（base_url を指定するとローカルのスタブサーバーなどに向けられる）
+GOOGLE_URL = "https://translate.google.com/m"
+MYMEMORY_URL = "https://api.mymemory.translated.net/get"
+
+# Google翻訳のモバイル版ページで訳文が入る要素
+GOOGLE_RESULT_PATTERN = re.compile(
+    r'<div[^>]*class="(?:result-container|t0)"[^>]*>(.*?)</div>', re.DOTALL
+)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+# (接続, 読み込み) のタイムアウト（秒）
+DEFAULT_TIMEOUT = (3.05, 10.0)
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) WindowTranslator"
+
+
+class _InFlight:
+    """処理中のリクエスト（相乗りしたリクエストと結果を共有する）"""
+    
+    __slots__ = ('future', 'generation')
+    
+    def __init__(self, generation: int):
+        self.future: Future = Future()
+        self.generation = generation
+
+
+class HttpTranslationClient:
+    """
+    翻訳サービス用のHTTPクライアント（スレッドセーフ）
+    requests.Session の接続プールで接続を使い回し、同時に送るリクエストを max_connections 本に制限する
+    """
+    
+    def __init__(self, base_url: str, max_connections: int = 4,
+                 timeout: Tuple[float, float] = DEFAULT_TIMEOUT):
+        """
+        Args:
+            base_url: リクエストを送るURL
+            max_connections: 同時接続数（接続プールの大きさ）
+            timeout: (接続, 読み込み) のタイムアウト（秒）
+        """
+        self.base_url = base_url
+        self.timeout = timeout
+        
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        # 再試行は行わない（失敗した時の切り替えは ProviderRouter に任せる）
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Tuple, _InFlight] = {}
+        self.generation = 0
+        
+        # 統計情報
+        self.requests = 0
+        self.coalesced = 0
+        self.cancelled = 0
+    
+    def get(self, params: Dict[str, str], parse: Callable) -> str:
+        """
+        GETリクエストを送り、応答を解析した結果を返す
+        同じパラメータのリクエストが処理中ならそれに相乗りし、新しく送らない
+        
+        Args:
+            params: クエリパラメータ
+            parse: 応答（requests.Response）から訳文を取り出す関数
+        
+        Returns:
+            訳文
+        
+        Raises:
+            TranslationCancelled: 送信前に cancel_pending が呼ばれた場合
+            TranslationError: サービスがエラーを返した場合
+        """
+        key = tuple(sorted(params.items()))
+        with self._lock:
+            entry = self._in_flight.get(key)
+            joined = entry is not None
+            if joined:
+                # 新しい世代のリクエストが相乗りした場合は取り消さない
+                entry.generation = self.generation
+                self.coalesced += 1
+            else:
+                entry = self._in_flight[key] = _InFlight(self.generation)
+        
+        if joined:
+            return entry.future.result()
+        
+        try:
+            with self._slots:
+                with self._lock:
+                    superseded = entry.generation < self.generation
+                    if superseded:
+                        self.cancelled += 1
+                    else:
+                        self.requests += 1
+                if superseded:
+                    raise TranslationCancelled("新しいフレームの翻訳に置き換わったため送信を取り消しました")
+                
+                response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+                try:
+                    if response.status_code != 200:
+                        raise TranslationError(f"{self.base_url} が HTTP {response.status_code} を返しました")
+                    result = parse(response)
+                finally:
+                    response.close()
+        except BaseException as e:
+            entry.future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                if self._in_flight.get(key) is entry:
+                    del self._in_flight[key]
+        
+        entry.future.set_result(result)
+        return result
+    
+    def cancel_pending(self):
+        """まだ送っていないリクエストを取り消す（送信済みのものは応答を待つ）"""
+        with self._lock:
+            self.generation += 1
+    
+    def get_stats(self) -> dict:
+        """
+        統計情報を取得する
+        
+        Returns:
+            requests, coalesced, cancelled を含む辞書
+        """
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'coalesced': self.coalesced,
+                'cancelled': self.cancelled,
+            }
+    
+    def close(self):
+        """接続を閉じる"""
+        self.session.close()
+
+
+class HttpTranslationProvider(TranslationProvider):
+    """HTTPクライアントでオンライン翻訳サービスを使うプロバイダの基底クラス"""
+    
+    pack_lines = True
+    
+    def __init__(self, service: str, base_url: str, client: Optional[HttpTranslationClient] = None):
+        """
+        Args:
+            service: SERVICE_LIMITS のサービス名
+            base_url: リクエストを送るURL
+            client: 使用するHTTPクライアント（Noneの場合は新しく作成）
+        """
+        self.name = service
+        limits = SERVICE_LIMITS[service]
+        self.max_chars = limits["max_chars"]
+        self.max_workers = limits["max_workers"]
+        self.min_interval = limits["min_interval"]
+        self.client = client if client is not None else HttpTranslationClient(base_url, self.max_workers)
+    
+    def cancel_pending(self):
+        self.client.cancel_pending()
+    
+    def get_stats(self) -> dict:
+        """
+        統計情報を取得する
+        
+        Returns:
+            HttpTranslationClient.get_stats と同じ辞書
+        """
+        return self.client.get_stats()
+    
+    def close(self):
+        self.client.close()
+
+
+class GoogleWebProvider(HttpTranslationProvider):
+    """Google翻訳（モバイル版ページの訳文を取り出す、deep_translator と同じ方式）"""
+    
+    def __init__(self, source_lang: str = "en", target_lang: str = "ja", base_url: Optional[str] = None,
+                 client: Optional[HttpTranslationClient] = None):
+        """
+        Args:
+            source_lang: 翻訳元の言語コード
+            target_lang: 翻訳先の言語コード
+            base_url: リクエストを送るURL（Noneの場合はGoogle翻訳）
+            client: 使用するHTTPクライアント（Noneの場合は新しく作成）
+        """
+        super().__init__("google", base_url or GOOGLE_URL, client)
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+    
+    @staticmethod
+    def _parse(response) -> str:
+        # 文字コードの指定が無い応答を requests は ISO-8859-1 とみなすため、UTF-8 として読む
+        if 'charset' not in response.headers.get('Content-Type', ''):
+            response.encoding = 'utf-8'
+        match = GOOGLE_RESULT_PATTERN.search(response.text)
+        if match is None:
+            raise TranslationError("Google翻訳の応答に訳文がありません")
+        return html.unescape(TAG_PATTERN.sub('', match.group(1))).strip()
+    
+    def translate(self, text: str) -> str:
+        if not text.strip():
+            return text
+        return self.client.get({'sl': self.source_lang, 'tl': self.target_lang, 'q': text.strip()}, self._parse)
+
+
+class MyMemoryWebProvider(HttpTranslationProvider):
+    """MyMemory翻訳API"""
+    
+    def __init__(self, source_lang: str = "en", target_lang: str = "ja", base_url: Optional[str] = None,
+                 client: Optional[HttpTranslationClient] = None):
+        """
+        Args:
+            source_lang: 翻訳元の言語コード
+            target_lang: 翻訳先の言語コード
+            base_url: リクエストを送るURL（Noneの場合はMyMemory）
+            client: 使用するHTTPクライアント（Noneの場合は新しく作成）
+        """
+        super().__init__("mymemory", base_url or MYMEMORY_URL, client)
+        self.langpair = f"{source_lang}|{target_lang}"
+    
+    @staticmethod
+    def _parse(response) -> str:
+        data = response.json()
+        # 上限に達した場合なども HTTP 200 で返り、responseStatus にエラーが入る
+        if str(data.get('responseStatus', 200)) != '200':
+            raise TranslationError(f"MyMemory: {data.get('responseDetails') or data.get('responseStatus')}")
+        translation = (data.get('responseData') or {}).get('translatedText')
+        if not translation:
+            matches = data.get('matches') or []
+            if not matches:
+                raise TranslationError("MyMemoryの応答に訳文がありません")
+            translation = matches[0].get('translation', '')
+        return translation
+    
+    def translate(self, text: str) -> str:
+        if not text.strip():
+            return text
+        return self.client.get({'langpair': self.langpair, 'q': text.strip()}, self._parse)
+
+
+def create_web_provider(service: str, source_lang: str = "en", target_lang: str = "ja",
+                        base_url: Optional[str] = None) -> HttpTranslationProvider:
+    """
+    オンライン翻訳サービスのプロバイダを作成する
+    
+    Args:
+        service: "google" または "mymemory"
+        source_lang: 翻訳元の言語コード
+        target_lang: 翻訳先の言語コード
+        base_url: リクエストを送るURL（Noneの場合は各サービスの既定）
+    
+    Returns:
+        翻訳プロバイダ
+    """
+    if service == "google":
+        return GoogleWebProvider(source_lang, target_lang, base_url)
+    if service == "mymemory":
+        return MyMemoryWebProvider(source_lang, target_lang, base_url)
+    raise ValueError(f"不明な翻訳サービス: {service}")
@@ -0,0 +1,227 @@
+"""
+OCR結果キャッシュモジュール
+画像（領域）の内容のハッシュをキーに認識結果を保持し、同じ画面に戻った時は認識を省く
+"""
+
+from collections import OrderedDict
+from PIL import Image
+from typing import Hashable, List, Optional, Tuple
+import hashlib
+import threading
+
+from .ocr_engine import OCREngine
+from .ocr_result import scope_line_keys
+
+# (left, top, right, bottom)
+Rect = Tuple[int, int, int, int]
+
+# 認識結果1件（辞書とその中身）のおおよそのメモリ量（バイト）
+BOX_OVERHEAD = 400
+ENTRY_OVERHEAD = 200
+
+
+def image_digest(image: Image.Image) -> bytes:
+    """
+    画像の内容のハッシュを求める
+    
+    Args:
+        image: 画像
+    
+    Returns:
+        ハッシュ値（モードとサイズも含む）
+    """
+    # CRC32 では衝突した時に別の画面の文字を返してしまうため、十分な長さのハッシュを使う
+    digest = hashlib.sha1(f"{image.mode}:{image.width}x{image.height}".encode(), usedforsecurity=False)
+    digest.update(image.tobytes())
+    return digest.digest()
+
+
+def _estimate_size(boxes: List[dict]) -> int:
+    """認識結果のおおよそのメモリ量（バイト）"""
+    return ENTRY_OVERHEAD + sum(BOX_OVERHEAD + len(box['text']) * 4 for box in boxes)
+
+
+class OCRCache:
+    """
+    OCR結果のLRUキャッシュ
+    件数とおおよそのメモリ量の両方で上限を設け、超えた分は使われていない順に捨てる
+    """
+    
+    def __init__(self, max_entries: int = 512, max_bytes: int = 16 * 1024 * 1024):
+        """
+        Args:
+            max_entries: 保持する最大件数
+            max_bytes: 保持する認識結果のおおよその最大メモリ量（バイト）
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple, Tuple[List[dict], int]]" = OrderedDict()
+        self._bytes = 0
+        
+        # 統計情報
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Tuple) -> Optional[List[dict]]:
+        """
+        キャッシュから認識結果を取得する
+        
+        Args:
+            key: キー
+        
+        Returns:
+            認識結果のリスト（座標は画像・領域基準）、無ければNone
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return [dict(box) for box in entry[0]]
+    
+    def put(self, key: Tuple, boxes: List[dict]):
+        """
+        認識結果をキャッシュに保存する
+        
+        Args:
+            key: キー
+            boxes: 認識結果のリスト（座標は画像・領域基準）
+        """
+        size = _estimate_size(boxes)
+        if size > self.max_bytes:
+            return
+        
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = ([dict(box) for box in boxes], size)
+            self._bytes += size
+            
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+    
+    def clear(self):
+        """キャッシュを空にする"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def get_stats(self) -> dict:
+        """
+        統計情報を取得する
+        
+        Returns:
+            hits, misses, hit_rate, entries, bytes, evictions を含む辞書
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'evictions': self.evictions,
+            }
+
+
+class CachingOCR(OCREngine):
+    """
+    認識結果をキャッシュするラッパーエンジン
+    画像全体・領域ごとに内容のハッシュを取り、以前と同じ画素なら認識せずに結果を返す
+    """
+    
+    def __init__(self, engine: OCREngine, cache: Optional[OCRCache] = None, config: Hashable = ()):
+        """
+        Args:
+            engine: 実際に認識を行うOCRエンジン
+            cache: 使用するキャッシュ（Noneの場合は新しく作成、複数のエンジンで共有してもよい）
+            config: エンジンの設定を表す値（設定の異なるエンジンの結果を区別するキーの一部）
+        """
+        self.engine = engine
+        self.resolution = engine.resolution
+        self.cache = cache if cache is not None else OCRCache()
+        self.config = config
+    
+    def _key(self, image: Image.Image) -> Tuple:
+        """キャッシュのキー（エンジンの設定と画像の内容）"""
+        return (self.config, image_digest(image))
+    
+    def recognize_with_boxes(self, image: Image.Image) -> List[dict]:
+        """
+        画像から文字を認識する（同じ画像を認識済みならキャッシュから返す）
+        
+        Args:
+            image: 入力画像
+        
+        Returns:
+            認識結果のリスト
+        """
+        key = self._key(image)
+        boxes = self.cache.get(key)
+        if boxes is None:
+            boxes = self.engine.recognize_with_boxes(image)
+            self.cache.put(key, boxes)
+        return boxes
+    
+    def recognize_regions(self, image: Image.Image, rects: List[Rect]) -> List[List[dict]]:
+        """
+        画像内の複数の領域を認識する（認識済みの領域はキャッシュから返す）
+        
+        Args:
+            image: 入力画像
+            rects: (left, top, right, bottom) のリスト
+        
+        Returns:
+            領域ごとの認識結果のリスト（座標は元画像基準）
+        """
+        results: List[Optional[List[dict]]] = []
+        missing = []
+        for index, rect in enumerate(rects):
+            key = self._key(image.crop(rect))
+            boxes = self.cache.get(key)
+            if boxes is not None:
+                for box in boxes:
+                    box['left'] += rect[0]
+                    box['top'] += rect[1]
+            else:
+                missing.append((index, key))
+            results.append(boxes)
+        
+        # キャッシュに無い領域だけをまとめてエンジンに渡す（並列に認識できるエンジンではそのまま並列）
+        if missing:
+            recognized = self.engine.recognize_regions(image, [rects[index] for index, _ in missing])
+            for (index, key), boxes in zip(missing, recognized):
+                left, top = rects[index][0], rects[index][1]
+                relative = []
+                for box in boxes:
+                    box = dict(box)
+                    box['left'] -= left
+                    box['top'] -= top
+                    relative.append(box)
+                self.cache.put(key, relative)
+                results[index] = boxes
+        
+        # キャッシュから返した領域と今回認識した領域で行の番号が重ならないようにする
+        return [scope_line_keys(boxes, index) for index, boxes in enumerate(results)]
+    
+    def warm_up(self):
+        """元のエンジンをウォームアップする"""
+        self.engine.warm_up()
+    
+    def get_stats(self) -> dict:
+        """
+        キャッシュの統計情報を取得する
+        
+        Returns:
+            OCRCache.get_stats と同じ辞書
+        """
+        return self.cache.get_stats()
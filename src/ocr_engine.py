@@ -3,58 +3,214 @@ OCRエンジンモジュール
 画像から文字を認識する
 """
 
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import Image, ImageFilter
 from typing import Optional, List, Tuple
+import io
 import os
+import subprocess
+import threading
+import time
 
+from .adaptive_resolution import ResolutionController
+from .ocr_result import LINE_KEY, OCRResult, normalize_confidence, scope_line_keys
+from .preprocess import Preprocessor, resize_for_ocr, scaled_size
 
-def preprocess_image(image: Image.Image, max_width: int = 1200) -> Image.Image:
+# preprocess_image 用の前処理（バッファはスレッドごとに使い回す）
+_default_preprocessor = Preprocessor()
+
+
+def preprocess_image(image: Image.Image, max_width: int = 1200, scale: Optional[float] = None) -> Image.Image:
     """
     OCR用に画像を前処理する（速度向上のため）
     
     Args:
         image: 入力画像
         max_width: 最大幅（これより大きい場合はリサイズ）
+        scale: 縮小率（指定した場合は max_width の代わりに使う）
     
     Returns:
         前処理済み画像
     """
     # 大きすぎる画像はリサイズ（速度向上）
-    if image.width > max_width:
-        ratio = max_width / image.width
-        new_size = (max_width, int(image.height * ratio))
-        image = image.resize(new_size, Image.Resampling.LANCZOS)
+    if scale is None:
+        scale = min(1.0, max_width / image.width)
+    
+    # グレースケール化とコントラスト強調（バッファは再利用されるため画像にする際にコピー）
+    return Image.fromarray(_default_preprocessor.process(image, scale).copy())
+
+
+def detect_gpu() -> bool:
+    """
+    CUDAが使えるかどうかを調べる
+    
+    Returns:
+        GPUが使用可能な場合True
+    """
+    try:
+        import torch
+        return torch.cuda.is_available()
+    except Exception:
+        return False
+
+
+# Tesseract の TSV 出力の列（API の GetTSVText はヘッダー行を出力しない）
+TSV_COLUMNS = ('level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+               'left', 'top', 'width', 'height', 'conf', 'text')
+
+
+def parse_tesseract_tsv(tsv: str) -> dict:
+    """
+    Tesseract の TSV 出力を pytesseract.image_to_data と同じ形式の辞書にする
+    
+    Args:
+        tsv: TSV（ヘッダー行は無くてもよい）
     
-    # グレースケール化
-    if image.mode != 'L':
-        image = image.convert('L')
+    Returns:
+        列名 → 値のリスト（数値の列は int、conf は float）
+    """
+    rows = tsv.splitlines()
+    columns = list(TSV_COLUMNS)
+    if rows and rows[0].startswith('level'):
+        columns = rows.pop(0).split('\t')
     
-    # コントラスト強調
-    enhancer = ImageEnhance.Contrast(image)
-    image = enhancer.enhance(1.5)
+    data = {column: [] for column in columns}
+    for row in rows:
+        if not row:
+            continue
+        values = row.split('\t')
+        if len(values) < len(columns):
+            # 文字のない要素は text 列が省略されることがある
+            values += [''] * (len(columns) - len(values))
+        for column, value in zip(columns, values):
+            if column == 'text':
+                data[column].append(value)
+            elif column == 'conf':
+                data[column].append(float(value))
+            else:
+                data[column].append(int(value))
+    return data
+
+
+def make_warm_up_image() -> Image.Image:
+    """
+    ウォームアップ用のダミー画像を作成する
+    検出と認識の両方が走るよう、白地に黒で英文を描画する
+    """
+    from PIL import ImageDraw
     
+    image = Image.new('RGB', (320, 64), (255, 255, 255))
+    ImageDraw.Draw(image).text((10, 20), "Warm up OCR 123", fill=(0, 0, 0))
     return image
 
 
 class OCREngine:
     """OCRエンジンの基底クラス"""
     
+    # 作業解像度を決めるコントローラ（対応するエンジンのみ）
+    resolution: Optional[ResolutionController] = None
+    
     def recognize(self, image: Image.Image) -> str:
-        """画像から文字を認識する"""
+        """
+        画像から文字を認識する
+        
+        Args:
+            image: 入力画像
+        
+        Returns:
+            行ごとに改行で区切った認識テキスト（読み順）
+        """
+        return self.recognize_full(image).text
+    
+    def recognize_with_boxes(self, image: Image.Image) -> List[dict]:
+        """画像から文字を認識し、位置情報も取得する"""
         raise NotImplementedError
+    
+    def recognize_full(self, image: Image.Image) -> OCRResult:
+        """
+        1回の認識でテキスト・単語のボックス・段落のボックスをまとめて取得する
+        同じフレームのテキストと位置の両方が必要な場合は、これを1回だけ呼ぶ
+        
+        Args:
+            image: 入力画像
+        
+        Returns:
+            読み順に並んだ認識結果（text, to_boxes(), paragraph_boxes()）
+        """
+        return OCRResult.from_boxes(self.recognize_with_boxes(image))
+    
+    def recognize_scaled(self, image: Image.Image, scale: float) -> List[dict]:
+        """
+        指定した倍率に拡大・縮小して認識する（低信頼度の領域の再認識用）
+        
+        Args:
+            image: 入力画像
+            scale: 倍率
+        
+        Returns:
+            認識結果のリスト（座標は元画像基準）
+        """
+        resized = image.resize(scaled_size(image.size, scale), Image.Resampling.BICUBIC)
+        boxes = []
+        for box in self.recognize_with_boxes(resized):
+            box = dict(box)
+            for key in ('left', 'top', 'width', 'height'):
+                box[key] = int(box[key] / scale)
+            boxes.append(box)
+        return boxes
+    
+    def recognize_regions(self, image: Image.Image, rects: List[Tuple[int, int, int, int]]) -> List[List[dict]]:
+        """
+        画像内の複数の領域をそれぞれ認識する
+        
+        Args:
+            image: 入力画像
+            rects: (left, top, right, bottom) のリスト
+        
+        Returns:
+            領域ごとの認識結果のリスト（座標は元画像基準）
+        """
+        results = []
+        for index, rect in enumerate(rects):
+            boxes = []
+            for box in scope_line_keys(self.recognize_with_boxes(image.crop(rect)), index):
+                box = dict(box)
+                box['left'] += rect[0]
+                box['top'] += rect[1]
+                boxes.append(box)
+            results.append(boxes)
+        return results
+    
+    def warm_up(self):
+        """
+        ダミー画像で1回認識を実行する
+        モデルの初期化やメモリ確保を済ませ、最初の実際のキャプチャを速くする
+        """
+        self.recognize(make_warm_up_image())
+        
+        # ダミー画像の文字の高さや初回の処理時間を推定に残さない
+        if self.resolution is not None:
+            self.resolution.reset()
 
 
 class TesseractOCR(OCREngine):
     """
     Tesseract OCRエンジン
     軽量で高速、ただしインストールが必要
+    tesserocr があればエンジンを常駐させて使い回し、無ければ tesseract コマンドを
+    パイプ経由で実行する（どちらも一時ファイルを使わない）
     """
     
-    def __init__(self, tesseract_path: Optional[str] = None, lang: str = "eng"):
+    # 実行ファイルを1回実行する際の制限時間（秒）
+    CLI_TIMEOUT = 30
+    
+    def __init__(self, tesseract_path: Optional[str] = None, lang: str = "eng",
+                 resolution: Optional[ResolutionController] = None, backend: Optional[str] = None):
         """
         Args:
             tesseract_path: Tesseractの実行ファイルパス
             lang: 認識する言語（eng, jpn, eng+jpn など）
+            resolution: 作業解像度を決めるコントローラ（Noneの場合は既定値で作成）
+            backend: "tesserocr"（常駐）または "cli"（コマンド実行）、Noneの場合は自動選択
         """
         import pytesseract
         
@@ -65,51 +221,166 @@ class TesseractOCR(OCREngine):
         
         self.pytesseract = pytesseract
         self.lang = lang
+        self.resolution = resolution if resolution is not None else ResolutionController()
+        
+        # 常駐エンジンは同時に1フレームしか扱えない
+        self._lock = threading.Lock()
+        self._api = None
+        if backend in (None, "tesserocr"):
+            try:
+                self._api = self._open_api(pytesseract.pytesseract.tesseract_cmd)
+            except ImportError:
+                if backend == "tesserocr":
+                    raise
+            except Exception as e:
+                if backend == "tesserocr":
+                    raise
+                print(f"tesserocr の初期化に失敗（tesseract コマンドを使用）: {e}")
+        self.backend = "tesserocr" if self._api is not None else "cli"
     
-    def recognize(self, image: Image.Image) -> str:
+    def _open_api(self, tesseract_cmd: str):
         """
-        画像から文字を認識する
+        tesserocr のエンジンを作成する（言語データの読み込みはここで1回だけ行う）
         
         Args:
-            image: 入力画像
+            tesseract_cmd: Tesseractの実行ファイルパス（同じ場所の tessdata を使う）
         
         Returns:
-            認識されたテキスト
+            PyTessBaseAPI
         """
-        # 画像を前処理（グレースケール化して認識精度を上げる）
-        if image.mode != 'L':
-            gray_image = image.convert('L')
-        else:
-            gray_image = image
+        import tesserocr
         
-        text = self.pytesseract.image_to_string(gray_image, lang=self.lang)
-        return text.strip()
+        kwargs = {'lang': self.lang, 'psm': tesserocr.PSM.AUTO}
+        tessdata = os.path.join(os.path.dirname(tesseract_cmd), "tessdata")
+        if os.path.isdir(tessdata):
+            kwargs['path'] = tessdata
+        return tesserocr.PyTessBaseAPI(**kwargs)
     
-    def recognize_with_boxes(self, image: Image.Image) -> List[dict]:
+    def _image_to_data(self, gray_image: Image.Image) -> dict:
         """
-        画像から文字を認識し、位置情報も取得する
+        グレースケール画像を認識し、単語ごとの位置と (ブロック, 段落, 行) 番号を得る
+        
+        Args:
+            gray_image: 'L' モードの画像
+        
+        Returns:
+            pytesseract.image_to_data と同じ形式の辞書
+        """
+        if self._api is not None:
+            # 画素をそのまま渡す（画像ファイルへのエンコードも不要）
+            with self._lock:
+                self._api.SetImageBytes(gray_image.tobytes(), gray_image.width, gray_image.height,
+                                        1, gray_image.width)
+                self._api.Recognize()
+                return parse_tesseract_tsv(self._api.GetTSVText(0))
+        
+        # 一時ファイルの代わりに標準入出力で画像と結果を受け渡す（PNMはエンコードがほぼ不要）
+        buffer = io.BytesIO()
+        gray_image.save(buffer, format='PPM')
+        command = [self.pytesseract.pytesseract.tesseract_cmd, 'stdin', 'stdout', '-l', self.lang, 'tsv']
+        creationflags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+        completed = subprocess.run(command, input=buffer.getvalue(), capture_output=True,
+                                   timeout=self.CLI_TIMEOUT, creationflags=creationflags)
+        if completed.returncode != 0:
+            raise RuntimeError(completed.stderr.decode('utf-8', 'replace').strip())
+        return parse_tesseract_tsv(completed.stdout.decode('utf-8', 'replace'))
+    
+    def _read(self, image: Image.Image,
+              scale: Optional[float] = None) -> Tuple[List[dict], List[Tuple[int, int, int]]]:
+        """
+        作業解像度に縮小して認識し、座標を元画像に戻して返す
         
         Args:
             image: 入力画像
+            scale: 倍率（指定した場合は作業解像度の推定を使わず、更新もしない）
         
         Returns:
-            認識結果のリスト（text, left, top, width, height）
+            (認識結果のリスト, 各単語の (ブロック, 段落, 行) 番号)
         """
-        data = self.pytesseract.image_to_data(image, lang=self.lang, output_type=self.pytesseract.Output.DICT)
+        fixed_scale = scale is not None
+        if not fixed_scale:
+            scale = self.resolution.choose_scale(image.size)
+        
+        # 先に縮小してからグレースケール化する（変換する画素数を減らす）
+        gray_image = resize_for_ocr(image, scale)
+        
+        # 画像を前処理（グレースケール化して認識精度を上げる）
+        if gray_image.mode != 'L':
+            gray_image = gray_image.convert('L')
+        
+        started = time.perf_counter()
+        data = self._image_to_data(gray_image)
+        elapsed = time.perf_counter() - started
         
         results = []
+        line_keys = []
         for i in range(len(data['text'])):
             if data['text'][i].strip():
                 results.append({
                     'text': data['text'][i],
-                    'left': data['left'][i],
-                    'top': data['top'][i],
-                    'width': data['width'][i],
-                    'height': data['height'][i],
-                    'confidence': data['conf'][i]
+                    'left': int(data['left'][i] / scale),
+                    'top': int(data['top'][i] / scale),
+                    'width': int(data['width'][i] / scale),
+                    'height': int(data['height'][i] / scale),
+                    'confidence': normalize_confidence(data['conf'][i]),  # -1（文字なし）は0にそろえる
+                    # ラッパーエンジンを通しても行・段落の区切りが残るよう、辞書にも持たせる
+                    LINE_KEY: (data['block_num'][i], data['par_num'][i], data['line_num'][i]),
                 })
+                line_keys.append(results[-1][LINE_KEY])
         
-        return results
+        if not fixed_scale:
+            self.resolution.update([box['height'] for box in results], elapsed,
+                                   gray_image.width * gray_image.height)
+        return results, line_keys
+    
+    def recognize_full(self, image: Image.Image) -> OCRResult:
+        """
+        1回の認識で、Tesseract が判定した行・段落にまとめた結果を返す
+        
+        Args:
+            image: 入力画像
+        
+        Returns:
+            読み順に並んだ認識結果
+        """
+        # 単語の位置から文字の高さを推定するため、image_to_data の結果を行ごとにまとめる
+        boxes, line_keys = self._read(image)
+        return OCRResult.from_boxes(boxes, line_keys)
+    
+    def recognize_with_boxes(self, image: Image.Image) -> List[dict]:
+        """
+        画像から文字を認識し、位置情報も取得する
+        
+        Args:
+            image: 入力画像
+        
+        Returns:
+            認識結果のリスト（text, left, top, width, height）
+        """
+        boxes, _ = self._read(image)
+        return boxes
+    
+    def recognize_scaled(self, image: Image.Image, scale: float) -> List[dict]:
+        """
+        指定した倍率に拡大・縮小して認識する（作業解像度の推定は更新しない）
+        
+        Args:
+            image: 入力画像
+            scale: 倍率
+        
+        Returns:
+            認識結果のリスト（座標は元画像基準）
+        """
+        boxes, _ = self._read(image, scale)
+        return boxes
+    
+    def close(self):
+        """常駐エンジンを終了する"""
+        with self._lock:
+            if self._api is not None:
+                self._api.End()
+                self._api = None
+                self.backend = "cli"
 
 
 class EasyOCREngine(OCREngine):
@@ -118,83 +389,159 @@ class EasyOCREngine(OCREngine):
     より高精度、ただし初回起動時にモデルダウンロードが必要
     """
     
-    def __init__(self, languages: List[str] = None, gpu: bool = False):
+    # readtext のパラメータ（調整で高速化）
+    READTEXT_PARAMS = {
+        'min_size': 10,         # 小さすぎる文字を無視
+        'text_threshold': 0.7,  # 信頼度閾値を上げる
+        'low_text': 0.3,
+        'width_ths': 0.7,       # 単語の結合閾値
+    }
+    
+    def __init__(self, languages: List[str] = None, gpu: Optional[bool] = False,
+                 resolution: Optional[ResolutionController] = None):
         """
         Args:
             languages: 認識する言語のリスト（['en', 'ja'] など）
-            gpu: GPUを使用するかどうか
+            gpu: GPUを使用するかどうか（Noneの場合は自動判定）
+            resolution: 作業解像度を決めるコントローラ（Noneの場合は既定値で作成）
         """
         import easyocr
         
         if languages is None:
             languages = ['en']
+        if gpu is None:
+            gpu = detect_gpu()
         
         self.reader = easyocr.Reader(languages, gpu=gpu)
         self.languages = languages
+        self.gpu = gpu
+        self.resolution = resolution if resolution is not None else ResolutionController()
+        self.preprocessor = Preprocessor()
     
-    def recognize(self, image: Image.Image) -> str:
+    def _read(self, image: Image.Image, scale: Optional[float] = None, **params) -> List[dict]:
         """
-        画像から文字を認識する
+        作業解像度に縮小して認識し、座標を元画像に戻して返す
         
         Args:
             image: 入力画像
+            scale: 倍率（指定した場合は作業解像度の推定を使わず、更新もしない）
+            **params: readtext に渡すパラメータ
         
         Returns:
-            認識されたテキスト
+            認識結果のリスト（text, left, top, width, height, confidence）
         """
-        import numpy as np
+        # 前フレームの文字の高さとレイテンシ予算から縮小率を決める
+        fixed_scale = scale is not None
+        if not fixed_scale:
+            scale = self.resolution.choose_scale(image.size)
         
-        # 前処理で高速化
-        processed = preprocess_image(image, max_width=1000)
+        # 前処理の出力バッファをそのまま渡す（readtext は呼び出し中にしか参照しない）
+        processed = self.preprocessor.process(image, scale)
         
-        # PIL ImageをNumPy配列に変換
-        image_np = np.array(processed)
+        started = time.perf_counter()
+        results = self.reader.readtext(processed, **params)
+        elapsed = time.perf_counter() - started
         
-        # OCR実行（パラメータ調整で高速化）
-        results = self.reader.readtext(
-            image_np,
-            paragraph=True,      # 段落としてまとめる（高速化）
-            min_size=10,         # 小さすぎる文字を無視
-            text_threshold=0.7,  # 信頼度閾値を上げる
-            low_text=0.3,
-            width_ths=0.7,       # 単語の結合閾値
-        )
+        output = []
+        for bbox, text, confidence in results:
+            # bboxは4点の座標 [[x1,y1], [x2,y2], [x3,y3], [x4,y4]]
+            x_coords = [point[0] for point in bbox]
+            y_coords = [point[1] for point in bbox]
+            
+            output.append({
+                'text': text,
+                'left': int(min(x_coords) / scale),
+                'top': int(min(y_coords) / scale),
+                'width': int((max(x_coords) - min(x_coords)) / scale),
+                'height': int((max(y_coords) - min(y_coords)) / scale),
+                'confidence': confidence * 100  # パーセントに変換
+            })
         
-        # テキストを結合
-        texts = [result[1] for result in results]
-        return '\n'.join(texts)
+        if not fixed_scale:
+            self.resolution.update([box['height'] for box in output], elapsed,
+                                   processed.shape[0] * processed.shape[1])
+        return output
     
-    def recognize_with_boxes(self, image: Image.Image) -> List[dict]:
+    def recognize_lines(self, image: Image.Image, rects: List[Tuple[int, int, int, int]],
+                        batch_size: int = 8) -> List[List[dict]]:
         """
-        画像から文字を認識し、位置情報も取得する
+        検出済みの1行ずつの領域を、検出を省いて認識器にまとめて渡す
         
         Args:
             image: 入力画像
+            rects: 1行分の文字を含む (left, top, right, bottom) のリスト
+            batch_size: 認識器に一度に渡す行数
         
         Returns:
-            認識結果のリスト
+            領域ごとの認識結果のリスト（座標は元画像基準）
         """
-        import numpy as np
+        scale = self.resolution.choose_scale(image.size)
+        processed = self.preprocessor.process(image, scale)
         
-        image_np = np.array(image)
-        results = self.reader.readtext(image_np)
+        # readtext と同じ [x_min, x_max, y_min, y_max] 形式（縮小後の座標）
+        horizontal_list = [
+            [int(left * scale), int(right * scale), int(top * scale), int(bottom * scale)]
+            for left, top, right, bottom in rects
+        ]
         
-        output = []
+        started = time.perf_counter()
+        results = self.reader.recognize(processed, horizontal_list=horizontal_list, free_list=[],
+                                        batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        
+        # 認識器は行を並べ替えて返すため、中心が含まれる領域に振り分ける
+        output: List[List[dict]] = [[] for _ in rects]
+        heights = []
         for bbox, text, confidence in results:
-            # bboxは4点の座標 [[x1,y1], [x2,y2], [x3,y3], [x4,y4]]
-            x_coords = [point[0] for point in bbox]
-            y_coords = [point[1] for point in bbox]
-            
-            output.append({
+            if not text.strip():
+                continue
+            x_coords = [point[0] / scale for point in bbox]
+            y_coords = [point[1] / scale for point in bbox]
+            box = {
                 'text': text,
                 'left': int(min(x_coords)),
                 'top': int(min(y_coords)),
                 'width': int(max(x_coords) - min(x_coords)),
                 'height': int(max(y_coords) - min(y_coords)),
-                'confidence': confidence * 100  # パーセントに変換
-            })
+                'confidence': confidence * 100
+            }
+            center_x = box['left'] + box['width'] / 2
+            center_y = box['top'] + box['height'] / 2
+            for index, (left, top, right, bottom) in enumerate(rects):
+                if left <= center_x <= right and top <= center_y <= bottom:
+                    output[index].append(box)
+                    break
+            heights.append(box['height'])
         
+        self.resolution.update(heights, elapsed, processed.shape[0] * processed.shape[1])
         return output
+    
+    def recognize_with_boxes(self, image: Image.Image) -> List[dict]:
+        """
+        画像から文字を認識し、位置情報も取得する
+        
+        Args:
+            image: 入力画像
+        
+        Returns:
+            認識結果のリスト
+        """
+        # recognize / recognize_full と同じ前処理・パラメータで認識する
+        # （文字の高さを推定できるよう段落ではなく行単位で認識し、行・段落は位置からまとめる）
+        return self._read(image, **self.READTEXT_PARAMS)
+    
+    def recognize_scaled(self, image: Image.Image, scale: float) -> List[dict]:
+        """
+        指定した倍率に拡大・縮小して認識する（作業解像度の推定は更新しない）
+        
+        Args:
+            image: 入力画像
+            scale: 倍率
+        
+        Returns:
+            認識結果のリスト（座標は元画像基準）
+        """
+        return self._read(image, scale, **self.READTEXT_PARAMS)
 
 
 def create_ocr_engine(engine_type: str = "tesseract", **kwargs) -> OCREngine:
@@ -203,11 +550,16 @@ def create_ocr_engine(engine_type: str = "tesseract", **kwargs) -> OCREngine:
     
     Args:
         engine_type: "tesseract" または "easyocr"
-        **kwargs: エンジン固有のオプション
+        **kwargs: エンジン固有のオプション（workers を指定するとプロセスプールで実行）
     
     Returns:
         OCRエンジンインスタンス
     """
+    workers = kwargs.pop('workers', 0)
+    if workers:
+        from .ocr_executor import ProcessOCRExecutor
+        return ProcessOCRExecutor(engine_type, workers=workers, **kwargs)
+    
     if engine_type.lower() == "tesseract":
         return TesseractOCR(**kwargs)
     elif engine_type.lower() == "easyocr":
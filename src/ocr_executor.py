@@ -0,0 +1,258 @@
+"""
+プロセスプールOCRモジュール
+OCRエンジンを複数のワーカープロセスで実行し、CPUの複数コアで領域を並列に認識する
+画像は共有メモリ経由でワーカーに渡す（PIL画像をpickleしない）
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from PIL import Image
+from typing import List, Optional, Tuple
+import os
+import threading
+import time
+
+from .adaptive_resolution import ResolutionController
+from .ocr_engine import OCREngine, create_ocr_engine
+from .ocr_result import scope_line_keys
+from .preprocess import resize_for_ocr
+
+# (left, top, right, bottom)
+Rect = Tuple[int, int, int, int]
+
+# ワーカープロセス内の状態（プロセスごとに1つ）
+_worker_engine: Optional[OCREngine] = None
+_worker_memory: Optional[shared_memory.SharedMemory] = None
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    既存の共有メモリに接続する（接続側では解放の管理をしない）
+    
+    Args:
+        name: 共有メモリの名前
+    
+    Returns:
+        共有メモリ
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python 3.12 以前（ワーカーは親と同じ resource_tracker を共有するため、そのまま接続してよい）
+        return shared_memory.SharedMemory(name=name)
+
+
+def _init_worker(engine_type: str, options: dict):
+    """ワーカープロセスの初期化（モデルはプロセスごとに1回だけ読み込む）"""
+    global _worker_engine
+    _worker_engine = create_ocr_engine(engine_type, **options)
+
+
+def _worker_warm_up() -> int:
+    """ワーカーのエンジンをウォームアップする"""
+    _worker_engine.warm_up()
+    return os.getpid()
+
+
+def _worker_recognize(name: str, size: Tuple[int, int], rect: Rect) -> List[dict]:
+    """
+    共有メモリ上のフレームの一部を認識する（ワーカープロセスで実行）
+    
+    Args:
+        name: フレームを置いた共有メモリの名前
+        size: フレームの (幅, 高さ)
+        rect: 認識する領域 (left, top, right, bottom)
+    
+    Returns:
+        認識結果のリスト（座標は領域基準）
+    """
+    global _worker_memory
+    
+    # フレームごとに接続し直さないよう、同じ共有メモリへの接続は使い回す
+    if _worker_memory is None or _worker_memory.name != name:
+        if _worker_memory is not None:
+            _worker_memory.close()
+        _worker_memory = _attach_shared_memory(name)
+    
+    width, height = size
+    frame = Image.frombuffer('RGB', size, _worker_memory.buf[:width * height * 3], 'raw', 'RGB', 0, 1)
+    # 親プロセスが作業解像度に縮小・拡大済みのため、ワーカーのエンジンでは倍率を変えず、推定も更新しない
+    # （再認識用に拡大した領域の文字の高さで、後のフレームがさらに縮小されないようにする）
+    return _worker_engine.recognize_scaled(frame.crop(rect), 1.0)
+
+
+class ProcessOCRExecutor(OCREngine):
+    """
+    OCRエンジンをプロセスプールで実行するエンジン
+    各ワーカーが起動時に1回だけモデルを読み込み、独立した領域を並列に認識する
+    フレームは作業解像度に縮小してから共有メモリに置く（高速モードのレイテンシ予算もここで反映される）
+    """
+    
+    def __init__(self, engine_type: str, workers: Optional[int] = None,
+                 resolution: Optional[ResolutionController] = None, **options):
+        """
+        Args:
+            engine_type: "tesseract" または "easyocr"
+            workers: ワーカープロセス数（Noneの場合はCPUコア数）
+            resolution: 作業解像度を決めるコントローラ（Noneの場合は既定値で作成）
+            **options: 各ワーカーで create_ocr_engine に渡すオプション
+        """
+        if workers is None or workers < 1:
+            workers = os.cpu_count() or 1
+        
+        self.engine_type = engine_type
+        self.workers = workers
+        self.options = options
+        self.resolution = resolution if resolution is not None else ResolutionController()
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(engine_type, options)
+        )
+        
+        # フレームを置く共有メモリ（大きさが足りなくなった時だけ確保し直す）
+        self._memory: Optional[shared_memory.SharedMemory] = None
+        self._lock = threading.Lock()
+        
+        # 統計情報
+        self.frames = 0
+        self.tasks = 0
+    
+    def _publish(self, image: Image.Image) -> str:
+        """
+        フレームを共有メモリに書き込む（ロック取得済みで呼ぶ）
+        
+        Returns:
+            共有メモリの名前
+        """
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        
+        size = image.width * image.height * 3
+        if self._memory is None or self._memory.size < size:
+            self._release_memory()
+            self._memory = shared_memory.SharedMemory(create=True, size=size)
+        
+        self._memory.buf[:size] = image.tobytes()
+        return self._memory.name
+    
+    def _release_memory(self):
+        """共有メモリを解放する"""
+        if self._memory is not None:
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+    
+    def recognize_regions(self, image: Image.Image, rects: List[Rect]) -> List[List[dict]]:
+        """
+        画像内の複数の領域を各ワーカーで並列に認識する
+        前フレームの文字の高さとレイテンシ予算から決めた作業解像度に縮小してから渡す
+        
+        Args:
+            image: 入力画像
+            rects: (left, top, right, bottom) のリスト
+        
+        Returns:
+            領域ごとの認識結果のリスト（座標は元画像基準）
+        """
+        scale = self.resolution.choose_scale(image.size)
+        return self._recognize_regions(image, rects, scale, adapt=True)
+    
+    def recognize_scaled(self, image: Image.Image, scale: float) -> List[dict]:
+        """
+        指定した倍率に拡大・縮小して認識する（低信頼度の領域の再認識用、作業解像度の推定は更新しない）
+        
+        Args:
+            image: 入力画像
+            scale: 倍率
+        
+        Returns:
+            認識結果のリスト（座標は元画像基準）
+        """
+        return self._recognize_regions(image, [(0, 0, image.width, image.height)], scale, adapt=False)[0]
+    
+    def _recognize_regions(self, image: Image.Image, rects: List[Rect], scale: float,
+                           adapt: bool) -> List[List[dict]]:
+        """
+        画像を倍率 scale に縮小・拡大して共有メモリに置き、各領域をワーカーで並列に認識する
+        
+        Args:
+            image: 入力画像
+            rects: (left, top, right, bottom) のリスト（元画像基準）
+            scale: 倍率
+            adapt: 認識結果で作業解像度の推定を更新するか
+        
+        Returns:
+            領域ごとの認識結果のリスト（座標は元画像基準）
+        """
+        if not rects:
+            return []
+        
+        scaled = resize_for_ocr(image, scale)
+        width, height = scaled.size
+        scaled_rects = []
+        for left, top, right, bottom in rects:
+            left, top = min(width - 1, int(left * scale)), min(height - 1, int(top * scale))
+            scaled_rects.append((left, top,
+                                 min(width, max(left + 1, round(right * scale))),
+                                 min(height, max(top + 1, round(bottom * scale)))))
+        
+        # 全ての領域の認識が終わるまで共有メモリを書き換えない
+        with self._lock:
+            started = time.perf_counter()
+            name = self._publish(scaled)
+            futures = [
+                self._executor.submit(_worker_recognize, name, scaled.size, rect)
+                for rect in scaled_rects
+            ]
+            self.frames += 1
+            self.tasks += len(futures)
+            
+            results = []
+            for index, (rect, future) in enumerate(zip(scaled_rects, futures)):
+                boxes = scope_line_keys(future.result(), index)
+                for box in boxes:
+                    box['left'] = int((box['left'] + rect[0]) / scale)
+                    box['top'] = int((box['top'] + rect[1]) / scale)
+                    box['width'] = int(box['width'] / scale)
+                    box['height'] = int(box['height'] / scale)
+                results.append(boxes)
+            elapsed = time.perf_counter() - started
+        
+        if adapt:
+            # 並列に認識した全体の所要時間で推定するため、予算はフレームあたりのレイテンシに効く
+            self.resolution.update([box['height'] for boxes in results for box in boxes], elapsed,
+                                   sum((right - left) * (bottom - top) for left, top, right, bottom in scaled_rects))
+        return results
+    
+    def recognize_with_boxes(self, image: Image.Image) -> List[dict]:
+        """
+        画像から文字を認識し、位置情報も取得する（1つのワーカーで実行）
+        
+        Args:
+            image: 入力画像
+        
+        Returns:
+            認識結果のリスト
+        """
+        return self.recognize_regions(image, [(0, 0, image.width, image.height)])[0]
+    
+    def warm_up(self):
+        """全てのワーカーを起動し、それぞれのモデルをウォームアップする"""
+        futures = [self._executor.submit(_worker_warm_up) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+        self.resolution.reset()
+    
+    def get_stats(self) -> dict:
+        """
+        統計情報を取得する
+        
+        Returns:
+            workers, frames, tasks を含む辞書
+        """
+        return {'workers': self.workers, 'frames': self.frames, 'tasks': self.tasks}
+    
+    def close(self):
+        """ワーカープロセスを終了し、共有メモリを解放する"""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            self._release_memory()
@@ -0,0 +1,178 @@
+"""
+OCRエンジンプールモジュール
+OCRエンジンをバックグラウンドで読み込み、プロセス全体で共有する
+"""
+
+from concurrent.futures import Future
+from typing import Dict, Optional, Tuple
+import threading
+import time
+
+from .ocr_engine import OCREngine, create_ocr_engine
+
+
+def make_engine_key(engine_type: str, **kwargs) -> Tuple:
+    """
+    プールのキーを作成する
+    EasyOCRは (言語, GPU)、Tesseractは (言語, 実行ファイルパス, バックエンド) で区別する
+    プロセスプールで実行する場合はワーカー数も区別する
+    
+    Args:
+        engine_type: "tesseract" または "easyocr"
+        **kwargs: create_ocr_engine に渡すオプション
+    
+    Returns:
+        プールのキー
+    """
+    engine_type = engine_type.lower()
+    workers = kwargs.get('workers', 0)
+    if engine_type == "easyocr":
+        languages = kwargs.get('languages') or ['en']
+        return (engine_type, tuple(languages), kwargs.get('gpu', False), workers)
+    if engine_type == "tesseract":
+        return (engine_type, kwargs.get('lang', 'eng'), kwargs.get('tesseract_path'), kwargs.get('backend'),
+                workers)
+    raise ValueError(f"不明なOCRエンジン: {engine_type}")
+
+
+class OCREnginePool:
+    """
+    OCRエンジンのプール
+    同じ設定のエンジンは1度だけ作成し、読み込みとウォームアップは別スレッドで行う
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures: Dict[Tuple, Future] = {}
+        self._load_times: Dict[Tuple, float] = {}
+    
+    def preload(self, engine_type: str, warm_up: bool = True, **kwargs) -> Future:
+        """
+        エンジンの読み込みをバックグラウンドで開始する（読み込み済み・読み込み中なら何もしない）
+        
+        Args:
+            engine_type: "tesseract" または "easyocr"
+            warm_up: 読み込み後にダミー画像で1回認識を実行するか
+            **kwargs: create_ocr_engine に渡すオプション
+        
+        Returns:
+            エンジンを結果に持つ Future
+        """
+        key = make_engine_key(engine_type, **kwargs)
+        
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                return future
+            future = Future()
+            self._futures[key] = future
+        
+        # モデルのダウンロード中でもアプリを終了できるようデーモンスレッドで読み込む
+        thread = threading.Thread(
+            target=self._load, args=(key, future, engine_type, warm_up, kwargs),
+            name=f"ocr-preload-{key[0]}", daemon=True
+        )
+        thread.start()
+        return future
+    
+    def _load(self, key: Tuple, future: Future, engine_type: str, warm_up: bool, kwargs: dict):
+        """エンジンを作成してウォームアップする（読み込みスレッド）"""
+        started = time.perf_counter()
+        try:
+            engine = create_ocr_engine(engine_type, **kwargs)
+            if warm_up:
+                try:
+                    engine.warm_up()
+                except Exception as e:
+                    # ウォームアップの失敗は致命的ではない
+                    print(f"OCRエンジンのウォームアップに失敗: {e}")
+        except Exception as e:
+            # 失敗した設定は次回に再試行できるようプールから外す
+            with self._lock:
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+            future.set_exception(e)
+            return
+        
+        with self._lock:
+            self._load_times[key] = time.perf_counter() - started
+        future.set_result(engine)
+    
+    def get(self, engine_type: str, timeout: Optional[float] = None, **kwargs) -> OCREngine:
+        """
+        エンジンを取得する（未読み込みなら読み込みを開始して完了を待つ）
+        
+        Args:
+            engine_type: "tesseract" または "easyocr"
+            timeout: 読み込みを待つ最大秒数（Noneなら無制限）
+            **kwargs: create_ocr_engine に渡すオプション
+        
+        Returns:
+            OCRエンジン
+        """
+        return self.preload(engine_type, **kwargs).result(timeout)
+    
+    def get_if_ready(self, engine_type: str, **kwargs) -> Optional[OCREngine]:
+        """
+        読み込み済みのエンジンを取得する（待たない）
+        
+        Args:
+            engine_type: "tesseract" または "easyocr"
+            **kwargs: create_ocr_engine に渡すオプション
+        
+        Returns:
+            OCRエンジン、読み込み中・未読み込み・失敗の場合はNone
+        """
+        key = make_engine_key(engine_type, **kwargs)
+        with self._lock:
+            future = self._futures.get(key)
+        if future is None or not future.done() or future.exception() is not None:
+            return None
+        return future.result()
+    
+    def get_load_time(self, engine_type: str, **kwargs) -> Optional[float]:
+        """
+        エンジンの読み込みとウォームアップにかかった秒数
+        
+        Returns:
+            秒数、読み込みが完了していない場合はNone
+        """
+        key = make_engine_key(engine_type, **kwargs)
+        with self._lock:
+            return self._load_times.get(key)
+    
+    def clear(self):
+        """プールを空にする（読み込み中のエンジンは完了後に破棄される）"""
+        with self._lock:
+            self._futures.clear()
+            self._load_times.clear()
+    
+    def close(self):
+        """読み込み済みのエンジンを終了してプールを空にする（ワーカープロセス等の後始末）"""
+        with self._lock:
+            futures = list(self._futures.values())
+        self.clear()
+        
+        for future in futures:
+            if not future.done() or future.exception() is not None:
+                continue
+            close = getattr(future.result(), 'close', None)
+            if close is not None:
+                try:
+                    close()
+                except Exception as e:
+                    print(f"OCRエンジンの終了に失敗: {e}")
+
+
+# プロセス全体で共有するプール
+_pool = OCREnginePool()
+
+
+def get_engine_pool() -> OCREnginePool:
+    """
+    プロセス全体で共有するOCRエンジンプールを取得する
+    
+    Returns:
+        OCRエンジンプール
+    """
+    return _pool
@@ -0,0 +1,367 @@
+"""
+OCR結果モジュール
+認識結果を単語・行・段落の構造で保持し、行のまとめ上げと読み順の並べ替えを行う
+"""
+
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+# 認識結果の辞書で、エンジンが判定した行を表すキー（値は (ブロック, 段落, 行) 番号、Tesseract のみ）
+LINE_KEY = 'line'
+
+
+def normalize_confidence(value) -> float:
+    """
+    信頼度を 0〜100 の数値にそろえる（Tesseract の -1 や文字列も受け付ける）
+    
+    Args:
+        value: エンジンが返した信頼度
+    
+    Returns:
+        0〜100 の信頼度
+    """
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return min(100.0, max(0.0, value))
+
+
+def scope_line_keys(boxes: Iterable[dict], scope: Hashable) -> List[dict]:
+    """
+    別々に認識した結果をまとめる前に、行の番号が他の結果と重ならないよう scope を付ける
+    
+    Args:
+        boxes: 1回の認識結果のリスト
+        scope: この認識結果を他と区別する値（領域の番号など）
+    
+    Returns:
+        行の番号に scope を付けた認識結果のリスト（行の番号があるものはコピー）
+    """
+    scoped = []
+    for box in boxes:
+        key = box.get(LINE_KEY)
+        if key is not None:
+            box = dict(box)
+            box[LINE_KEY] = ((scope, key[0]),) + tuple(key[1:])
+        scoped.append(box)
+    return scoped
+
+
+class Word:
+    """認識した単語（EasyOCRでは1回の検出結果）"""
+    
+    __slots__ = ('text', 'left', 'top', 'width', 'height', 'confidence')
+    
+    def __init__(self, text: str, left: int, top: int, width: int, height: int, confidence: float = 100.0):
+        """
+        Args:
+            text: 認識したテキスト
+            left, top, width, height: 元画像での位置と大きさ
+            confidence: 信頼度（0〜100）
+        """
+        self.text = text
+        self.left = left
+        self.top = top
+        self.width = width
+        self.height = height
+        self.confidence = confidence
+    
+    @classmethod
+    def from_box(cls, box: dict) -> 'Word':
+        """recognize_with_boxes の辞書から作成する"""
+        return cls(box['text'], box['left'], box['top'], box['width'], box['height'],
+                   normalize_confidence(box.get('confidence', 100.0)))
+    
+    def to_box(self) -> dict:
+        """recognize_with_boxes と同じ形式の辞書に変換する"""
+        return {
+            'text': self.text,
+            'left': self.left,
+            'top': self.top,
+            'width': self.width,
+            'height': self.height,
+            'confidence': self.confidence,
+        }
+    
+    @property
+    def right(self) -> int:
+        return self.left + self.width
+    
+    @property
+    def bottom(self) -> int:
+        return self.top + self.height
+    
+    def __repr__(self) -> str:
+        return f"Word({self.text!r}, {self.left}, {self.top}, {self.width}, {self.height}, {self.confidence:.0f})"
+
+
+class Line:
+    """左から右に並んだ単語の列"""
+    
+    __slots__ = ('words', 'left', 'top', 'right', 'bottom')
+    
+    def __init__(self, words: List[Word]):
+        """
+        Args:
+            words: 行に含まれる単語（左から右の順）
+        """
+        self.words = words
+        self.left = min(word.left for word in words)
+        self.top = min(word.top for word in words)
+        self.right = max(word.right for word in words)
+        self.bottom = max(word.bottom for word in words)
+    
+    @property
+    def text(self) -> str:
+        return ' '.join(word.text for word in self.words)
+    
+    @property
+    def width(self) -> int:
+        return self.right - self.left
+    
+    @property
+    def height(self) -> int:
+        return self.bottom - self.top
+    
+    @property
+    def confidence(self) -> float:
+        """単語の信頼度を文字数で重み付けした平均"""
+        total = sum(len(word.text) for word in self.words)
+        if total == 0:
+            return 0.0
+        return sum(word.confidence * len(word.text) for word in self.words) / total
+    
+    def __repr__(self) -> str:
+        return f"Line({self.text!r}, ({self.left}, {self.top}, {self.right}, {self.bottom}))"
+
+
+class Paragraph:
+    """上から下に並んだ行のまとまり"""
+    
+    __slots__ = ('lines', 'left', 'top', 'right', 'bottom')
+    
+    def __init__(self, lines: List[Line]):
+        """
+        Args:
+            lines: 段落に含まれる行（上から下の順）
+        """
+        self.lines = lines
+        self.left = min(line.left for line in lines)
+        self.top = min(line.top for line in lines)
+        self.right = max(line.right for line in lines)
+        self.bottom = max(line.bottom for line in lines)
+    
+    def append(self, line: Line):
+        """行を末尾に追加する"""
+        self.lines.append(line)
+        self.left = min(self.left, line.left)
+        self.top = min(self.top, line.top)
+        self.right = max(self.right, line.right)
+        self.bottom = max(self.bottom, line.bottom)
+    
+    @property
+    def text(self) -> str:
+        return '\n'.join(line.text for line in self.lines)
+    
+    def to_box(self) -> dict:
+        """recognize_with_boxes と同じ形式の辞書に変換する（テキストは行を改行で結合）"""
+        return {
+            'text': self.text,
+            'left': self.left,
+            'top': self.top,
+            'width': self.right - self.left,
+            'height': self.bottom - self.top,
+            'confidence': self.confidence,
+        }
+    
+    @property
+    def confidence(self) -> float:
+        """行の信頼度を文字数で重み付けした平均"""
+        words = [word for line in self.lines for word in line.words]
+        total = sum(len(word.text) for word in words)
+        if total == 0:
+            return 0.0
+        return sum(word.confidence * len(word.text) for word in words) / total
+    
+    def __repr__(self) -> str:
+        return f"Paragraph({len(self.lines)} lines, ({self.left}, {self.top}, {self.right}, {self.bottom}))"
+
+
+def group_lines(words: Iterable[Word], gap_ratio: float = 2.5) -> List[Line]:
+    """
+    単語を位置から行にまとめる
+    上端順に見て、中心が現在の行の下端より上にある単語を同じ行とみなす
+    同じ高さでも文字の高さの gap_ratio 倍より離れた単語は別の行（段組みなど）にする
+    
+    Args:
+        words: 単語
+        gap_ratio: 同じ行とみなす単語間の隙間の上限（文字の高さに対する倍率）
+    
+    Returns:
+        行のリスト（上から下の順）
+    """
+    rows: List[List[Word]] = []
+    row_bottom = None
+    for word in sorted(words, key=lambda w: (w.top, w.left)):
+        center = word.top + word.height / 2
+        if rows and center < row_bottom:
+            rows[-1].append(word)
+            row_bottom = max(row_bottom, word.bottom)
+        else:
+            rows.append([word])
+            row_bottom = word.bottom
+    
+    lines = []
+    for row in rows:
+        row.sort(key=lambda w: w.left)
+        height = max(word.height for word in row)
+        current = [row[0]]
+        for word in row[1:]:
+            if word.left - current[-1].right > height * gap_ratio:
+                lines.append(Line(current))
+                current = []
+            current.append(word)
+        lines.append(Line(current))
+    return lines
+
+
+def group_paragraphs(lines: Iterable[Line], gap_ratio: float = 0.8, height_ratio: float = 1.6) -> List[Paragraph]:
+    """
+    行を段落にまとめる
+    直前の行のすぐ下にあり、横方向に重なり、文字の高さが近い行を同じ段落とみなす
+    
+    Args:
+        lines: 行（上から下の順）
+        gap_ratio: 同じ段落とみなす行間の上限（文字の高さに対する倍率）
+        height_ratio: 同じ段落とみなす文字の高さの比の上限
+    
+    Returns:
+        段落のリスト（作成順）
+    """
+    paragraphs: List[Paragraph] = []
+    for line in lines:
+        for paragraph in paragraphs:
+            last = paragraph.lines[-1]
+            height = max(last.height, line.height, 1)
+            gap = line.top - last.bottom
+            if (-height / 2 <= gap <= height * gap_ratio
+                    and line.left < paragraph.right and paragraph.left < line.right
+                    and max(last.height, line.height) <= min(last.height, line.height) * height_ratio + 1):
+                paragraph.append(line)
+                break
+        else:
+            paragraphs.append(Paragraph([line]))
+    return paragraphs
+
+
+def sort_reading_order(paragraphs: List[Paragraph]) -> List[Paragraph]:
+    """
+    段落を読み順（上から下、同じ高さなら左から右）に並べる
+    上端の差が文字の高さより小さい段落は同じ高さとみなす
+    
+    Args:
+        paragraphs: 段落のリスト
+    
+    Returns:
+        並べ替えた段落のリスト
+    """
+    ordered = sorted(paragraphs, key=lambda p: p.top)
+    bands: List[List[Paragraph]] = []
+    band_top = None
+    for paragraph in ordered:
+        tolerance = paragraph.lines[0].height
+        if bands and paragraph.top - band_top < tolerance:
+            bands[-1].append(paragraph)
+        else:
+            bands.append([paragraph])
+            band_top = paragraph.top
+    return [paragraph for band in bands for paragraph in sorted(band, key=lambda p: p.left)]
+
+
+class OCRResult:
+    """
+    1回の認識結果（段落 → 行 → 単語）
+    翻訳やオーバーレイは行・段落を単位にして、フレーム間でキャッシュや差分の比較ができる
+    """
+    
+    __slots__ = ('paragraphs', 'lines', 'words')
+    
+    def __init__(self, paragraphs: Optional[List[Paragraph]] = None):
+        """
+        Args:
+            paragraphs: 読み順に並んだ段落
+        """
+        self.paragraphs = paragraphs or []
+        self.lines = [line for paragraph in self.paragraphs for line in paragraph.lines]
+        self.words = [word for line in self.lines for word in line.words]
+    
+    @classmethod
+    def from_words(cls, words: Iterable[Word]) -> 'OCRResult':
+        """
+        単語を位置から行・段落にまとめて作成する
+        
+        Args:
+            words: 単語
+        
+        Returns:
+            認識結果
+        """
+        return cls(sort_reading_order(group_paragraphs(group_lines(words))))
+    
+    @classmethod
+    def from_boxes(cls, boxes: Iterable[dict],
+                   line_keys: Optional[Sequence[Tuple[int, int, int]]] = None) -> 'OCRResult':
+        """
+        recognize_with_boxes の辞書のリストから作成する
+        
+        Args:
+            boxes: 認識結果のリスト（text, left, top, width, height, confidence）
+            line_keys: 各単語の (ブロック, 段落, 行) 番号（Tesseract のように
+                       エンジンが行と段落を判定している場合、その区切りと順序を使う）
+                       Noneの場合は全ての辞書に LINE_KEY があればそれを使う
+        
+        Returns:
+            認識結果
+        """
+        boxes = list(boxes)
+        words = [Word.from_box(box) for box in boxes]
+        if line_keys is None and boxes and all(box.get(LINE_KEY) is not None for box in boxes):
+            line_keys = [box[LINE_KEY] for box in boxes]
+        if line_keys is None:
+            return cls.from_words(words)
+        
+        lines: Dict[Tuple[int, int, int], List[Word]] = {}
+        for word, key in zip(words, line_keys):
+            lines.setdefault(key, []).append(word)
+        
+        paragraphs: Dict[Tuple[int, int], List[Line]] = {}
+        for key, line_words in lines.items():
+            paragraphs.setdefault(key[:2], []).append(Line(line_words))
+        return cls([Paragraph(paragraph_lines) for paragraph_lines in paragraphs.values()])
+    
+    @property
+    def text(self) -> str:
+        """行ごとに改行で区切ったテキスト（読み順）"""
+        return '\n'.join(line.text for line in self.lines)
+    
+    def line_texts(self) -> List[str]:
+        """行ごとのテキスト（読み順）"""
+        return [line.text for line in self.lines]
+    
+    def paragraph_texts(self) -> List[str]:
+        """段落ごとのテキスト（読み順）"""
+        return [paragraph.text for paragraph in self.paragraphs]
+    
+    def to_boxes(self) -> List[dict]:
+        """recognize_with_boxes と同じ形式の辞書のリストに変換する（読み順）"""
+        return [word.to_box() for word in self.words]
+    
+    def paragraph_boxes(self) -> List[dict]:
+        """段落ごとの位置とテキストの辞書のリスト（読み順）"""
+        return [paragraph.to_box() for paragraph in self.paragraphs]
+    
+    def __len__(self) -> int:
+        return len(self.lines)
+    
+    def __repr__(self) -> str:
+        return f"OCRResult({len(self.paragraphs)} paragraphs, {len(self.lines)} lines, {len(self.words)} words)"
@@ -5,11 +5,10 @@
 
 import tkinter as tk
 from tkinter import font as tkfont
-import win32gui
-import win32con
-from ctypes import windll
 from typing import Optional, Tuple
 
+from .window_capture import get_window_rect
+
 
 class OverlayWindow:
     """翻訳結果をオーバーレイ表示するウィンドウ"""
@@ -169,7 +168,10 @@ class OverlayWindow:
             position: 配置位置 ('right', 'bottom', 'top', 'left')
         """
         try:
-            left, top, right, bottom = win32gui.GetWindowRect(hwnd)
+            rect = get_window_rect(hwnd)
+            if rect is None:
+                return
+            left, top, right, bottom = rect
             
             overlay_width = self.overlay.winfo_width()
             overlay_height = self.overlay.winfo_height()
@@ -262,6 +264,8 @@ class CompactOverlay:
     
     def _set_click_through(self):
         """クリックを透過させる（Windowsのみ）"""
+        from ctypes import windll
+        
         hwnd = windll.user32.GetParent(self.overlay.winfo_id())
         style = windll.user32.GetWindowLongW(hwnd, -20)  # GWL_EXSTYLE
         windll.user32.SetWindowLongW(hwnd, -20, style | 0x80000 | 0x20)  # WS_EX_LAYERED | WS_EX_TRANSPARENT
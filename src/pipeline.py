@@ -0,0 +1,359 @@
+"""
+パイプラインモジュール
+キャプチャ・OCR・翻訳を別々のワーカースレッドで並行して実行する
+"""
+
+from collections import deque
+from PIL import Image
+from typing import Callable, Dict, Optional
+import threading
+import time
+
+from .frame_diff import FrameDiffDetector
+from .ocr_result import OCRResult
+from .text_dedup import TextDeduplicator
+
+
+class LatestQueue:
+    """
+    有界キュー（満杯時は最も古い要素を捨てる）
+    後段が遅い場合でも常に最新のフレームだけを処理させるために使う
+    """
+    
+    def __init__(self, maxsize: int = 1):
+        """
+        Args:
+            maxsize: 保持する最大要素数
+        """
+        self._items = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+    
+    def put(self, item):
+        """
+        要素を追加する（満杯なら最も古い要素を捨てる）
+        
+        Args:
+            item: 追加する要素
+        """
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+    
+    def get(self, timeout: Optional[float] = None):
+        """
+        要素を取り出す
+        
+        Args:
+            timeout: 待機する最大秒数
+        
+        Returns:
+            取り出した要素、タイムアウトまたはクローズ時はNone
+        """
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if self._items:
+                return self._items.popleft()
+            return None
+    
+    def close(self):
+        """キューを閉じて待機中のワーカーを起こす"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class PipelineResult:
+    """1フレーム分の処理結果"""
+    
+    def __init__(self, frame_id: int, image: Image.Image, captured_at: float):
+        """
+        Args:
+            frame_id: フレーム番号（大きいほど新しい）
+            image: キャプチャした画像
+            captured_at: キャプチャ時刻（time.perf_counter）
+        """
+        self.frame_id = frame_id
+        self.image = image
+        self.captured_at = captured_at
+        # 認識したテキストの世代（テキストが前のフレームから変わるたびに増える）
+        self.generation = 0
+        self.ocr_result: Optional[OCRResult] = None
+        self.ocr_text = ""
+        self.translated = ""
+        self.timings: Dict[str, float] = {}
+
+
+class StageTimings:
+    """ステージごとの処理時間（指数移動平均）を記録する"""
+    
+    def __init__(self, alpha: float = 0.2):
+        """
+        Args:
+            alpha: 指数移動平均の係数
+        """
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self._last: Dict[str, float] = {}
+        self._average: Dict[str, float] = {}
+    
+    def record(self, stage: str, seconds: float):
+        """
+        処理時間を記録する
+        
+        Args:
+            stage: ステージ名
+            seconds: 処理時間（秒）
+        """
+        with self._lock:
+            self._last[stage] = seconds
+            previous = self._average.get(stage)
+            if previous is None:
+                self._average[stage] = seconds
+            else:
+                self._average[stage] = previous + self.alpha * (seconds - previous)
+    
+    def get(self) -> Dict[str, dict]:
+        """
+        処理時間を取得する
+        
+        Returns:
+            ステージ名 → {'last_ms', 'avg_ms'}
+        """
+        with self._lock:
+            return {
+                stage: {'last_ms': self._last[stage] * 1000, 'avg_ms': self._average[stage] * 1000}
+                for stage in self._average
+            }
+
+
+class CapturePipeline:
+    """
+    キャプチャ → OCR → 翻訳 のパイプライン
+    各ステージは別スレッドで動作し、キューは最新のフレームのみを保持する
+    認識したテキストが変わると世代を進め、古い世代の翻訳は取り消して結果を捨てる
+    """
+    
+    def __init__(self, capture_func: Callable[[], Optional[Image.Image]], ocr_engine, translator,
+                 interval_func: Callable[[], float],
+                 frame_diff: Optional[FrameDiffDetector] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None,
+                 dedup: Optional[TextDeduplicator] = None):
+        """
+        Args:
+            capture_func: 画像を1枚キャプチャする関数
+            ocr_engine: OCRエンジン（recognize_full を持つもの）
+            translator: 翻訳器（translate と cancel_pending を持つもの）
+            interval_func: キャプチャ間隔（秒）を返す関数
+            frame_diff: 変化のないフレームをスキップするための差分検出（任意）
+            on_error: ワーカーで例外が発生した時に呼ばれる関数（ワーカースレッドから呼ばれる）
+            dedup: OCRの揺れの範囲で同じテキストを同じとみなす重複除去（Noneなら完全一致のみ）
+        """
+        self.capture_func = capture_func
+        self.ocr_engine = ocr_engine
+        self.translator = translator
+        self.interval_func = interval_func
+        self.frame_diff = frame_diff
+        self.on_error = on_error
+        self.dedup = dedup
+        
+        self.timings = StageTimings()
+        
+        self._ocr_queue = LatestQueue(maxsize=1)
+        self._translate_queue = LatestQueue(maxsize=1)
+        self._stop_event = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        
+        self._frame_id = 0
+        self._latest_frame: Optional[PipelineResult] = None
+        self._latest_result: Optional[PipelineResult] = None
+        
+        # 直前のOCR結果と翻訳（同じテキストなら翻訳を再利用）
+        self._last_ocr_text: Optional[str] = None
+        self._last_translated = ""
+        
+        # テキストの世代と翻訳中のフレーム（新しいテキストが来たら古い翻訳を取り消す）
+        self._generation = 0
+        self._recognized_text: Optional[str] = None
+        self._translating: Optional[PipelineResult] = None
+        self.discarded = 0
+    
+    def start(self):
+        """ワーカースレッドを起動する"""
+        self._stop_event.clear()
+        self._threads = [
+            threading.Thread(target=self._capture_worker, name="pipeline-capture", daemon=True),
+            threading.Thread(target=self._ocr_worker, name="pipeline-ocr", daemon=True),
+            threading.Thread(target=self._translate_worker, name="pipeline-translate", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+    
+    def stop(self):
+        """ワーカースレッドに停止を指示する（処理中のステージの完了は待たない）"""
+        self._stop_event.set()
+        self._ocr_queue.close()
+        self._translate_queue.close()
+    
+    def join(self, timeout: Optional[float] = None):
+        """
+        ワーカースレッドの終了を待つ
+        
+        Args:
+            timeout: 各スレッドを待機する最大秒数
+        """
+        for thread in self._threads:
+            thread.join(timeout)
+    
+    @property
+    def is_running(self) -> bool:
+        """いずれかのワーカーが動作中か"""
+        return any(thread.is_alive() for thread in self._threads)
+    
+    def get_latest_frame(self) -> Optional[PipelineResult]:
+        """最後にキャプチャした（変化のあった）フレームを取得する"""
+        with self._lock:
+            return self._latest_frame
+    
+    def get_latest_result(self) -> Optional[PipelineResult]:
+        """最後に翻訳まで完了したフレームを取得する"""
+        with self._lock:
+            return self._latest_result
+    
+    def is_stale(self, job: PipelineResult) -> bool:
+        """
+        フレームの結果が古くなったか（後のフレームで別のテキストが認識されたか）
+        
+        Args:
+            job: フレーム
+        
+        Returns:
+            古くなった場合はTrue
+        """
+        with self._lock:
+            return job.generation < self._generation
+    
+    def _same_text(self, a: Optional[str], b: Optional[str]) -> bool:
+        """2つの認識結果が同じテキストか（重複除去があればOCRの揺れを無視する）"""
+        if self.dedup is not None:
+            return self.dedup.matches(a, b)
+        return a == b
+    
+    def get_timings(self) -> Dict[str, dict]:
+        """ステージごとの処理時間を取得する"""
+        return self.timings.get()
+    
+    def _report_error(self, error: Exception):
+        """ワーカーの例外を通知する"""
+        if self.on_error is not None:
+            self.on_error(error)
+        else:
+            print(f"パイプラインエラー: {error}")
+    
+    def _capture_worker(self):
+        """キャプチャステージ"""
+        while not self._stop_event.is_set():
+            started = time.perf_counter()
+            try:
+                image = self.capture_func()
+                if image is not None and (self.frame_diff is None or self.frame_diff.has_changed(image)):
+                    self._frame_id += 1
+                    job = PipelineResult(self._frame_id, image, started)
+                    job.timings['capture'] = time.perf_counter() - started
+                    self.timings.record('capture', job.timings['capture'])
+                    with self._lock:
+                        self._latest_frame = job
+                    self._ocr_queue.put(job)
+            except Exception as e:
+                self._report_error(e)
+            
+            # 指定間隔待機（停止指示があれば即座に抜ける）
+            elapsed = time.perf_counter() - started
+            self._stop_event.wait(max(0.0, self.interval_func() - elapsed))
+    
+    def _ocr_worker(self):
+        """OCRステージ"""
+        while not self._stop_event.is_set():
+            job = self._ocr_queue.get(timeout=0.5)
+            if job is None:
+                continue
+            
+            started = time.perf_counter()
+            try:
+                job.ocr_result = self.ocr_engine.recognize_full(job.image)
+                job.ocr_text = job.ocr_result.text
+            except Exception as e:
+                self._report_error(e)
+                continue
+            job.timings['ocr'] = time.perf_counter() - started
+            self.timings.record('ocr', job.timings['ocr'])
+            
+            with self._lock:
+                if not self._same_text(job.ocr_text, self._recognized_text):
+                    self._recognized_text = job.ocr_text
+                    self._generation += 1
+                job.generation = self._generation
+                translating = self._translating
+            
+            # 翻訳中のテキストが画面から消えたら、まだ送っていないリクエストを取り消す
+            if translating is not None and translating.generation < job.generation:
+                self.translator.cancel_pending()
+            
+            self._translate_queue.put(job)
+    
+    def _translate_worker(self):
+        """翻訳ステージ"""
+        while not self._stop_event.is_set():
+            job = self._translate_queue.get(timeout=0.5)
+            if job is None:
+                continue
+            
+            if self.is_stale(job):
+                self.discarded += 1
+                continue
+            
+            started = time.perf_counter()
+            with self._lock:
+                self._translating = job
+            # 揺れの範囲で同じなら比較の基準は最初のテキストのまま（少しずつ変わるテキストで基準がずれないように）
+            reused = self._same_text(job.ocr_text, self._last_ocr_text)
+            try:
+                if reused:
+                    job.translated = self._last_translated
+                elif job.ocr_text.strip():
+                    job.translated = self.translator.translate(job.ocr_text)
+                else:
+                    job.translated = ""
+            except Exception as e:
+                # 取り消された翻訳や古いテキストの翻訳エラーは表示しない
+                if self.is_stale(job):
+                    self.discarded += 1
+                else:
+                    self._report_error(e)
+                continue
+            finally:
+                with self._lock:
+                    self._translating = None
+            if not reused:
+                self._last_ocr_text = job.ocr_text
+                self._last_translated = job.translated
+            
+            # 翻訳中に別のテキストが認識されていれば、結果は表示しない（翻訳メモリには残る）
+            if self.is_stale(job):
+                self.discarded += 1
+                continue
+            
+            finished = time.perf_counter()
+            job.timings['translate'] = finished - started
+            job.timings['latency'] = finished - job.captured_at
+            self.timings.record('translate', job.timings['translate'])
+            self.timings.record('latency', job.timings['latency'])
+            
+            with self._lock:
+                if self._latest_result is None or job.frame_id > self._latest_result.frame_id:
+                    self._latest_result = job
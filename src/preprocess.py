@@ -0,0 +1,225 @@
+"""
+前処理モジュール
+OCR用の前処理（グレースケール化・縮小・レベル補正・コントラスト調整・二値化）を
+確保済みのNumPyバッファ上でまとめて行う
+"""
+
+from PIL import Image
+from typing import Optional, Tuple
+import threading
+
+import numpy as np
+
+# ルックアップテーブルを適用する際に一度に処理する行数（インデックス用バッファの大きさ）
+LUT_CHUNK_ROWS = 64
+
+
+def scaled_size(size: Tuple[int, int], scale: float) -> Tuple[int, int]:
+    """縮小率を掛けた画像サイズ（1ピクセル未満にはしない）"""
+    return max(1, int(size[0] * scale)), max(1, int(size[1] * scale))
+
+
+def resize_for_ocr(image: Image.Image, scale: float, box_filter_below: float = 0.5,
+                   size: Optional[Tuple[int, int]] = None) -> Image.Image:
+    """
+    画像を縮小する（縮小率に応じて軽いフィルタを選ぶ）
+    
+    Args:
+        image: 入力画像
+        scale: 縮小率（1.0なら何もしない、1.0より大きい場合は拡大する）
+        box_filter_below: これ以下の縮小率では BOX（面積平均）フィルタを使う
+        size: 出力サイズ（Noneの場合は scale から求める）
+    
+    Returns:
+        縮小した画像
+    """
+    if size is None:
+        if scale == 1.0:
+            return image
+        size = scaled_size(image.size, scale)
+    if size == image.size:
+        return image
+    if scale > 1.0:
+        # 小さな文字の再認識用（拡大は対象が小さいので BICUBIC でも十分に速い）
+        return image.resize(size, Image.Resampling.BICUBIC)
+    # 大きく縮小する場合は面積平均で十分に滑らかで、LANCZOS より大幅に速い
+    resample = Image.Resampling.BOX if scale <= box_filter_below else Image.Resampling.BILINEAR
+    return image.resize(size, resample)
+
+
+class Preprocessor:
+    """
+    OCR用の前処理
+    レベル補正とコントラスト強調を1つのルックアップテーブルにまとめて1回で適用し、
+    フレーム間で使い回すバッファに書き出す（サイズが変わった時だけ確保し直す）
+    """
+    
+    def __init__(self, contrast: float = 1.5, stretch_percentile: Optional[float] = 1.0,
+                 binarize: bool = False, block_size: int = 31, binarize_offset: int = 10,
+                 box_filter_below: float = 0.5, histogram_samples: int = 65536):
+        """
+        Args:
+            contrast: コントラスト強調の倍率（1.0で無効）
+            stretch_percentile: レベル補正で切り捨てる明暗それぞれの割合（%）、Noneで無効
+            binarize: 局所平均による適応的二値化を行うか
+            block_size: 二値化で平均を取る範囲の一辺（奇数）
+            binarize_offset: 局所平均からこの値だけ暗い画素を文字（黒）とみなす（0以上）
+            box_filter_below: これ以下の縮小率では BOX フィルタで縮小する
+            histogram_samples: ヒストグラムを求める際に間引いて使う画素数の目安
+        """
+        self.contrast = contrast
+        self.stretch_percentile = stretch_percentile
+        self.binarize = binarize
+        self.block_size = block_size | 1
+        self.binarize_offset = max(0, binarize_offset)
+        self.box_filter_below = box_filter_below
+        self.histogram_samples = histogram_samples
+        
+        # OCRスレッドとUIスレッドから同時に呼ばれてもバッファを共有しない
+        self._local = threading.local()
+        self.allocations = 0
+        self._levels = np.arange(256, dtype=np.float32)
+    
+    def _buffers(self, height: int, width: int):
+        """このスレッド用の作業バッファ（サイズが変わった時だけ確保）"""
+        local = self._local
+        if getattr(local, 'shape', None) != (height, width):
+            local.shape = (height, width)
+            local.out = np.empty((height, width), dtype=np.uint8)
+            local.index = np.empty((min(height, LUT_CHUNK_ROWS), width), dtype=np.intp)
+            local.padded = local.integral = local.sums = local.scaled = local.mask = None
+            self.allocations += 1
+        return local
+    
+    def _apply_lut(self, lut: np.ndarray, gray: np.ndarray, buffers) -> np.ndarray:
+        """
+        テーブルを buffers.out に適用する
+        np.take はインデックスを intp に変換するため、全体を一度に渡すと画像の8倍の一時領域が
+        必要になる。数十行ずつ確保済みのインデックス用バッファに写して適用する
+        """
+        out, index = buffers.out, buffers.index
+        rows = index.shape[0]
+        for top in range(0, gray.shape[0], rows):
+            count = min(rows, gray.shape[0] - top)
+            np.copyto(index[:count], gray[top:top + count])
+            np.take(lut, index[:count], out=out[top:top + count])
+        return out
+    
+    def _build_lut(self, gray: np.ndarray, buffers) -> np.ndarray:
+        """
+        間引いたヒストグラムからレベル補正とコントラスト強調をまとめたテーブルを作る
+        np.bincount もインデックスを intp に変換するため、_apply_lut と同じく数十行ずつ
+        確保済みのインデックス用バッファに写して数える
+        
+        Args:
+            gray: 輝度画像
+            buffers: このスレッド用の作業バッファ
+        
+        Returns:
+            256要素の uint8 テーブル
+        """
+        height, width = gray.shape
+        step = max(1, int((height * width / self.histogram_samples) ** 0.5))
+        sample = gray[::step, ::step]
+        
+        index = buffers.index.reshape(-1)
+        rows = index.size // sample.shape[1]
+        counts = np.zeros(256, dtype=np.int64)
+        for top in range(0, sample.shape[0], rows):
+            count = min(rows, sample.shape[0] - top)
+            chunk = index[:count * sample.shape[1]]
+            np.copyto(chunk.reshape(count, sample.shape[1]), sample[top:top + count])
+            counts += np.bincount(chunk, minlength=256)[:256]
+        histogram = counts.astype(np.float32)
+        total = histogram.sum()
+        levels = self._levels
+        
+        if self.stretch_percentile is not None and total > 0:
+            cumulative = np.cumsum(histogram)
+            cut = total * self.stretch_percentile / 100
+            low = int(np.searchsorted(cumulative, cut, side='right'))
+            high = int(np.searchsorted(cumulative, total - cut, side='left'))
+            if high > low:
+                levels = np.clip((levels - low) * (255.0 / (high - low)), 0, 255)
+        
+        if self.contrast != 1.0 and total > 0:
+            # ImageEnhance.Contrast と同じく平均輝度を中心に強調する
+            mean = float((histogram * levels).sum() / total)
+            levels = np.clip(mean + self.contrast * (levels - mean), 0, 255)
+        
+        return (levels + 0.5).astype(np.uint8)
+    
+    def _binarize(self, buffers) -> np.ndarray:
+        """
+        局所平均との比較で二値化する（buffers.out を上書き）
+        端は最も近い画素で埋め、積分画像から窓内の合計を求める
+        """
+        out = buffers.out
+        height, width = out.shape
+        radius = self.block_size // 2
+        size = self.block_size
+        
+        if buffers.padded is None:
+            buffers.padded = np.empty((height + 2 * radius, width + 2 * radius), dtype=np.uint8)
+            buffers.integral = np.zeros((height + 2 * radius + 1, width + 2 * radius + 1), dtype=np.uint32)
+            buffers.sums = np.empty((height, width), dtype=np.uint32)
+            buffers.scaled = np.empty((height, width), dtype=np.uint32)
+            buffers.mask = np.empty((height, width), dtype=bool)
+        
+        padded, integral, sums, scaled, mask = (buffers.padded, buffers.integral, buffers.sums,
+                                                buffers.scaled, buffers.mask)
+        
+        padded[radius:radius + height, radius:radius + width] = out
+        padded[:radius, radius:radius + width] = out[0]
+        padded[radius + height:, radius:radius + width] = out[-1]
+        padded[:, :radius] = padded[:, radius:radius + 1]
+        padded[:, radius + width:] = padded[:, radius + width - 1:radius + width]
+        
+        inner = integral[1:, 1:]
+        np.cumsum(padded, axis=0, dtype=np.uint32, out=inner)
+        np.cumsum(inner, axis=1, out=inner)
+        
+        # 窓内の合計（途中で桁あふれしても符号なし整数の剰余演算で最終結果は正しい）
+        np.subtract(integral[size:, size:], integral[:height, size:], out=sums)
+        np.subtract(sums, integral[size:, :width], out=sums)
+        np.add(sums, integral[:height, :width], out=sums)
+        
+        # 画素 > 平均 - offset  ⇔  (画素 + offset) * 面積 > 合計
+        np.add(out, self.binarize_offset, out=scaled, dtype=np.uint32)
+        np.multiply(scaled, size * size, out=scaled)
+        np.greater(scaled, sums, out=mask)
+        np.multiply(mask, 255, out=out, dtype=np.uint8)
+        return out
+    
+    def process(self, image: Image.Image, scale: float = 1.0) -> np.ndarray:
+        """
+        画像を前処理する
+        
+        Args:
+            image: 入力画像
+            scale: 縮小率
+        
+        Returns:
+            前処理済みの (高さ, 幅) uint8 配列
+            バッファは次の呼び出しで上書きされるため、保持する場合はコピーすること
+        """
+        size = scaled_size(image.size, scale)
+        if image.mode != 'L':
+            # 2倍以上縮小する場合は先に整数倍の面積平均（reduce）で縮め、全解像度のグレースケール画像を作らない
+            # （カラーのまま任意の倍率で縮小するより速い。グレースケール化はC実装のPILの変換を使う）
+            factor = int(1 / scale) if scale < 1.0 else 1
+            if factor >= 2:
+                image = image.reduce(factor)
+            image = image.convert('L')
+        image = resize_for_ocr(image, scale, self.box_filter_below, size)
+        
+        # PILの画素をNumPyから参照する（tobytes の1回以外はコピーしない）
+        gray = np.frombuffer(image.tobytes(), dtype=np.uint8).reshape(image.height, image.width)
+        buffers = self._buffers(image.height, image.width)
+        
+        lut = self._build_lut(gray, buffers)
+        self._apply_lut(lut, gray, buffers)
+        
+        if self.binarize:
+            return self._binarize(buffers)
+        return buffers.out
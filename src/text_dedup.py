@@ -0,0 +1,254 @@
+"""
+テキスト重複除去モジュール
+フレームごとに揺れるOCR結果（余計な記号、| と I の取り違え、空白の有無など）を正規化し、
+最近翻訳した文と揺れの範囲で同じなら前回の翻訳を再利用して翻訳リクエストを減らす
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import re
+import threading
+
+# OCRで取り違えやすい文字を1つにまとめる（大文字小文字は match_key でそろえてから変換する）
+CONFUSABLES = str.maketrans({'|': 'l', 'i': 'l', '1': 'l', '0': 'o'})
+# 単語の途中の数字（successfu1ly など）はOCRの取り違えとみなし、独立した数字だけを比べる
+NUMBER_PATTERN = re.compile(r'(?<![^\W\d_])\d+(?![^\W\d_])')
+SPACE_PATTERN = re.compile(r'\s+')
+
+
+def clean_text(text: str) -> str:
+    """
+    OCRで認識したテキストをクリーンアップする
+    
+    Args:
+        text: クリーンアップするテキスト
+    
+    Returns:
+        クリーンアップされたテキスト
+    """
+    # 余分な空白を削除
+    text = re.sub(r'\s+', ' ', text)
+    
+    # OCRの誤認識でよくある文字を修正
+    text = text.replace('|', 'I')
+    text = text.replace('0', 'O') if not any(c.isdigit() for c in text.replace('0', '')) else text
+    
+    return text.strip()
+
+
+def match_key(text: str) -> str:
+    """
+    揺れを比較するための正規化したテキスト（大文字小文字・空白の有無を無視）
+    
+    Args:
+        text: テキスト
+    
+    Returns:
+        比較用の文字列
+    """
+    return SPACE_PATTERN.sub('', clean_text(text)).casefold()
+
+
+def numbers(text: str) -> Tuple[str, ...]:
+    """
+    テキスト中の独立した数字（数字が違う文は揺れではなく別の文として扱う）
+    
+    Args:
+        text: テキスト
+    
+    Returns:
+        数字の並び
+    """
+    return tuple(NUMBER_PATTERN.findall(clean_text(text)))
+
+
+def confusion_key(key: str) -> str:
+    """比較用の文字列の、取り違えやすい文字をそろえたもの"""
+    return key.translate(CONFUSABLES)
+
+
+def skeleton(key: str) -> str:
+    """文字列の英数字だけを並べたもの（単語が1文字でも違えば一致しない）"""
+    return ''.join(char for char in key if char.isalnum())
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    編集距離（レーベンシュタイン距離）を求める
+    limit を超えることが分かった時点で打ち切り、limit + 1 を返す
+    
+    Args:
+        a, b: 比較する文字列
+        limit: 求める距離の上限
+    
+    Returns:
+        編集距離（limit を超える場合は limit + 1）
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if len(a) < len(b):
+        a, b = b, a
+    
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        # 対角線から limit より離れたマスは距離が limit を超えるため計算しない
+        low = max(1, i - limit)
+        high = min(len(b), i + limit)
+        if low > 1:
+            current[low - 1] = limit + 1
+        for j in range(low, high + 1):
+            cost = 0 if char_a == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+        for j in range(high + 1, len(b) + 1):
+            current[j] = limit + 1
+        if min(current[low - 1:high + 1]) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[len(b)], limit + 1)
+
+
+class TextDeduplicator:
+    """
+    最近翻訳した文を保持し、OCRの揺れの範囲で同じ文なら前回の翻訳を返す
+    取り違えやすい文字（| と I と l、0 と O など）をそろえた上で英数字が全て一致し、
+    違いが max_noise 個以内の記号だけなら同じ文とみなす
+    単語が変わった文（this file と this folder、file と files など）や
+    数字が違う文（「残り 3 個」と「残り 8 個」など）は別の文として扱う
+    """
+    
+    def __init__(self, max_noise: int = 1, max_entries: int = 256):
+        """
+        Args:
+            max_noise: 揺れとみなす記号の追加・削除・置き換えの数（0で、取り違えやすい文字と大文字小文字・空白の違いだけを無視）
+            max_entries: 保持する文の最大数（古いものから捨てる）
+        """
+        self.max_noise = max_noise
+        self.max_entries = max_entries
+        
+        self._lock = threading.Lock()
+        # 比較用の文字列 → (取り違えやすい文字をそろえた文字列, 数字, 翻訳)
+        self._entries: "OrderedDict[str, Tuple[str, Tuple[str, ...], str]]" = OrderedDict()
+        
+        # 統計情報
+        self.exact_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+    
+    def _noise(self, a: str, b: str) -> Optional[int]:
+        """
+        取り違えやすい文字をそろえた2つの文字列の、記号だけの違いの数
+        
+        Args:
+            a, b: confusion_key でそろえた文字列
+        
+        Returns:
+            違いの数（英数字が違う場合や max_noise を超える場合はNone）
+        """
+        if a == b:
+            return 0
+        if self.max_noise <= 0 or skeleton(a) != skeleton(b):
+            return None
+        distance = edit_distance(a, b, self.max_noise)
+        return distance if distance <= self.max_noise else None
+    
+    def matches(self, a: Optional[str], b: Optional[str]) -> bool:
+        """
+        2つのテキストがOCRの揺れの範囲で同じか判定する
+        
+        Args:
+            a, b: 比較するテキスト（複数行の場合は行ごとに比較し、行数が違えば別のテキスト）
+        
+        Returns:
+            同じとみなせる場合はTrue
+        """
+        if a is None or b is None:
+            return a is b
+        # 全体で比べると長い画面の中の1行が丸ごと変わっても許容範囲に収まるため、行ごとに比べる
+        lines_a = [line for line in a.splitlines() if match_key(line)]
+        lines_b = [line for line in b.splitlines() if match_key(line)]
+        if len(lines_a) != len(lines_b):
+            return False
+        for line_a, line_b in zip(lines_a, lines_b):
+            key_a, key_b = match_key(line_a), match_key(line_b)
+            if key_a == key_b:
+                continue
+            if numbers(line_a) != numbers(line_b):
+                return False
+            if self._noise(confusion_key(key_a), confusion_key(key_b)) is None:
+                return False
+        return True
+    
+    def lookup(self, text: str) -> Optional[str]:
+        """
+        最近の文からほぼ同じ文の翻訳を探す
+        
+        Args:
+            text: 翻訳するテキスト
+        
+        Returns:
+            再利用できる翻訳、無ければNone
+        """
+        key = match_key(text)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry[2]
+            
+            confused = confusion_key(key)
+            digits = numbers(text)
+            best: Optional[Tuple[int, str]] = None
+            for candidate, (candidate_confused, candidate_digits, _) in self._entries.items():
+                if candidate_digits != digits or abs(len(candidate_confused) - len(confused)) > self.max_noise:
+                    continue
+                distance = self._noise(confused, candidate_confused)
+                if distance is not None and (best is None or distance < best[0]):
+                    best = (distance, candidate)
+            
+            if best is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best[1])
+            self.fuzzy_hits += 1
+            return self._entries[best[1]][2]
+    
+    def remember(self, text: str, translation: str):
+        """
+        翻訳した文を記録する
+        
+        Args:
+            text: 原文
+            translation: 翻訳
+        """
+        key = match_key(text)
+        if not key:
+            return
+        with self._lock:
+            self._entries[key] = (confusion_key(key), numbers(text), translation)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """記録した文を捨てる"""
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, float]:
+        """
+        統計情報を取得する
+        
+        Returns:
+            exact_hits, fuzzy_hits, misses, hit_rate, entries を含む辞書
+        """
+        with self._lock:
+            total = self.exact_hits + self.fuzzy_hits + self.misses
+            return {
+                'exact_hits': self.exact_hits,
+                'fuzzy_hits': self.fuzzy_hits,
+                'misses': self.misses,
+                'hit_rate': (self.exact_hits + self.fuzzy_hits) / total if total else 0.0,
+                'entries': len(self._entries),
+            }
@@ -0,0 +1,364 @@
+"""
+文字領域検出モジュール
+認識の前に文字がありそうな領域だけを検出し、その部分だけを認識する
+"""
+
+from PIL import Image
+from typing import List, Optional, Set, Tuple
+import time
+
+import numpy as np
+
+from .ocr_engine import EasyOCREngine, OCREngine
+from .preprocess import Preprocessor, resize_for_ocr
+
+# (left, top, right, bottom)
+Rect = Tuple[int, int, int, int]
+
+# readtext のパラメータのうち reader.detect にも渡すもの（検出を分けても readtext と同じ領域を検出する）
+DETECT_PARAM_NAMES = (
+    'min_size', 'text_threshold', 'low_text', 'link_threshold', 'canvas_size', 'mag_ratio',
+    'slope_ths', 'ycenter_ths', 'height_ths', 'width_ths', 'add_margin',
+)
+
+
+def _intersection(a: Rect, b: Rect) -> Optional[Rect]:
+    """2つの矩形の共通部分（重ならない場合はNone）"""
+    rect = (max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3]))
+    if rect[0] >= rect[2] or rect[1] >= rect[3]:
+        return None
+    return rect
+
+
+def _grid_components(cells: Set[Tuple[int, int]]) -> List[Tuple[int, int, int, int, int]]:
+    """
+    グリッド上のセルを4近傍で連結した成分に分ける
+    
+    Args:
+        cells: (列, 行) の集合
+    
+    Returns:
+        成分ごとの (最小列, 最小行, 最大列, 最大行, セル数) のリスト
+    """
+    remaining = set(cells)
+    components = []
+    while remaining:
+        start = remaining.pop()
+        stack = [start]
+        min_c = max_c = start[0]
+        min_r = max_r = start[1]
+        count = 0
+        while stack:
+            c, r = stack.pop()
+            count += 1
+            min_c, max_c = min(min_c, c), max(max_c, c)
+            min_r, max_r = min(min_r, r), max(max_r, r)
+            for neighbor in ((c + 1, r), (c - 1, r), (c, r + 1), (c, r - 1)):
+                if neighbor in remaining:
+                    remaining.remove(neighbor)
+                    stack.append(neighbor)
+        components.append((min_c, min_r, max_c, max_r, count))
+    return components
+
+
+class TextDetector:
+    """文字領域検出の基底クラス"""
+    
+    # 検出結果が1行ずつの矩形か（Falseなら複数行をまとめたブロック）
+    line_level = False
+    
+    def detect(self, image: Image.Image) -> List[Rect]:
+        """
+        文字がありそうな領域を検出する
+        
+        Args:
+            image: 入力画像
+        
+        Returns:
+            (left, top, right, bottom) のリスト
+        """
+        raise NotImplementedError
+
+
+class EdgeDensityDetector(TextDetector):
+    """
+    エッジ密度による文字領域検出
+    文字は横方向の輝度変化が密集するため、縮小画像をセルに分けて変化の多いセルをつなげる
+    """
+    
+    def __init__(self, work_width: int = 960, cell_size: int = 4, edge_threshold: int = 32,
+                 density_threshold: float = 0.12, join_cells: int = 2, min_cells: int = 3,
+                 padding: int = 6):
+        """
+        Args:
+            work_width: 検出に使う縮小画像の最大幅
+            cell_size: セルの大きさ（縮小画像のピクセル）
+            edge_threshold: エッジとみなす隣接画素の輝度差
+            density_threshold: 文字とみなすセル内のエッジ画素の割合
+            join_cells: 単語や行をつなげるために横方向へ広げるセル数（縦は1セル）
+            min_cells: これより小さい成分はノイズとして捨てる
+            padding: 検出した矩形の周囲に追加する余白（元画像のピクセル）
+        """
+        self.work_width = work_width
+        self.cell_size = cell_size
+        self.edge_threshold = edge_threshold
+        self.density_threshold = density_threshold
+        self.join_cells = join_cells
+        self.min_cells = min_cells
+        self.padding = padding
+    
+    def detect(self, image: Image.Image) -> List[Rect]:
+        scale = min(1.0, self.work_width / max(1, image.width))
+        gray = image if image.mode == 'L' else image.convert('L')
+        small = np.asarray(resize_for_ocr(gray, scale), dtype=np.int16)
+        
+        cell = self.cell_size
+        rows, columns = small.shape[0] // cell, (small.shape[1] - 1) // cell
+        if rows == 0 or columns == 0:
+            return []
+        
+        # 横方向の輝度差が大きい画素の割合をセルごとに求める
+        edges = np.abs(np.diff(small[:rows * cell, :columns * cell + 1], axis=1)) > self.edge_threshold
+        density = edges.reshape(rows, cell, columns, cell).mean(axis=(1, 3))
+        mask = density > self.density_threshold
+        
+        # 単語間・行間の隙間を埋める
+        joined = mask.copy()
+        for shift in range(1, self.join_cells + 1):
+            joined[:, shift:] |= mask[:, :-shift]
+            joined[:, :-shift] |= mask[:, shift:]
+        joined[1:, :] |= mask[:-1, :]
+        
+        cells = {(int(c), int(r)) for r, c in zip(*np.nonzero(joined))}
+        factor = cell / scale
+        rects = []
+        for min_c, min_r, max_c, max_r, count in _grid_components(cells):
+            if count < self.min_cells:
+                continue
+            rects.append((
+                max(0, int(min_c * factor) - self.padding),
+                max(0, int(min_r * factor) - self.padding),
+                min(image.width, int((max_c + 1) * factor) + self.padding),
+                min(image.height, int((max_r + 1) * factor) + self.padding),
+            ))
+        return rects
+
+
+class EasyOCRDetector(TextDetector):
+    """
+    EasyOCRの検出器（CRAFT）だけを使う文字領域検出
+    1行ずつの矩形を返すため、認識はEasyOCRの認識器にまとめて渡せる
+    """
+    
+    line_level = True
+    
+    def __init__(self, engine: EasyOCREngine, padding: int = 2, **params):
+        """
+        Args:
+            engine: 読み込み済みのEasyOCRエンジン（Readerと作業解像度を共有する）
+            padding: 検出した矩形の周囲に追加する余白（元画像のピクセル）
+            **params: reader.detect に渡すパラメータ
+        """
+        self.engine = engine
+        self.padding = padding
+        self.params = params
+        self.preprocessor = Preprocessor()
+    
+    def detect(self, image: Image.Image) -> List[Rect]:
+        scale = self.engine.resolution.choose_scale(image.size)
+        processed = self.preprocessor.process(image, scale)
+        horizontal_list, free_list = self.engine.reader.detect(processed, **self.params)
+        
+        rects = []
+        for x_min, x_max, y_min, y_max in horizontal_list[0]:
+            rects.append((x_min, y_min, x_max, y_max))
+        for points in free_list[0]:
+            xs = [point[0] for point in points]
+            ys = [point[1] for point in points]
+            rects.append((min(xs), min(ys), max(xs), max(ys)))
+        
+        return [(
+            max(0, int(left / scale) - self.padding),
+            max(0, int(top / scale) - self.padding),
+            min(image.width, int(right / scale) + self.padding),
+            min(image.height, int(bottom / scale) + self.padding),
+        ) for left, top, right, bottom in rects]
+
+
+def create_text_detector(engine: OCREngine) -> TextDetector:
+    """
+    エンジンに合った文字領域検出を作成する
+    
+    Args:
+        engine: 認識に使うOCRエンジン
+    
+    Returns:
+        EasyOCRならその検出器（readtext と同じ検出の閾値を使う）、それ以外はエッジ密度による検出
+    """
+    if isinstance(engine, EasyOCREngine):
+        params = {name: value for name, value in engine.READTEXT_PARAMS.items() if name in DETECT_PARAM_NAMES}
+        return EasyOCRDetector(engine, **params)
+    return EdgeDensityDetector()
+
+
+class DetectingOCR(OCREngine):
+    """
+    文字領域検出を前段に置くラッパーエンジン
+    検出した領域だけをまとめて認識し、レイアウトが変わらない間は検出結果を再利用する
+    """
+    
+    def __init__(self, engine: OCREngine, detector: Optional[TextDetector] = None,
+                 signature_width: int = 160, pixel_tolerance: int = 16, min_changed_cells: int = 4,
+                 max_age: int = 30):
+        """
+        Args:
+            engine: 実際に認識を行うOCRエンジン
+            detector: 文字領域検出（Noneの場合はエンジンに合わせて作成）
+            signature_width: レイアウトの比較に使う縮小画像の横幅
+            pixel_tolerance: 縮小画像のセルを「変化あり」とみなす輝度差
+            min_changed_cells: 既知の文字領域の外でこれ以上のセルが変化したら検出し直す
+            max_age: レイアウトが変わらなくてもこのフレーム数ごとに検出し直す
+        """
+        self.engine = engine
+        self.resolution = engine.resolution
+        self.detector = detector if detector is not None else create_text_detector(engine)
+        self.signature_width = signature_width
+        self.pixel_tolerance = pixel_tolerance
+        self.min_changed_cells = min_changed_cells
+        self.max_age = max_age
+        
+        self._signature: Optional[np.ndarray] = None
+        self._rects: List[Rect] = []
+        self._age = 0
+        
+        # 統計情報
+        self.detections = 0
+        self.cache_hits = 0
+        self.detect_time = 0.0
+        self.total_pixels = 0
+        self.text_pixels = 0
+    
+    def _layout_changed(self, image: Image.Image) -> bool:
+        """
+        前フレームから既知の文字領域の外側が変化したかを判定する
+        文字領域の中だけの変化（文字の書き換え）なら検出結果はそのまま使える
+        """
+        height = max(1, round(image.height * self.signature_width / max(1, image.width)))
+        small = image.resize((self.signature_width, height), Image.Resampling.BILINEAR, reducing_gap=2.0)
+        signature = np.asarray(small.convert('L'), dtype=np.int16)
+        
+        previous, self._signature = self._signature, signature
+        if previous is None or previous.shape != signature.shape:
+            return True
+        
+        changed = np.abs(signature - previous) > self.pixel_tolerance
+        if not changed.any():
+            return False
+        
+        scale_x = signature.shape[1] / image.width
+        scale_y = signature.shape[0] / image.height
+        for left, top, right, bottom in self._rects:
+            changed[int(top * scale_y):int(bottom * scale_y) + 1,
+                    int(left * scale_x):int(right * scale_x) + 1] = False
+        return int(changed.sum()) >= self.min_changed_cells
+    
+    def detect(self, image: Image.Image) -> List[Rect]:
+        """
+        文字領域を取得する（レイアウトが変わっていなければ前回の結果）
+        
+        Args:
+            image: 入力画像
+        
+        Returns:
+            (left, top, right, bottom) のリスト
+        """
+        changed = self._layout_changed(image)
+        if changed or self._age >= self.max_age:
+            started = time.perf_counter()
+            self._rects = self.detector.detect(image)
+            self.detect_time += time.perf_counter() - started
+            self.detections += 1
+            self._age = 0
+        else:
+            self.cache_hits += 1
+        self._age += 1
+        return list(self._rects)
+    
+    def recognize_regions(self, image: Image.Image, rects: List[Rect]) -> List[List[dict]]:
+        """
+        各領域のうち文字が検出された部分だけを認識する
+        
+        Args:
+            image: 入力画像
+            rects: (left, top, right, bottom) のリスト
+        
+        Returns:
+            領域ごとの認識結果のリスト（座標は元画像基準）
+        """
+        text_rects = self.detect(image)
+        
+        crops: List[Rect] = []
+        owners: List[int] = []
+        for index, rect in enumerate(rects):
+            self.total_pixels += (rect[2] - rect[0]) * (rect[3] - rect[1])
+            for text_rect in text_rects:
+                crop = _intersection(rect, text_rect)
+                if crop is not None:
+                    crops.append(crop)
+                    owners.append(index)
+                    self.text_pixels += (crop[2] - crop[0]) * (crop[3] - crop[1])
+        
+        results: List[List[dict]] = [[] for _ in rects]
+        if not crops:
+            return results
+        
+        # 1行ずつの検出結果なら認識器にまとめて渡し、ブロックなら領域ごとに認識する
+        if self.detector.line_level and hasattr(self.engine, 'recognize_lines'):
+            crop_boxes = self.engine.recognize_lines(image, crops)
+        else:
+            crop_boxes = self.engine.recognize_regions(image, crops)
+        
+        for owner, boxes in zip(owners, crop_boxes):
+            results[owner].extend(boxes)
+        return results
+    
+    def recognize_with_boxes(self, image: Image.Image) -> List[dict]:
+        """
+        画像から文字を認識し、位置情報も取得する
+        
+        Args:
+            image: 入力画像
+        
+        Returns:
+            認識結果のリスト
+        """
+        return self.recognize_regions(image, [(0, 0, image.width, image.height)])[0]
+    
+    def warm_up(self):
+        """検出と認識の両方をウォームアップする"""
+        self.engine.warm_up()
+    
+    def reset(self):
+        """検出結果と統計情報をリセットする"""
+        self._signature = None
+        self._rects = []
+        self._age = 0
+        self.detections = 0
+        self.cache_hits = 0
+        self.detect_time = 0.0
+        self.total_pixels = 0
+        self.text_pixels = 0
+    
+    def get_stats(self) -> dict:
+        """
+        統計情報を取得する
+        
+        Returns:
+            detections, cache_hits, detect_ms（1回あたり）, text_area_ratio（認識した面積の割合）
+        """
+        return {
+            'detections': self.detections,
+            'cache_hits': self.cache_hits,
+            'detect_ms': self.detect_time / self.detections * 1000 if self.detections else 0.0,
+            'text_area_ratio': self.text_pixels / self.total_pixels if self.total_pixels else 0.0,
+        }
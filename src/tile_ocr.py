@@ -0,0 +1,235 @@
+"""
+タイル分割OCRモジュール
+画面をグリッドに分割し、変化したタイルだけを再認識する
+"""
+
+from PIL import Image
+from typing import Dict, List, Optional, Tuple
+import zlib
+
+from .ocr_engine import OCREngine
+from .ocr_result import LINE_KEY, scope_line_keys
+
+# (left, top, right, bottom)
+Rect = Tuple[int, int, int, int]
+
+
+def _box_rect(box: dict) -> Rect:
+    """認識結果の辞書を矩形に変換する"""
+    return (box['left'], box['top'], box['left'] + box['width'], box['top'] + box['height'])
+
+
+def _intersects(a: Rect, b: Rect) -> bool:
+    """2つの矩形が重なっているか"""
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def _union(a: Rect, b: Rect) -> Rect:
+    """2つの矩形を包含する矩形"""
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _merge_overlapping(rects: List[Rect]) -> List[Rect]:
+    """重なっている矩形同士を結合する"""
+    rects = list(rects)
+    merged = True
+    while merged:
+        merged = False
+        result: List[Rect] = []
+        for rect in rects:
+            for i, other in enumerate(result):
+                if _intersects(rect, other):
+                    result[i] = _union(rect, other)
+                    merged = True
+                    break
+            else:
+                result.append(rect)
+        rects = result
+    return rects
+
+
+class TiledOCR(OCREngine):
+    """
+    差分タイルのみをOCRするラッパーエンジン
+    変化のないタイルは前回の認識結果を再利用する
+    """
+    
+    def __init__(self, engine: OCREngine, tile_size: Tuple[int, int] = (128, 64),
+                 padding: int = 8, full_frame_ratio: float = 0.6):
+        """
+        Args:
+            engine: 実際に認識を行うOCRエンジン（recognize_with_boxes が必要）
+            tile_size: タイルの大きさ (幅, 高さ)
+            padding: 再認識する矩形の周囲に追加する余白（文字の切れ対策）
+            full_frame_ratio: 変化した面積の割合がこれを超えたら全体を認識する
+        """
+        self.engine = engine
+        self.resolution = engine.resolution
+        self.tile_size = tile_size
+        self.padding = padding
+        self.full_frame_ratio = full_frame_ratio
+        
+        self._image_size: Optional[Tuple[int, int]] = None
+        self._checksums: Dict[Tuple[int, int], int] = {}
+        self._boxes: List[dict] = []
+        # 認識した回数（前回までの結果と今回の結果で行の番号が重ならないようにする）
+        self._recognitions = 0
+        
+        # 統計情報
+        self.total_pixels = 0
+        self.ocr_pixels = 0
+    
+    def _tile_checksums(self, image: Image.Image) -> Dict[Tuple[int, int], int]:
+        """各タイルのチェックサムを計算する"""
+        tile_w, tile_h = self.tile_size
+        checksums = {}
+        for top in range(0, image.height, tile_h):
+            for left in range(0, image.width, tile_w):
+                tile = image.crop((left, top, min(left + tile_w, image.width), min(top + tile_h, image.height)))
+                checksums[(left // tile_w, top // tile_h)] = zlib.crc32(tile.tobytes())
+        return checksums
+    
+    def _dirty_rects(self, dirty_tiles: List[Tuple[int, int]], image_size: Tuple[int, int]) -> List[Rect]:
+        """
+        変化したタイルを連結成分ごとの矩形にまとめる
+        
+        Args:
+            dirty_tiles: 変化したタイルの (列, 行) のリスト
+            image_size: 画像サイズ
+        
+        Returns:
+            ピクセル座標の矩形のリスト
+        """
+        tile_w, tile_h = self.tile_size
+        width, height = image_size
+        remaining = set(dirty_tiles)
+        rects = []
+        
+        while remaining:
+            start = remaining.pop()
+            stack = [start]
+            min_c = max_c = start[0]
+            min_r = max_r = start[1]
+            while stack:
+                c, r = stack.pop()
+                min_c, max_c = min(min_c, c), max(max_c, c)
+                min_r, max_r = min(min_r, r), max(max_r, r)
+                for neighbor in ((c + 1, r), (c - 1, r), (c, r + 1), (c, r - 1)):
+                    if neighbor in remaining:
+                        remaining.remove(neighbor)
+                        stack.append(neighbor)
+            
+            rects.append((
+                max(0, min_c * tile_w - self.padding),
+                max(0, min_r * tile_h - self.padding),
+                min(width, (max_c + 1) * tile_w + self.padding),
+                min(height, (max_r + 1) * tile_h + self.padding),
+            ))
+        
+        return _merge_overlapping(rects)
+    
+    def _cached_rects(self) -> List[Rect]:
+        """
+        前回の結果のうち、まとめて認識し直す単位の矩形
+        エンジンが行・段落を判定している場合は段落全体（一部だけ認識し直すと段落が分かれるため）
+        """
+        paragraphs: Dict[object, Rect] = {}
+        rects = []
+        for box in self._boxes:
+            key = box.get(LINE_KEY)
+            if key is None:
+                rects.append(_box_rect(box))
+            else:
+                paragraph = key[:2]
+                previous = paragraphs.get(paragraph)
+                paragraphs[paragraph] = _box_rect(box) if previous is None else _union(previous, _box_rect(box))
+        return rects + list(paragraphs.values())
+    
+    def _expand_with_cached_boxes(self, rects: List[Rect]) -> List[Rect]:
+        """変化領域にかかる既存ボックス（段落）を含むように矩形を広げる（単語・段落の分断を防ぐ）"""
+        cached_rects = self._cached_rects()
+        changed = True
+        while changed:
+            changed = False
+            for box_rect in cached_rects:
+                for i, rect in enumerate(rects):
+                    if _intersects(box_rect, rect):
+                        expanded = _union(rect, box_rect)
+                        if expanded != rect:
+                            rects[i] = expanded
+                            changed = True
+                        break
+            if changed:
+                rects = _merge_overlapping(rects)
+        return rects
+    
+    def recognize_with_boxes(self, image: Image.Image) -> List[dict]:
+        """
+        変化したタイルのみを認識し、前回の結果と合わせて返す
+        
+        Args:
+            image: 入力画像
+        
+        Returns:
+            認識結果のリスト（text, left, top, width, height, confidence）
+        """
+        checksums = self._tile_checksums(image)
+        area = image.width * image.height
+        self.total_pixels += area
+        
+        if self._image_size != image.size:
+            dirty_tiles = list(checksums.keys())
+            self._boxes = []
+        else:
+            dirty_tiles = [key for key, value in checksums.items() if self._checksums.get(key) != value]
+        
+        self._image_size = image.size
+        self._checksums = checksums
+        
+        if not dirty_tiles:
+            return list(self._boxes)
+        
+        rects = self._expand_with_cached_boxes(self._dirty_rects(dirty_tiles, image.size))
+        dirty_area = sum((r[2] - r[0]) * (r[3] - r[1]) for r in rects)
+        
+        if dirty_area > area * self.full_frame_ratio:
+            # 大部分が変化した場合は1回で全体を認識する方が速い
+            self.ocr_pixels += area
+            self._recognitions += 1
+            self._boxes = scope_line_keys(self.engine.recognize_with_boxes(image), self._recognitions)
+            return list(self._boxes)
+        
+        # 変化のない領域の結果は再利用
+        boxes = [box for box in self._boxes
+                 if not any(_intersects(_box_rect(box), rect) for rect in rects)]
+        
+        # 領域どうしは独立しているので、エンジンが対応していればまとめて並列に認識される
+        self.ocr_pixels += dirty_area
+        self._recognitions += 1
+        for region_boxes in self.engine.recognize_regions(image, rects):
+            boxes.extend(scope_line_keys(region_boxes, self._recognitions))
+        
+        boxes.sort(key=lambda b: (b['top'], b['left']))
+        self._boxes = boxes
+        return list(boxes)
+    
+    def reset(self):
+        """キャッシュと統計情報をリセットする"""
+        self._image_size = None
+        self._checksums = {}
+        self._boxes = []
+        self.total_pixels = 0
+        self.ocr_pixels = 0
+    
+    def get_stats(self) -> dict:
+        """
+        統計情報を取得する
+        
+        Returns:
+            total_pixels, ocr_pixels, ocr_area_ratio（実際にOCRした面積の割合）
+        """
+        return {
+            'total_pixels': self.total_pixels,
+            'ocr_pixels': self.ocr_pixels,
+            'ocr_area_ratio': self.ocr_pixels / self.total_pixels if self.total_pixels else 0.0,
+        }
@@ -0,0 +1,261 @@
+"""
+翻訳メモリモジュール
+翻訳結果をメモリ（LRU）とディスク（SQLite）にキャッシュし、同じ文の再翻訳を避ける
+"""
+
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# (service, source_lang, target_lang, segment)
+MemoryKey = Tuple[str, str, str, str]
+
+# メモリLRUのヒットをディスクの last_used に反映する間隔（秒）
+TOUCH_FLUSH_INTERVAL = 60.0
+
+
+def default_memory_path() -> str:
+    """
+    翻訳メモリの既定の保存先を取得する
+    
+    Returns:
+        SQLiteファイルのパス
+    """
+    base_dir = os.environ.get('APPDATA') or os.path.expanduser('~')
+    return os.path.join(base_dir, 'WindowTranslator', 'translation_memory.sqlite3')
+
+
+def normalize_segment(text: str) -> str:
+    """
+    キャッシュキー用にテキストを正規化する
+    
+    Args:
+        text: 正規化するテキスト
+    
+    Returns:
+        空白を詰めたテキスト
+    """
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+class TranslationMemory:
+    """
+    翻訳メモリ
+    メモリ上のLRUを前段に、SQLiteのディスクストアを後段に持つ
+    """
+    
+    def __init__(self, path: Optional[str] = None, max_memory_entries: int = 2048,
+                 max_disk_entries: int = 100000, max_age_days: float = 30.0):
+        """
+        Args:
+            path: SQLiteファイルのパス（Noneの場合はメモリのみ）
+            max_memory_entries: メモリ上に保持する最大件数
+            max_disk_entries: ディスクに保持する最大件数
+            max_age_days: 最後に使われてからこの日数を過ぎたエントリは削除する
+        """
+        self.path = path
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.max_age_seconds = max_age_days * 24 * 60 * 60
+        
+        self._memory: "OrderedDict[MemoryKey, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._puts_since_evict = 0
+        # メモリLRUでヒットしたがディスクの last_used にまだ反映していないキー → 最後に使った時刻
+        self._touched: Dict[MemoryKey, float] = {}
+        self._last_flush = time.monotonic()
+        
+        # 統計情報
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        
+        if path:
+            self._open(path)
+    
+    def _open(self, path: str):
+        """SQLiteストアを開く"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS translations ('
+            ' service TEXT NOT NULL,'
+            ' source_lang TEXT NOT NULL,'
+            ' target_lang TEXT NOT NULL,'
+            ' segment TEXT NOT NULL,'
+            ' translation TEXT NOT NULL,'
+            ' last_used REAL NOT NULL,'
+            ' PRIMARY KEY (service, source_lang, target_lang, segment))'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_last_used ON translations (last_used)')
+        self._conn.commit()
+        self.evict()
+    
+    def _remember(self, key: MemoryKey, translation: str):
+        """メモリLRUに追加する（ロック取得済みで呼ぶ）"""
+        self._memory[key] = translation
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+    
+    def get(self, service: str, source_lang: str, target_lang: str, text: str) -> Optional[str]:
+        """
+        翻訳メモリから翻訳結果を取得する
+        
+        Args:
+            service: 翻訳サービス名
+            source_lang: 翻訳元の言語コード
+            target_lang: 翻訳先の言語コード
+            text: 翻訳元テキスト
+        
+        Returns:
+            翻訳結果、見つからない場合はNone
+        """
+        key = (service, source_lang, target_lang, normalize_segment(text))
+        
+        with self._lock:
+            translation = self._memory.get(key)
+            if translation is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                if self._conn is not None:
+                    # よく使う文がディスクから先に消されないよう、最後に使った時刻をまとめて反映する
+                    self._touched[key] = time.time()
+                    if time.monotonic() - self._last_flush >= TOUCH_FLUSH_INTERVAL:
+                        self._flush_touched()
+                        self._conn.commit()
+                return translation
+            
+            if self._conn is not None:
+                row = self._conn.execute(
+                    'SELECT translation FROM translations'
+                    ' WHERE service=? AND source_lang=? AND target_lang=? AND segment=?',
+                    key
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        'UPDATE translations SET last_used=?'
+                        ' WHERE service=? AND source_lang=? AND target_lang=? AND segment=?',
+                        (time.time(),) + key
+                    )
+                    self._conn.commit()
+                    self._remember(key, row[0])
+                    self.disk_hits += 1
+                    return row[0]
+            
+            self.misses += 1
+            return None
+    
+    def put(self, service: str, source_lang: str, target_lang: str, text: str, translation: str):
+        """
+        翻訳結果を翻訳メモリに保存する
+        
+        Args:
+            service: 翻訳サービス名
+            source_lang: 翻訳元の言語コード
+            target_lang: 翻訳先の言語コード
+            text: 翻訳元テキスト
+            translation: 翻訳結果
+        """
+        key = (service, source_lang, target_lang, normalize_segment(text))
+        
+        with self._lock:
+            self._remember(key, translation)
+            
+            if self._conn is not None:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO translations'
+                    ' (service, source_lang, target_lang, segment, translation, last_used)'
+                    ' VALUES (?, ?, ?, ?, ?, ?)',
+                    key + (translation, time.time())
+                )
+                self._conn.commit()
+                
+                # 書き込みが一定数たまったら古いエントリを整理
+                self._puts_since_evict += 1
+                if self._puts_since_evict >= 500:
+                    self._evict_locked()
+    
+    def evict(self):
+        """期限切れ・上限超過のエントリをディスクから削除する"""
+        with self._lock:
+            self._evict_locked()
+    
+    def _flush_touched(self):
+        """メモリLRUでヒットしたエントリの last_used をディスクに反映する（ロック取得済みで呼ぶ、commit は呼び出し側）"""
+        self._last_flush = time.monotonic()
+        if not self._touched or self._conn is None:
+            self._touched.clear()
+            return
+        self._conn.executemany(
+            'UPDATE translations SET last_used=MAX(last_used, ?)'
+            ' WHERE service=? AND source_lang=? AND target_lang=? AND segment=?',
+            [(last_used,) + key for key, last_used in self._touched.items()]
+        )
+        self._touched.clear()
+    
+    def _evict_locked(self):
+        """evict の本体（ロック取得済みで呼ぶ）"""
+        self._puts_since_evict = 0
+        if self._conn is None:
+            return
+        
+        # 削除する順番がヒットした順になるよう、先に最後に使った時刻を反映する
+        self._flush_touched()
+        self._conn.execute('DELETE FROM translations WHERE last_used < ?',
+                           (time.time() - self.max_age_seconds,))
+        
+        count = self._conn.execute('SELECT COUNT(*) FROM translations').fetchone()[0]
+        if count > self.max_disk_entries:
+            self._conn.execute(
+                'DELETE FROM translations WHERE rowid IN ('
+                ' SELECT rowid FROM translations ORDER BY last_used LIMIT ?)',
+                (count - self.max_disk_entries,)
+            )
+        self._conn.commit()
+    
+    def clear(self):
+        """すべてのエントリを削除する"""
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            if self._conn is not None:
+                self._conn.execute('DELETE FROM translations')
+                self._conn.commit()
+    
+    def close(self):
+        """SQLiteストアを閉じる"""
+        with self._lock:
+            if self._conn is not None:
+                self._flush_touched()
+                self._conn.commit()
+                self._conn.close()
+                self._conn = None
+    
+    def get_stats(self) -> dict:
+        """
+        統計情報を取得する
+        
+        Returns:
+            memory_hits, disk_hits, misses, hit_rate, memory_entries
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': hits / total if total else 0.0,
+                'memory_entries': len(self._memory),
+            }
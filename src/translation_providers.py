@@ -0,0 +1,494 @@
+"""
+翻訳プロバイダモジュール
+Translator の背後で実際に翻訳を行うサービス（オンライン／オフライン）を共通のインターフェースで扱う
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import os
+import re
+import threading
+import time
+
+# サービスごとの制限
+#   max_chars: 1リクエストあたりの最大文字数
+#   max_workers: 同時リクエスト数
+#   min_interval: リクエストの最小間隔（秒）
+SERVICE_LIMITS = {
+    "google": {"max_chars": 4500, "max_workers": 4, "min_interval": 0.1},
+    "mymemory": {"max_chars": 450, "max_workers": 2, "min_interval": 0.5},
+}
+
+# 文の区切り（文末記号の後の空白）
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+')
+
+# フレーズ表の単語の区切り（単語・アポストロフィを含む単語・記号）
+TOKEN_PATTERN = re.compile(r"[A-Za-z0-9]+(?:'[A-Za-z]+)?|[^\sA-Za-z0-9]")
+
+# フレーズ表を指定しない場合の組み込みの英日フレーズ（画面によく出るUIの文言）
+DEFAULT_PHRASES_EN_JA = {
+    "ok": "OK",
+    "yes": "はい",
+    "no": "いいえ",
+    "cancel": "キャンセル",
+    "back": "戻る",
+    "next": "次へ",
+    "continue": "続ける",
+    "start": "開始",
+    "new game": "ニューゲーム",
+    "load game": "ロード",
+    "save": "保存",
+    "settings": "設定",
+    "options": "オプション",
+    "quit": "終了",
+    "exit": "終了",
+    "help": "ヘルプ",
+    "file": "ファイル",
+    "edit": "編集",
+    "view": "表示",
+    "loading": "読み込み中",
+    "warning": "警告",
+    "error": "エラー",
+    "press any key": "いずれかのキーを押してください",
+    "press any key to continue": "続けるにはいずれかのキーを押してください",
+    "settings saved successfully": "設定を保存しました",
+    "try again": "もう一度お試しください",
+}
+
+
+class TranslationError(Exception):
+    """翻訳に失敗したことを表す例外（原因の例外は __cause__ に入る）"""
+
+
+class TranslationCancelled(TranslationError):
+    """新しいフレームの翻訳に置き換わり、送信前に取り消したことを表す例外（サービスの失敗ではない）"""
+
+
+class RateLimiter:
+    """リクエストの最小間隔を守るレートリミッター（スレッドセーフ）"""
+    
+    def __init__(self, min_interval: float):
+        """
+        Args:
+            min_interval: リクエストの最小間隔（秒）
+        """
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+    
+    def acquire(self):
+        """次のリクエストを送ってよい時刻まで待機する"""
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.min_interval
+        
+        if wait > 0:
+            time.sleep(wait)
+
+
+# レートリミッターはサービスごとにプロセス全体で共有する
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(service: str, min_interval: float) -> RateLimiter:
+    """
+    サービスのレートリミッターを取得する
+    
+    Args:
+        service: 翻訳サービス名
+        min_interval: リクエストの最小間隔（秒、初めて取得する時に使う）
+    
+    Returns:
+        共有のレートリミッター
+    """
+    with _rate_limiters_lock:
+        if service not in _rate_limiters:
+            _rate_limiters[service] = RateLimiter(min_interval)
+        return _rate_limiters[service]
+
+
+class TranslationProvider:
+    """
+    翻訳プロバイダの基底クラス
+    モデルや辞書の読み込みは作成時に1回だけ行い、以降は translate / translate_batch を繰り返し呼ぶ
+    """
+    
+    # 翻訳メモリやレートリミッターの区別に使う名前
+    name = ""
+    # 1リクエストあたりの最大文字数・同時実行数・リクエストの最小間隔（秒）
+    max_chars = 4500
+    max_workers = 1
+    min_interval = 0.0
+    # 複数のセグメントを改行で連結して1回で送るか（リクエスト数を減らしたいリモートサービス向け）
+    pack_lines = False
+    
+    def translate(self, text: str) -> str:
+        """テキストを翻訳する"""
+        raise NotImplementedError
+    
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        """
+        複数のテキストを翻訳する
+        
+        Args:
+            texts: 翻訳するテキストのリスト
+        
+        Returns:
+            翻訳結果のリスト（入力と同じ順序）
+        """
+        return [self.translate(text) for text in texts]
+    
+    @property
+    def primary_name(self) -> str:
+        """翻訳メモリを引く時のサービス名（複数のサービスを束ねる場合は最優先のもの）"""
+        return self.name
+    
+    def translate_segments(self, batch: List[str]) -> Tuple[List[str], str]:
+        """
+        1つのバッチを翻訳し、実際に翻訳したサービスの名前と一緒に返す
+        
+        Args:
+            batch: 翻訳するセグメントのリスト
+        
+        Returns:
+            (翻訳結果のリスト, 翻訳したサービス名)
+        """
+        return translate_packed(self, batch), self.name
+    
+    def cancel_pending(self):
+        """まだ送っていないリクエストを取り消す（取り消したリクエストは TranslationCancelled になる）"""
+    
+    def close(self):
+        """プロバイダが保持する資源を解放する"""
+
+
+def translate_packed(provider: TranslationProvider, batch: List[str]) -> List[str]:
+    """
+    1つのバッチをプロバイダで翻訳する
+    プロバイダが対応していれば改行で連結して1リクエストで送り、行数が合わない場合は個別に翻訳する
+    
+    Args:
+        provider: 翻訳プロバイダ
+        batch: 翻訳するセグメントのリスト
+    
+    Returns:
+        翻訳結果のリスト
+    """
+    if len(batch) == 1:
+        return [provider.translate(batch[0])]
+    
+    # ローカルのプロバイダはリクエスト数を気にしなくてよいのでそのままバッチで翻訳
+    if not provider.pack_lines:
+        return provider.translate_batch(batch)
+    
+    result = provider.translate('\n'.join(batch))
+    parts = result.split('\n') if result else []
+    if len(parts) == len(batch):
+        return [part.strip() for part in parts]
+    
+    # 行の対応が崩れた場合はサービスのバッチAPIで個別に翻訳
+    return provider.translate_batch(batch)
+
+
+def split_long_text(text: str, max_chars: int) -> List[str]:
+    """
+    長いテキストを上限文字数以内の塊に分割する
+    
+    Args:
+        text: 分割するテキスト
+        max_chars: 1つの塊の上限文字数
+    
+    Returns:
+        分割されたテキストのリスト
+    """
+    # 文で分割
+    sentences = SENTENCE_PATTERN.split(text)
+    
+    chunks = []
+    current_chunk = ""
+    
+    for sentence in sentences:
+        if len(current_chunk) + len(sentence) < max_chars:
+            current_chunk += " " + sentence
+        else:
+            if current_chunk:
+                chunks.append(current_chunk.strip())
+            current_chunk = sentence
+    
+    if current_chunk:
+        chunks.append(current_chunk.strip())
+    
+    return chunks
+
+
+def pack_batches(texts: Sequence[str], max_chars: int) -> List[List[int]]:
+    """
+    改行で連結しても上限文字数に収まるよう、テキストを先頭から順にバッチにまとめる
+    
+    Args:
+        texts: テキストのリスト
+        max_chars: 1バッチの上限文字数
+    
+    Returns:
+        バッチごとのテキストの番号のリスト
+    """
+    batches: List[List[int]] = []
+    batch_chars = 0
+    for i, text in enumerate(texts):
+        if batches and batch_chars + len(text) + 1 <= max_chars:
+            batches[-1].append(i)
+            batch_chars += len(text) + 1
+        else:
+            batches.append([i])
+            batch_chars = len(text)
+    return batches
+
+
+def translate_within_limit(provider: TranslationProvider, texts: List[str],
+                           before_request: Optional[Callable[[], None]] = None) -> List[str]:
+    """
+    プロバイダの上限文字数に収まるよう分割・詰め直して翻訳する
+    （上限の大きいサービス向けに詰めたバッチを、上限の小さいサービスに送り直す場合など）
+    
+    Args:
+        provider: 翻訳プロバイダ
+        texts: 翻訳するテキストのリスト
+        before_request: 各リクエストの前に呼ぶ関数（レートリミッターの acquire など）
+    
+    Returns:
+        翻訳結果のリスト（入力と同じ順序、分割したテキストは訳を空白で連結）
+    """
+    pieces: List[str] = []
+    owners: List[int] = []
+    for index, text in enumerate(texts):
+        chunks = [text] if len(text) <= provider.max_chars else split_long_text(text, provider.max_chars)
+        pieces.extend(chunks)
+        owners.extend([index] * len(chunks))
+    
+    piece_results: List[str] = [""] * len(pieces)
+    for batch in pack_batches(pieces, provider.max_chars):
+        if before_request is not None:
+            before_request()
+        for i, result in zip(batch, translate_packed(provider, [pieces[i] for i in batch])):
+            piece_results[i] = result or ""
+    
+    results: List[List[str]] = [[] for _ in texts]
+    for owner, result in zip(owners, piece_results):
+        if result:
+            results[owner].append(result)
+    return [' '.join(parts) for parts in results]
+
+
+class DeepTranslatorProvider(TranslationProvider):
+    """
+    deep_translator のオンライン翻訳サービス（Google翻訳・MyMemory）
+    リクエストごとに接続し直すため、requests が使える場合は http_translation のプロバイダを使う
+    """
+    
+    pack_lines = True
+    
+    def __init__(self, service: str = "google", source_lang: str = "en", target_lang: str = "ja"):
+        """
+        Args:
+            service: "google" または "mymemory"
+            source_lang: 翻訳元の言語コード
+            target_lang: 翻訳先の言語コード
+        """
+        from deep_translator import GoogleTranslator, MyMemoryTranslator
+        
+        if service == "google":
+            self.translator = GoogleTranslator(source=source_lang, target=target_lang)
+        elif service == "mymemory":
+            self.translator = MyMemoryTranslator(source=source_lang, target=target_lang)
+        else:
+            raise ValueError(f"不明な翻訳サービス: {service}")
+        
+        self.name = service
+        limits = SERVICE_LIMITS[service]
+        self.max_chars = limits["max_chars"]
+        self.max_workers = limits["max_workers"]
+        self.min_interval = limits["min_interval"]
+    
+    def translate(self, text: str) -> str:
+        return self.translator.translate(text)
+    
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        if hasattr(self.translator, 'translate_batch'):
+            return self.translator.translate_batch(texts)
+        return super().translate_batch(texts)
+
+
+class ArgosProvider(TranslationProvider):
+    """
+    Argos Translate（CTranslate2）によるオフライン翻訳
+    言語パッケージは事前にインストールしておく（例: argospm install translate-en_ja）
+    """
+    
+    name = "argos"
+    max_chars = 2000
+    # モデル自体が複数スレッドで計算するため、呼び出しは1つずつ行う
+    max_workers = 1
+    
+    def __init__(self, source_lang: str = "en", target_lang: str = "ja"):
+        """
+        Args:
+            source_lang: 翻訳元の言語コード
+            target_lang: 翻訳先の言語コード
+        """
+        import argostranslate.translate
+        
+        languages = {language.code: language for language in argostranslate.translate.get_installed_languages()}
+        source = languages.get(source_lang)
+        target = languages.get(target_lang)
+        translation = source.get_translation(target) if source is not None and target is not None else None
+        if translation is None:
+            raise ValueError(f"Argos Translate の言語パッケージがありません: {source_lang} → {target_lang}")
+        
+        self._translation = translation
+    
+    def translate(self, text: str) -> str:
+        return self._translation.translate(text)
+
+
+class PhraseTableProvider(TranslationProvider):
+    """
+    フレーズ表（辞書）によるオフライン翻訳
+    文全体が表にあればその訳を、無ければ最長一致したフレーズだけを訳し、残りは原文のまま返す
+    ネットワークもモデルも不要で、処理時間が一定のためオフラインでの動作確認にも使える
+    """
+    
+    name = "phrase_table"
+    max_chars = 100000
+    # 訳さなかった単語も含めて1セグメントずつ処理する
+    pack_lines = False
+    
+    def __init__(self, source_lang: str = "en", target_lang: str = "ja", path: Optional[str] = None,
+                 phrases: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            source_lang: 翻訳元の言語コード
+            target_lang: 翻訳先の言語コード
+            path: フレーズ表のファイル（1行に「原文<TAB>訳文」、# で始まる行は無視）
+            phrases: 原文 → 訳文 の辞書（path と併用した場合は両方を使う）
+        """
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.separator = '' if target_lang.split('-')[0] in ('ja', 'zh') else ' '
+        
+        table: Dict[str, str] = {}
+        if path is None and phrases is None and (source_lang, target_lang) == ("en", "ja"):
+            table.update(DEFAULT_PHRASES_EN_JA)
+        if path is not None:
+            table.update(self.load(path))
+        if phrases:
+            table.update(phrases)
+        
+        self._table: Dict[Tuple[str, ...], str] = {}
+        for source, target in table.items():
+            key = self._key(source)
+            if key:
+                self._table[key] = target
+        self.max_phrase_words = max((len(key) for key in self._table), default=1)
+    
+    @staticmethod
+    def load(path: str) -> Dict[str, str]:
+        """
+        フレーズ表のファイルを読み込む
+        
+        Args:
+            path: ファイルのパス（UTF-8、1行に「原文<TAB>訳文」）
+        
+        Returns:
+            原文 → 訳文 の辞書
+        """
+        phrases = {}
+        with open(os.path.expanduser(path), encoding='utf-8') as f:
+            for line in f:
+                line = line.rstrip('\n')
+                if not line.strip() or line.lstrip().startswith('#'):
+                    continue
+                source, _, target = line.partition('\t')
+                if target:
+                    phrases[source.strip()] = target.strip()
+        return phrases
+    
+    @staticmethod
+    def _key(text: str) -> Tuple[str, ...]:
+        """大文字小文字と文末記号を無視した照合用の単語列"""
+        return tuple(token.lower() for token in TOKEN_PATTERN.findall(text.strip().rstrip('.!?:')))
+    
+    def translate(self, text: str) -> str:
+        key = self._key(text)
+        whole = self._table.get(key)
+        if whole is not None:
+            return whole
+        
+        matches = list(TOKEN_PATTERN.finditer(text))
+        lowered = [match.group().lower() for match in matches]
+        
+        # (テキスト, 訳したか) のリスト。訳さなかった部分は原文の空白・記号をそのまま残す
+        pieces: List[Tuple[str, bool]] = []
+        untranslated_start = None
+        i = 0
+        while i < len(matches):
+            for length in range(min(self.max_phrase_words, len(matches) - i), 0, -1):
+                translation = self._table.get(tuple(lowered[i:i + length]))
+                if translation is not None:
+                    break
+            else:
+                if untranslated_start is None:
+                    untranslated_start = matches[i].start()
+                i += 1
+                continue
+            
+            if untranslated_start is not None:
+                pieces.append((text[untranslated_start:matches[i - 1].end()], False))
+                untranslated_start = None
+            pieces.append((translation, True))
+            i += length
+        
+        if untranslated_start is not None:
+            pieces.append((text[untranslated_start:matches[-1].end()], False))
+        
+        # 訳語どうしは訳文の言語の区切りで、原文が混ざる箇所は空白で繋ぐ（記号の前は詰める）
+        result = ""
+        previous_translated = None
+        for piece, translated in pieces:
+            if previous_translated is not None:
+                if translated and previous_translated:
+                    result += self.separator
+                elif piece[0].isalnum():
+                    result += ' '
+            result += piece
+            previous_translated = translated
+        return result
+
+
+def create_translation_provider(service: str = "google", source_lang: str = "en", target_lang: str = "ja",
+                                **kwargs) -> TranslationProvider:
+    """
+    翻訳プロバイダを作成するファクトリー関数
+    
+    Args:
+        service: "google", "mymemory", "argos", "phrase_table" のいずれか
+        source_lang: 翻訳元の言語コード
+        target_lang: 翻訳先の言語コード
+        **kwargs: プロバイダ固有のオプション
+                  （google・mymemory の base_url、phrase_table の path と phrases、
+                  該当しないサービスでは無視する）
+    
+    Returns:
+        翻訳プロバイダ
+    """
+    if service in SERVICE_LIMITS:
+        try:
+            from .http_translation import create_web_provider
+        except ImportError:
+            return DeepTranslatorProvider(service, source_lang, target_lang)
+        return create_web_provider(service, source_lang, target_lang, base_url=kwargs.get("base_url"))
+    if service == "argos":
+        return ArgosProvider(source_lang, target_lang)
+    if service == "phrase_table":
+        return PhraseTableProvider(source_lang, target_lang, path=kwargs.get("path"), phrases=kwargs.get("phrases"))
+    raise ValueError(f"不明な翻訳サービス: {service}")
@@ -0,0 +1,375 @@
+"""
+翻訳プロバイダのルーティングモジュール
+複数の翻訳サービスを優先順に並べ、応答時間と失敗の履歴から送り先を選ぶ
+失敗が続いたサービスはしばらく遮断し（サーキットブレーカー）、その間は次のサービスに切り替える
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Dict, List, Optional, Sequence, Tuple
+import threading
+import time
+
+from .translation_providers import (
+    TranslationCancelled, TranslationError, TranslationProvider, create_translation_provider, get_rate_limiter,
+    translate_within_limit,
+)
+
+
+class ProviderUnavailableError(TranslationError):
+    """すべての翻訳サービスが遮断中で、リクエストを送らなかったことを表す例外"""
+
+
+class CircuitBreaker:
+    """
+    1つの翻訳サービスの状態（応答時間の指数移動平均とサーキットブレーカー）
+    failure_threshold 回続けて失敗すると遮断し、遮断時間が過ぎたら試しのリクエストを1つだけ通す（半開）
+    試しのリクエストが失敗するたびに遮断時間を倍にし（max_backoff まで）、成功すれば元に戻す
+    """
+    
+    def __init__(self, failure_threshold: int = 2, backoff: float = 2.0, max_backoff: float = 120.0,
+                 alpha: float = 0.3):
+        """
+        Args:
+            failure_threshold: 遮断するまでの連続失敗回数
+            backoff: 最初の遮断時間（秒）
+            max_backoff: 遮断時間の上限（秒）
+            alpha: 応答時間の指数移動平均の重み（大きいほど直近を重視）
+        """
+        self.failure_threshold = failure_threshold
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.alpha = alpha
+        
+        self._lock = threading.Lock()
+        self.latency: Optional[float] = None
+        self.failures = 0
+        self.open_until = 0.0
+        self.current_backoff = backoff
+        self.probing = False
+        
+        # 統計情報
+        self.requests = 0
+        self.errors = 0
+        self.trips = 0
+    
+    @property
+    def state(self) -> str:
+        """"closed"（通常）、"open"（遮断中）、"half_open"（試しのリクエストを待っている）のいずれか"""
+        if self.failures < self.failure_threshold:
+            return "closed"
+        if time.monotonic() < self.open_until:
+            return "open"
+        return "half_open"
+    
+    def try_acquire(self) -> bool:
+        """
+        リクエストを送ってよいか判定する（半開の場合は試しのリクエストを1つだけ通す）
+        
+        Returns:
+            送ってよい場合はTrue
+        """
+        with self._lock:
+            if self.failures < self.failure_threshold:
+                return True
+            if time.monotonic() < self.open_until or self.probing:
+                return False
+            self.probing = True
+            return True
+    
+    def release(self):
+        """送らなかった試しのリクエストの権利を返す"""
+        with self._lock:
+            self.probing = False
+    
+    def record_success(self, elapsed: float):
+        """
+        成功したリクエストを記録する
+        
+        Args:
+            elapsed: 応答時間（秒）
+        """
+        with self._lock:
+            self.requests += 1
+            self._update_latency(elapsed)
+            self.failures = 0
+            self.open_until = 0.0
+            self.current_backoff = self.backoff
+            self.probing = False
+    
+    def record_failure(self, elapsed: Optional[float] = None):
+        """
+        失敗したリクエストを記録する
+        
+        Args:
+            elapsed: タイムアウトの場合は待った時間（秒、応答時間の平均に含める）
+        """
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            if elapsed is not None:
+                self._update_latency(elapsed)
+            self.failures += 1
+            self.probing = False
+            if self.failures >= self.failure_threshold:
+                self.open_until = time.monotonic() + self.current_backoff
+                self.current_backoff = min(self.max_backoff, self.current_backoff * 2)
+                self.trips += 1
+    
+    def _update_latency(self, elapsed: float):
+        """応答時間の指数移動平均を更新する（ロックを取得済みで呼ぶ）"""
+        if self.latency is None:
+            self.latency = elapsed
+        else:
+            self.latency = self.alpha * elapsed + (1 - self.alpha) * self.latency
+    
+    def get_stats(self) -> dict:
+        """
+        統計情報を取得する
+        
+        Returns:
+            state, latency, requests, errors, trips を含む辞書
+        """
+        with self._lock:
+            requests, errors, trips, latency = self.requests, self.errors, self.trips, self.latency
+        return {
+            'state': self.state,
+            'latency': latency,
+            'requests': requests,
+            'errors': errors,
+            'trips': trips,
+        }
+
+
+class ProviderRouter(TranslationProvider):
+    """
+    複数の翻訳サービスを束ねるプロバイダ
+    優先順に送り、失敗・タイムアウトした場合は次のサービスに切り替える（フェイルオーバー）
+    応答時間の平均が slow_latency を超えたサービスは後ろに回し、遮断中のサービスには送らない
+    hedge_after を指定すると、その秒数で応答が無い時に次のサービスにも同時に送り、先に返った結果を使う
+    """
+    
+    # バッチはサービスごとの上限に合わせて詰め直して送る
+    pack_lines = False
+    
+    def __init__(self, providers: Sequence[TranslationProvider], timeout: float = 10.0,
+                 hedge_after: Optional[float] = None, slow_latency: float = 3.0,
+                 failure_threshold: int = 2, backoff: float = 2.0, max_backoff: float = 120.0):
+        """
+        Args:
+            providers: 翻訳プロバイダのリスト（優先順）
+            timeout: 1リクエストの応答を待つ時間（秒、超えたら失敗として次のサービスに切り替える）
+            hedge_after: 応答がこの秒数より遅い場合に次のサービスにも同時に送る（Noneなら送らない）
+            slow_latency: 応答時間の平均がこれを超えたサービスは後回しにする（秒）
+            failure_threshold: 遮断するまでの連続失敗回数
+            backoff: 最初の遮断時間（秒）
+            max_backoff: 遮断時間の上限（秒）
+        """
+        if not providers:
+            raise ValueError("翻訳プロバイダがありません")
+        
+        self.providers = list(providers)
+        self.name = '+'.join(provider.name for provider in self.providers)
+        # バッチは最優先のサービスの上限で詰め、上限の小さいサービスに切り替えた時だけ詰め直す
+        self.max_chars = self.providers[0].max_chars
+        self.max_workers = max(provider.max_workers for provider in self.providers)
+        
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.slow_latency = slow_latency
+        self.breakers = [CircuitBreaker(failure_threshold, backoff, max_backoff) for _ in self.providers]
+        
+        # 待ちきれなかったリクエストも完了まで裏で動くため、同時実行数に余裕を持たせる
+        self._executor = ThreadPoolExecutor(
+            max_workers=sum(provider.max_workers for provider in self.providers) + len(self.providers),
+            thread_name_prefix="translate-route",
+        )
+        self._lock = threading.Lock()
+        
+        # 統計情報
+        self.failovers = 0
+        self.hedges = 0
+    
+    def _order(self) -> List[int]:
+        """
+        送る順に並べたサービスの番号（遮断中のものは除く）
+        
+        Returns:
+            プロバイダの番号のリスト
+        """
+        available = [index for index, breaker in enumerate(self.breakers) if breaker.state != "open"]
+        # 優先順を基本とし、応答の遅いサービスだけを後ろに回す（安定ソート）
+        return sorted(available, key=lambda index: (self.breakers[index].latency or 0.0) > self.slow_latency)
+    
+    @property
+    def primary_name(self) -> str:
+        return self.providers[0].name
+    
+    def _attempt(self, index: int, texts: List[str]) -> Tuple[List[str], str]:
+        """1つのサービスでバッチを翻訳する（ワーカースレッドで実行）"""
+        provider = self.providers[index]
+        limiter = get_rate_limiter(provider.name, provider.min_interval)
+        return translate_within_limit(provider, texts, limiter.acquire), provider.name
+    
+    def _record_late(self, index: int, started: float, future: Future):
+        """使わなかったリクエスト（ヘッジで負けた方）の結果も応答時間と状態に反映する"""
+        if future.cancelled() or isinstance(future.exception(), TranslationCancelled):
+            self.breakers[index].release()
+        elif future.exception() is None:
+            self.breakers[index].record_success(time.monotonic() - started)
+        else:
+            self.breakers[index].record_failure()
+    
+    def _abandon(self, attempts: Dict[Future, Tuple[int, float]]):
+        """結果を使わないリクエストを取り消す（送信済みのものは完了時に結果だけ記録する）"""
+        for future, (index, started) in attempts.items():
+            if future.cancel():
+                self.breakers[index].release()
+            else:
+                future.add_done_callback(partial(self._record_late, index, started))
+    
+    def translate(self, text: str) -> str:
+        return self.translate_batch([text])[0]
+    
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        return self.translate_segments(texts)[0]
+    
+    def translate_segments(self, texts: List[str]) -> Tuple[List[str], str]:
+        """
+        複数のテキストを1つのサービスで翻訳する（失敗した場合は次のサービスに切り替える）
+        
+        Args:
+            texts: 翻訳するテキストのリスト
+        
+        Returns:
+            (翻訳結果のリスト（入力と同じ順序）, 実際に翻訳したサービス名)
+        
+        Raises:
+            ProviderUnavailableError: すべてのサービスが遮断中の場合（リクエストは送らない）
+            TranslationError: すべてのサービスで失敗した場合
+        """
+        if not texts:
+            return [], self.primary_name
+        
+        candidates = self._order()
+        attempts: Dict[Future, Tuple[int, float]] = {}
+        errors: List[Exception] = []
+        
+        def launch() -> bool:
+            while candidates:
+                index = candidates.pop(0)
+                if self.breakers[index].try_acquire():
+                    attempts[self._executor.submit(self._attempt, index, texts)] = (index, time.monotonic())
+                    return True
+            return False
+        
+        if not launch():
+            raise ProviderUnavailableError(f"翻訳サービスが一時的に遮断されています: {self.name}")
+        first_started = time.monotonic()
+        hedged = self.hedge_after is None
+        
+        while attempts:
+            deadline = min(started for _, started in attempts.values()) + self.timeout
+            if not hedged and candidates:
+                deadline = min(deadline, first_started + self.hedge_after)
+            done, _ = wait(list(attempts), timeout=max(0.0, deadline - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+            
+            now = time.monotonic()
+            for future in done:
+                index, started = attempts.pop(future)
+                try:
+                    result = future.result()
+                except TranslationCancelled:
+                    # 取り消しはサービスの失敗ではないので、切り替えずにそのまま伝える
+                    self.breakers[index].release()
+                    self._abandon(attempts)
+                    raise
+                except Exception as e:
+                    print(f"翻訳サービス {self.providers[index].name} でエラー: {e}")
+                    self.breakers[index].record_failure()
+                    errors.append(e)
+                    continue
+                
+                self.breakers[index].record_success(now - started)
+                self._abandon(attempts)
+                return result
+            
+            # 応答の無いリクエストは失敗として扱い、結果は捨てる
+            for future, (index, started) in list(attempts.items()):
+                if now - started >= self.timeout:
+                    del attempts[future]
+                    future.cancel()
+                    name = self.providers[index].name
+                    print(f"翻訳サービス {name} が {self.timeout:g} 秒以内に応答しませんでした")
+                    self.breakers[index].record_failure(now - started)
+                    errors.append(TimeoutError(f"{name} の応答がタイムアウトしました"))
+            
+            if not attempts:
+                if launch():
+                    with self._lock:
+                        self.failovers += 1
+            elif not hedged and now - first_started >= self.hedge_after:
+                hedged = True
+                if launch():
+                    with self._lock:
+                        self.hedges += 1
+        
+        raise TranslationError(f"すべての翻訳サービスで失敗しました: {errors[-1]}") from errors[-1]
+    
+    def get_stats(self) -> dict:
+        """
+        統計情報を取得する
+        
+        Returns:
+            failovers, hedges と、サービス名 → CircuitBreaker.get_stats の辞書（providers）
+        """
+        with self._lock:
+            failovers, hedges = self.failovers, self.hedges
+        return {
+            'failovers': failovers,
+            'hedges': hedges,
+            'providers': {
+                provider.name: breaker.get_stats() for provider, breaker in zip(self.providers, self.breakers)
+            },
+        }
+    
+    def cancel_pending(self):
+        for provider in self.providers:
+            provider.cancel_pending()
+    
+    def close(self):
+        """ワーカースレッドを止め、各プロバイダの資源を解放する"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for provider in self.providers:
+            provider.close()
+
+
+def create_provider_router(services: Sequence[str], source_lang: str = "en", target_lang: str = "ja",
+                           timeout: float = 10.0, hedge_after: Optional[float] = None,
+                           **kwargs) -> ProviderRouter:
+    """
+    翻訳サービスを優先順に束ねたプロバイダを作成する
+    作成できないサービス（言語パッケージの無い argos など）は除いて続ける
+    
+    Args:
+        services: 翻訳サービス名のリスト（優先順、重複は無視）
+        source_lang: 翻訳元の言語コード
+        target_lang: 翻訳先の言語コード
+        timeout: 1リクエストの応答を待つ時間（秒）
+        hedge_after: 応答がこの秒数より遅い場合に次のサービスにも同時に送る（Noneなら送らない）
+        **kwargs: プロバイダ固有のオプション（phrase_table の path など）
+    
+    Returns:
+        翻訳プロバイダ
+    """
+    providers = []
+    for service in dict.fromkeys(services):
+        try:
+            providers.append(create_translation_provider(service, source_lang, target_lang, **kwargs))
+        except Exception as e:
+            print(f"翻訳サービス ({service}) を使用できません: {e}")
+    
+    if not providers:
+        raise ValueError(f"使用できる翻訳サービスがありません: {', '.join(services)}")
+    return ProviderRouter(providers, timeout=timeout, hedge_after=hedge_after)
@@ -3,31 +3,58 @@
 英語から日本語への翻訳を行う
 """
 
-from typing import Optional
-from deep_translator import GoogleTranslator, MyMemoryTranslator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
 import re
 
+from .text_dedup import TextDeduplicator, clean_text
+from .translation_memory import TranslationMemory
+from .translation_providers import (
+    SENTENCE_PATTERN, TranslationCancelled, TranslationError, TranslationProvider, create_translation_provider,
+    get_rate_limiter, pack_batches, split_long_text,
+)
+
 
 class Translator:
     """翻訳を行うクラス"""
     
-    def __init__(self, source_lang: str = "en", target_lang: str = "ja", service: str = "google"):
+    def __init__(self, source_lang: str = "en", target_lang: str = "ja", service: str = "google",
+                 memory: Optional[TranslationMemory] = None, provider: Optional[TranslationProvider] = None,
+                 fallback_services: Sequence[str] = (), hedge_after: Optional[float] = None,
+                 dedup: Optional[TextDeduplicator] = None, **provider_options):
         """
         Args:
             source_lang: 翻訳元の言語コード
             target_lang: 翻訳先の言語コード
-            service: 使用する翻訳サービス（"google" or "mymemory"）
+            service: 使用する翻訳サービス（"google", "mymemory", "argos", "phrase_table"）
+            memory: 翻訳メモリ（Noneの場合はキャッシュしない）
+            provider: 翻訳プロバイダ（指定した場合は service の代わりに使う）
+            fallback_services: service が失敗・遮断中の時に切り替える翻訳サービス（優先順）
+            hedge_after: 応答がこの秒数より遅い場合に次のサービスにも同時に送る（Noneなら送らない）
+            dedup: OCRの揺れの範囲で同じ文に前回の翻訳を再利用する重複除去（Noneなら完全一致のみ）
+            **provider_options: プロバイダ固有のオプション（phrase_table の path など）
         """
+        if provider is None and (fallback_services or hedge_after is not None):
+            from .translation_router import create_provider_router
+            provider = create_provider_router([service, *fallback_services], source_lang, target_lang,
+                                              hedge_after=hedge_after, **provider_options)
+        elif provider is None:
+            provider = create_translation_provider(service, source_lang, target_lang, **provider_options)
+        
         self.source_lang = source_lang
         self.target_lang = target_lang
-        self.service = service
+        self.provider = provider
+        # 翻訳メモリは最優先のサービスの訳だけを引く（切り替え先の訳はそのサービスの名前で保存される）
+        self.service = provider.primary_name
+        self.memory = memory
+        self.dedup = dedup
         
-        if service == "google":
-            self.translator = GoogleTranslator(source=source_lang, target=target_lang)
-        elif service == "mymemory":
-            self.translator = MyMemoryTranslator(source=source_lang, target=target_lang)
-        else:
-            raise ValueError(f"不明な翻訳サービス: {service}")
+        self.max_chars = provider.max_chars
+        # cancel_pending のたびに進む世代（古い世代のバッチは送らない）
+        self._generation = 0
+        self._rate_limiter = get_rate_limiter(provider.name, provider.min_interval)
+        self._executor = ThreadPoolExecutor(max_workers=provider.max_workers,
+                                            thread_name_prefix=f"translate-{provider.name}")
     
     def translate(self, text: str) -> str:
         """
@@ -42,71 +69,191 @@ class Translator:
         if not text or not text.strip():
             return ""
         
-        # テキストをクリーンアップ
-        cleaned_text = self._clean_text(text)
+        return self.translate_batch([text])[0]
+    
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        """
+        複数のテキストをまとめて翻訳する
+        未翻訳のセグメントをサービスごとのサイズでバッチにまとめ、並列に送信する
         
-        if not cleaned_text:
-            return ""
+        Args:
+            texts: 翻訳するテキストのリスト
+        
+        Returns:
+            翻訳されたテキストのリスト（入力と同じ順序）
+        
+        Raises:
+            TranslationError: 翻訳できなかったセグメントがある場合（翻訳できた分は翻訳メモリに残る）
+            TranslationCancelled: cancel_pending で送信前に取り消された場合
+        """
+        # 行・文単位のセグメントに分割（変化していない行は翻訳メモリから再利用）
+        split_texts = [self._split_segments(text) if text and text.strip() else [] for text in texts]
+        
+        translations: Dict[str, str] = {}
+        pending: List[str] = []
+        pending_set = set()
+        for lines in split_texts:
+            for line in lines:
+                for segment in line:
+                    if segment in translations or segment in pending_set:
+                        continue
+                    cached = self._lookup(segment)
+                    if cached is not None:
+                        translations[segment] = cached
+                    else:
+                        pending.append(segment)
+                        pending_set.add(segment)
+        
+        # 未翻訳のセグメントのみAPIに送る
+        translated, error = self._translate_pending(pending, self._generation)
+        translations.update(translated)
+        
+        # エラーの文字列を訳文として返すと画面に表示され続けるため、呼び出し側に例外で知らせる
+        if any(segment not in translations for lines in split_texts for line in lines for segment in line):
+            if isinstance(error, TranslationCancelled):
+                raise error
+            raise TranslationError(f"翻訳に失敗しました: {error}") from error
         
-        try:
-            # 長いテキストは分割して翻訳
-            if len(cleaned_text) > 4500:
-                return self._translate_long_text(cleaned_text)
-            
-            result = self.translator.translate(cleaned_text)
-            return result if result else ""
-            
-        except Exception as e:
-            print(f"翻訳エラー: {e}")
-            return f"[翻訳エラー: {e}]"
+        results = []
+        for lines in split_texts:
+            # 元の順序で組み立て直す（日本語・中国語は文の間に空白を入れない）
+            separator = '' if self.target_lang.split('-')[0] in ('ja', 'zh') else ' '
+            results.append('\n'.join(
+                separator.join(translations[segment] for segment in line if translations[segment])
+                for line in lines
+            ))
+        
+        return results
     
-    def _clean_text(self, text: str) -> str:
+    def _split_segments(self, text: str) -> List[List[str]]:
         """
-        テキストをクリーンアップする
+        テキストを行ごとの文のリストに分割する
         
         Args:
-            text: クリーンアップするテキスト
+            text: 分割するテキスト
         
         Returns:
-            クリーンアップされたテキスト
+            行ごとのセグメント（クリーンアップ済みの文）のリスト
         """
-        # 余分な空白を削除
-        text = re.sub(r'\s+', ' ', text)
-        
-        # OCRの誤認識でよくある文字を修正
-        text = text.replace('|', 'I')
-        text = text.replace('0', 'O') if not any(c.isdigit() for c in text.replace('0', '')) else text
+        lines = []
+        for line in text.splitlines():
+            cleaned = self._clean_text(line)
+            if cleaned:
+                lines.append([sentence for sentence in SENTENCE_PATTERN.split(cleaned) if sentence])
+        return lines
+    
+    def _lookup(self, segment: str) -> Optional[str]:
+        """翻訳メモリ（無ければ最近翻訳した文のうちOCRの揺れの範囲で同じもの）からセグメントの翻訳を取得する"""
+        cached = None
+        if self.memory is not None:
+            cached = self.memory.get(self.service, self.source_lang, self.target_lang, segment)
+        if self.dedup is not None:
+            if cached is not None:
+                self.dedup.remember(segment, cached)
+            else:
+                cached = self.dedup.lookup(segment)
+        return cached
+    
+    def _store(self, segment: str, translation: str, service: Optional[str] = None):
+        """
+        セグメントの翻訳を翻訳メモリに保存する
         
-        return text.strip()
+        Args:
+            segment: 原文のセグメント
+            translation: 翻訳結果
+            service: 実際に翻訳したサービス名（Noneの場合は翻訳メモリに保存しない）
+        """
+        if self.memory is not None and service is not None:
+            self.memory.put(service, self.source_lang, self.target_lang, segment, translation)
+        if self.dedup is not None:
+            self.dedup.remember(segment, translation)
     
-    def _translate_long_text(self, text: str) -> str:
+    def _translate_pending(self, segments: List[str],
+                           generation: Optional[int] = None) -> Tuple[Dict[str, str], Optional[Exception]]:
         """
-        長いテキストを分割して翻訳する
+        セグメントをバッチに詰めて並列に翻訳する
         
         Args:
-            text: 翻訳するテキスト
+            segments: 翻訳するセグメントのリスト（重複なし）
+            generation: 翻訳を始めた時の世代（Noneなら取り消さない）
         
         Returns:
-            翻訳されたテキスト
+            (セグメント→翻訳結果の辞書, 失敗した場合の最初の例外)
         """
-        # 文で分割
-        sentences = re.split(r'(?<=[.!?])\s+', text)
+        if not segments:
+            return {}, None
         
-        translated_parts = []
-        current_chunk = ""
+        # 上限を超えるセグメントは文の塊に分割してから詰める
+        pieces: List[str] = []
+        owners: List[int] = []
+        for index, segment in enumerate(segments):
+            chunks = [segment] if len(segment) <= self.max_chars else split_long_text(segment, self.max_chars)
+            pieces.extend(chunks)
+            owners.extend([index] * len(chunks))
         
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) < 4500:
-                current_chunk += " " + sentence
-            else:
-                if current_chunk:
-                    translated_parts.append(self.translator.translate(current_chunk.strip()))
-                current_chunk = sentence
+        # 文字数の上限までまとめて1バッチにする
+        batches = pack_batches(pieces, self.max_chars)
+        
+        futures = [
+            self._executor.submit(self._translate_packed, [pieces[i] for i in batch], generation)
+            for batch in batches
+        ]
+        
+        piece_results: List[Optional[str]] = [None] * len(pieces)
+        piece_services: List[Optional[str]] = [None] * len(pieces)
+        error: Optional[Exception] = None
+        for batch, future in zip(batches, futures):
+            try:
+                results, service = future.result()
+                for i, result in zip(batch, results):
+                    piece_results[i] = result if result else ""
+                    piece_services[i] = service
+            except Exception as e:
+                if error is None:
+                    error = e
+        
+        translations: Dict[str, str] = {}
+        for index, segment in enumerate(segments):
+            indices = [i for i, owner in enumerate(owners) if owner == index]
+            parts = [piece_results[i] for i in indices]
+            if any(part is None for part in parts):
+                continue
+            result = ' '.join(part for part in parts if part)
+            translations[segment] = result
+            if result:
+                # 分割した塊を別々のサービスが翻訳した場合は、どのサービスの訳とも言えないので保存しない
+                services = {piece_services[i] for i in indices}
+                self._store(segment, result, services.pop() if len(services) == 1 else None)
+        
+        return translations, error
+    
+    def _translate_packed(self, batch: List[str], generation: Optional[int] = None) -> Tuple[List[str], str]:
+        """
+        1つのバッチを翻訳する（ワーカースレッドで実行）
+        
+        Args:
+            batch: 翻訳するセグメントのリスト
+            generation: 翻訳を始めた時の世代（その後に cancel_pending されていれば送らない）
+        
+        Returns:
+            (翻訳結果のリスト, 実際に翻訳したサービス名)
+        """
+        self._rate_limiter.acquire()
+        if generation is not None and generation != self._generation:
+            raise TranslationCancelled("新しいフレームの翻訳に置き換わったため送信を取り消しました")
+        return self.provider.translate_segments(batch)
+    
+    def _clean_text(self, text: str) -> str:
+        """
+        テキストをクリーンアップする
         
-        if current_chunk:
-            translated_parts.append(self.translator.translate(current_chunk.strip()))
+        Args:
+            text: クリーンアップするテキスト
         
-        return ' '.join(translated_parts)
+        Returns:
+            クリーンアップされたテキスト
+        """
+        return clean_text(text)
     
     def detect_language(self, text: str) -> Optional[str]:
         """
@@ -146,6 +293,19 @@ class Translator:
             return self.translate(text)
         else:
             return text
+    
+    def cancel_pending(self):
+        """
+        まだ送っていない翻訳リクエストを取り消す
+        新しいフレームのテキストに置き換わった時に呼ぶと、古いテキストの翻訳で接続や回数制限を使わない
+        """
+        self._generation += 1
+        self.provider.cancel_pending()
+    
+    def close(self):
+        """翻訳スレッドを止め、プロバイダの資源を解放する（翻訳メモリは呼び出し側で閉じる）"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.provider.close()
 
 
 if __name__ == "__main__":
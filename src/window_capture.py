@@ -1,19 +1,46 @@
 """
 ウィンドウキャプチャモジュール
 特定のウィンドウをキャプチャして画像として取得する
+実際のキャプチャは差し替え可能なバックエンド（capture_backends）が行う
 """
 
-import win32gui
-import win32ui
-import win32con
-import win32api
-import ctypes
-from ctypes import windll
 from PIL import Image
-from typing import Optional, List, Tuple
+from typing import Dict, Optional, List, Tuple
+import threading
 
-# Windows API定数
-PW_RENDERFULLCONTENT = 2
+from .capture_backends import CaptureBackend, create_capture_backend
+
+# 現在のキャプチャバックエンド（初回使用時に作成）
+_backend: Optional[CaptureBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_capture_backend() -> CaptureBackend:
+    """
+    現在のキャプチャバックエンドを取得する（未設定なら実行環境に合わせて作成）
+    
+    Returns:
+        キャプチャバックエンド
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = create_capture_backend()
+        return _backend
+
+
+def set_capture_backend(backend: CaptureBackend):
+    """
+    キャプチャバックエンドを差し替える
+    
+    Args:
+        backend: 新しいキャプチャバックエンド
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is not None and _backend is not backend:
+            _backend.close()
+        _backend = backend
 
 
 def get_window_list() -> List[Tuple[int, str]]:
@@ -23,17 +50,7 @@ def get_window_list() -> List[Tuple[int, str]]:
     Returns:
         List[Tuple[int, str]]: (ウィンドウハンドル, ウィンドウタイトル)のリスト
     """
-    windows = []
-    
-    def enum_callback(hwnd, results):
-        if win32gui.IsWindowVisible(hwnd):
-            title = win32gui.GetWindowText(hwnd)
-            if title:  # タイトルがあるウィンドウのみ
-                results.append((hwnd, title))
-        return True
-    
-    win32gui.EnumWindows(enum_callback, windows)
-    return windows
+    return get_capture_backend().get_window_list()
 
 
 def find_window_by_title(title: str) -> Optional[int]:
@@ -53,6 +70,23 @@ def find_window_by_title(title: str) -> Optional[int]:
     return None
 
 
+def get_window_rect(hwnd: int) -> Optional[Tuple[int, int, int, int]]:
+    """
+    ウィンドウの画面上の位置を取得する
+    
+    Args:
+        hwnd: ウィンドウハンドル
+    
+    Returns:
+        (left, top, right, bottom)、取得できない場合はNone
+    """
+    try:
+        return get_capture_backend().get_window_rect(hwnd)
+    except Exception as e:
+        print(f"ウィンドウ位置の取得エラー: {e}")
+        return None
+
+
 def capture_window(hwnd: int) -> Optional[Image.Image]:
     """
     指定されたウィンドウをキャプチャする
@@ -64,49 +98,8 @@ def capture_window(hwnd: int) -> Optional[Image.Image]:
         キャプチャした画像（PIL Image）、失敗した場合はNone
     """
     try:
-        # ウィンドウのサイズを取得
-        left, top, right, bottom = win32gui.GetWindowRect(hwnd)
-        width = right - left
-        height = bottom - top
-        
-        if width <= 0 or height <= 0:
-            return None
-        
-        # デバイスコンテキストを取得
-        hwnd_dc = win32gui.GetWindowDC(hwnd)
-        mfc_dc = win32ui.CreateDCFromHandle(hwnd_dc)
-        save_dc = mfc_dc.CreateCompatibleDC()
-        
-        # ビットマップを作成
-        bitmap = win32ui.CreateBitmap()
-        bitmap.CreateCompatibleBitmap(mfc_dc, width, height)
-        save_dc.SelectObject(bitmap)
-        
-        # ctypesを使ってPrintWindowを呼び出す
-        result = windll.user32.PrintWindow(hwnd, save_dc.GetSafeHdc(), PW_RENDERFULLCONTENT)
-        
-        if result == 0:
-            # PrintWindowが失敗した場合はBitBltを試す
-            save_dc.BitBlt((0, 0), (width, height), mfc_dc, (0, 0), win32con.SRCCOPY)
-        
-        # ビットマップをPIL Imageに変換
-        bmp_info = bitmap.GetInfo()
-        bmp_bits = bitmap.GetBitmapBits(True)
-        
-        image = Image.frombuffer(
-            'RGB',
-            (bmp_info['bmWidth'], bmp_info['bmHeight']),
-            bmp_bits, 'raw', 'BGRX', 0, 1
-        )
-        
-        # リソースを解放
-        win32gui.DeleteObject(bitmap.GetHandle())
-        save_dc.DeleteDC()
-        mfc_dc.DeleteDC()
-        win32gui.ReleaseDC(hwnd, hwnd_dc)
-        
-        return image
-        
+        return get_capture_backend().capture(hwnd)
+    
     except Exception as e:
         print(f"ウィンドウキャプチャエラー: {e}")
         return None
@@ -123,12 +116,30 @@ def capture_window_region(hwnd: int, region: Tuple[int, int, int, int]) -> Optio
     Returns:
         キャプチャした画像（PIL Image）
     """
-    full_image = capture_window(hwnd)
-    if full_image is None:
+    images = capture_window_regions(hwnd, {'region': region})
+    if not images:
         return None
+    return images.get('region')
+
+
+def capture_window_regions(hwnd: int, regions: Dict[str, Tuple[int, int, int, int]]) -> Optional[Dict[str, Image.Image]]:
+    """
+    ウィンドウ内の複数の名前付き領域を1回でキャプチャする
+    バックエンドが対応していれば領域だけを転送元から直接コピーする
+    
+    Args:
+        hwnd: ウィンドウハンドル
+        regions: 領域名 → (x, y, width, height)
+    
+    Returns:
+        領域名 → キャプチャした画像（PIL Image）、失敗した場合はNone
+    """
+    try:
+        return get_capture_backend().capture_regions(hwnd, regions)
     
-    x, y, width, height = region
-    return full_image.crop((x, y, x + width, y + height))
+    except Exception as e:
+        print(f"領域キャプチャエラー: {e}")
+        return None
 
 
 def bring_window_to_front(hwnd: int) -> bool:
@@ -142,8 +153,7 @@ def bring_window_to_front(hwnd: int) -> bool:
         成功した場合True
     """
     try:
-        win32gui.SetForegroundWindow(hwnd)
-        return True
+        return get_capture_backend().bring_to_front(hwnd)
     except Exception as e:
         print(f"ウィンドウを前面に出せませんでした: {e}")
         return False
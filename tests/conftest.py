@@ -0,0 +1,9 @@
+"""
+テスト共通の設定
+"""
+
+import os
+import sys
+
+# リポジトリのルートをパスに追加（src パッケージを import できるようにする）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,71 @@
+"""
+キャプチャバックエンドのテスト
+"""
+
+from typing import List
+import sys
+import threading
+import types
+
+import pytest
+from PIL import Image
+
+from src.capture_backends import MssCaptureBackend, ReplayCaptureBackend, create_capture_backend
+
+
+class FakeMss:
+    """閉じられたかを記録する MSS のインスタンス"""
+    
+    created: List["FakeMss"] = []
+    
+    def __init__(self):
+        self.closed = False
+        FakeMss.created.append(self)
+    
+    def close(self):
+        self.closed = True
+
+
+def test_replay_without_path_raises_value_error():
+    with pytest.raises(ValueError):
+        ReplayCaptureBackend()
+    with pytest.raises(ValueError):
+        create_capture_backend("replay", path=None)
+
+
+def test_replay_missing_path_raises_value_error(tmp_path):
+    with pytest.raises(ValueError):
+        ReplayCaptureBackend(str(tmp_path / "missing"))
+
+
+def test_replay_plays_images_in_name_order(tmp_path):
+    for index, color in enumerate(((255, 0, 0), (0, 255, 0))):
+        Image.new('RGB', (8, 4), color).save(tmp_path / f"frame{index}.png")
+    
+    backend = ReplayCaptureBackend(str(tmp_path))
+    hwnd = ReplayCaptureBackend.REPLAY_HWND
+    
+    assert backend.capture(hwnd).getpixel((0, 0)) == (255, 0, 0)
+    assert backend.capture(hwnd).getpixel((0, 0)) == (0, 255, 0)
+    # 最後まで再生したら最初に戻る
+    assert backend.capture(hwnd).getpixel((0, 0)) == (255, 0, 0)
+
+
+def test_mss_close_closes_instances_of_all_threads(monkeypatch):
+    FakeMss.created = []
+    monkeypatch.setitem(sys.modules, 'mss', types.SimpleNamespace(mss=FakeMss))
+    backend = MssCaptureBackend()
+    
+    # キャプチャスレッドで作成したインスタンスも閉じる
+    thread = threading.Thread(target=backend._sct)
+    thread.start()
+    thread.join()
+    backend._sct()
+    assert len(FakeMss.created) == 2
+    
+    backend.close()
+    assert all(sct.closed for sct in FakeMss.created)
+    
+    # 閉じた後に使う場合は作り直す
+    assert not backend._sct().closed
+    backend.close()
@@ -0,0 +1,147 @@
+"""
+WindowCapturer の描画先バッファ再利用のテスト
+Win32 API の代わりに FakeSurface を使うため、Windows 以外でも実行できる
+"""
+
+from typing import List, Tuple
+
+from src.capture_surface import CaptureSurface, Region, WindowCapturer
+
+
+class FakeSurface(CaptureSurface):
+    """メモリ上のバッファに描画する CaptureSurface（確保・解放の回数を記録する）"""
+    
+    def __init__(self, window_size: Tuple[int, int] = (64, 48)):
+        self.window_size = window_size
+        self.allocated: List[Tuple[int, int]] = []
+        self.released = 0
+        self.size = (0, 0)
+        self._pixels = bytearray()
+    
+    def get_window_size(self, hwnd: int) -> Tuple[int, int]:
+        return self.window_size
+    
+    def allocate(self, hwnd: int, width: int, height: int):
+        self.allocated.append((width, height))
+        self.size = (width, height)
+        self._pixels = bytearray(width * height * 4)
+    
+    def render(self, hwnd: int) -> bool:
+        # 各画素の B に x、G に y を書き込む（切り抜いた位置を確認できるようにする）
+        width, height = self.size
+        for y in range(height):
+            for x in range(width):
+                offset = (y * width + x) * 4
+                self._pixels[offset:offset + 4] = bytes((x % 256, y % 256, 0, 255))
+        return True
+    
+    def blit(self, hwnd: int, region: Region, dest: Tuple[int, int]) -> bool:
+        x, y, width, height = region
+        stride = self.size[0] * 4
+        for row in range(height):
+            for column in range(width):
+                offset = (dest[1] + row) * stride + (dest[0] + column) * 4
+                self._pixels[offset:offset + 4] = bytes(((x + column) % 256, (y + row) % 256, 0, 255))
+        return True
+    
+    def buffer(self) -> memoryview:
+        return memoryview(self._pixels)
+    
+    def release(self):
+        self.released += 1
+        self.size = (0, 0)
+        self._pixels = bytearray()
+
+
+class BlackBlitSurface(FakeSurface):
+    """DWMで合成されるウィンドウのように、領域の転送は成功しても黒い画素しか返さない"""
+    
+    def __init__(self, window_size: Tuple[int, int] = (64, 48)):
+        super().__init__(window_size)
+        self.blits = 0
+    
+    def blit(self, hwnd: int, region: Region, dest: Tuple[int, int]) -> bool:
+        self.blits += 1
+        return True
+
+
+def make_capturer(window_size: Tuple[int, int] = (64, 48), region_surface_type=FakeSurface):
+    surface = FakeSurface(window_size)
+    region_surface = region_surface_type(window_size)
+    return WindowCapturer(1, surface=surface, region_surface=region_surface), surface, region_surface
+
+
+def test_same_size_reuses_buffer():
+    capturer, surface, _ = make_capturer()
+    
+    for _ in range(3):
+        image = capturer.capture()
+        assert image.size == (64, 48)
+    
+    assert capturer.allocations == 1
+    assert surface.allocated == [(64, 48)]
+
+
+def test_resize_reallocates_buffer():
+    capturer, surface, _ = make_capturer()
+    capturer.capture()
+    
+    surface.window_size = (80, 60)
+    image = capturer.capture()
+    
+    assert image.size == (80, 60)
+    assert capturer.allocations == 2
+    assert surface.allocated == [(64, 48), (80, 60)]
+
+
+def test_alternating_full_and_region_capture_does_not_reallocate():
+    capturer, surface, region_surface = make_capturer()
+    regions = {'a': (4, 2, 10, 8), 'b': (20, 30, 6, 5)}
+    
+    for _ in range(3):
+        assert capturer.capture().size == (64, 48)
+        images = capturer.capture_regions(regions)
+        assert images['a'].size == (10, 8)
+        assert images['b'].size == (6, 5)
+    
+    # 全体用と領域用で1回ずつだけ確保する
+    assert capturer.allocations == 2
+    assert len(surface.allocated) == 1
+    assert len(region_surface.allocated) == 1
+    
+    # 切り抜いた画像の左上がウィンドウ上の領域の左上と一致する（RGB = (0, y, x)）
+    assert images['a'].getpixel((0, 0)) == (0, 2, 4)
+    assert images['b'].getpixel((5, 4)) == (0, 34, 25)
+
+
+def test_close_releases_both_surfaces():
+    capturer, surface, region_surface = make_capturer()
+    capturer.capture()
+    capturer.capture_regions({'a': (0, 0, 8, 8)})
+    
+    capturer.close()
+    
+    assert surface.released == 1
+    assert region_surface.released == 1
+    assert capturer.size == (0, 0)
+    assert capturer.region_buffer_size == (0, 0)
+    
+    # 閉じた後にキャプチャすると確保し直す
+    capturer.capture()
+    assert capturer.allocations == 3
+
+
+def test_black_blit_falls_back_to_full_render():
+    capturer, surface, region_surface = make_capturer(region_surface_type=BlackBlitSurface)
+    regions = {'a': (4, 2, 10, 8)}
+    
+    images = capturer.capture_regions(regions)
+    assert images['a'].size == (10, 8)
+    assert images['a'].getpixel((0, 0)) == (0, 2, 4)
+    assert capturer.blit_unreliable
+    
+    # 以降は領域の転送を試さず、使い回している全体用のバッファに描画して切り抜く
+    images = capturer.capture_regions(regions)
+    assert images['a'].getpixel((9, 7)) == (0, 9, 13)
+    assert region_surface.blits == 1
+    assert surface.allocated == [(64, 48)]
@@ -0,0 +1,158 @@
+"""
+HttpTranslationClient のテスト
+http.server で立てたスタブサーバーに MyMemory 形式の応答を返させるため、ネットワークに接続せずに実行できる
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+from urllib.parse import parse_qs, urlparse
+import json
+import threading
+import time
+
+import pytest
+
+from src.http_translation import HttpTranslationClient, MyMemoryWebProvider
+from src.translation_providers import TranslationCancelled, TranslationError
+
+
+class StubServer(ThreadingHTTPServer):
+    """受けた接続とリクエストを記録するスタブサーバー"""
+    
+    daemon_threads = True
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.connections = 0
+        self.queries: List[str] = []
+        # "slow" で始まる文は release がセットされるまで応答を返さない
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+    
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/get"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # keep-alive で接続を使い回せるようにする
+    protocol_version = 'HTTP/1.1'
+    
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+    
+    def do_GET(self):
+        text = parse_qs(urlparse(self.path).query)['q'][0]
+        with self.server.lock:
+            self.server.queries.append(text)
+        if text.startswith('slow'):
+            self.server.release.wait(5)
+        
+        status = int(text.split()[1]) if text.startswith('status') else 200
+        body = json.dumps({'responseStatus': 200, 'responseData': {'translatedText': f"訳:{text}"}}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    stub = StubServer()
+    thread = threading.Thread(target=stub.serve_forever, daemon=True)
+    thread.start()
+    yield stub
+    stub.release.set()
+    stub.shutdown()
+    stub.server_close()
+
+
+def make_provider(server: StubServer, max_connections: int = 4) -> MyMemoryWebProvider:
+    client = HttpTranslationClient(server.url, max_connections)
+    return MyMemoryWebProvider(base_url=server.url, client=client)
+
+
+def wait_until(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_connection_is_reused(server):
+    provider = make_provider(server)
+    
+    for text in ("one", "two", "three"):
+        assert provider.translate(text) == f"訳:{text}"
+    
+    assert server.connections == 1
+    assert provider.get_stats()['requests'] == 3
+    provider.close()
+
+
+def test_identical_requests_in_flight_are_coalesced(server):
+    provider = make_provider(server)
+    results: List[str] = []
+    threads = [threading.Thread(target=lambda: results.append(provider.translate("slow same"))) for _ in range(2)]
+    
+    threads[0].start()
+    wait_until(lambda: server.queries)
+    threads[1].start()
+    wait_until(lambda: provider.get_stats()['coalesced'] == 1)
+    server.release.set()
+    for thread in threads:
+        thread.join(5)
+    
+    assert results == ["訳:slow same"] * 2
+    assert server.queries == ["slow same"]
+    assert provider.get_stats()['requests'] == 1
+    provider.close()
+
+
+def test_cancel_pending_drops_unsent_requests(server):
+    # 接続を1本にして、2つ目のリクエストを送信待ちにする
+    provider = make_provider(server, max_connections=1)
+    results: List[object] = []
+    
+    def translate(text: str):
+        try:
+            results.append(provider.translate(text))
+        except TranslationCancelled as e:
+            results.append(e)
+    
+    sent = threading.Thread(target=translate, args=("slow first",))
+    sent.start()
+    wait_until(lambda: server.queries)
+    waiting = threading.Thread(target=translate, args=("second",))
+    waiting.start()
+    wait_until(lambda: len(provider.client._in_flight) == 2)
+    
+    provider.cancel_pending()
+    server.release.set()
+    sent.join(5)
+    waiting.join(5)
+    
+    # 送信済みのリクエストは応答を待ち、送信前のものだけ取り消す
+    assert results[0] == "訳:slow first"
+    assert isinstance(results[1], TranslationCancelled)
+    assert server.queries == ["slow first"]
+    assert provider.get_stats() == {'requests': 1, 'coalesced': 0, 'cancelled': 1}
+    provider.close()
+
+
+@pytest.mark.parametrize('status', [429, 500, 503])
+def test_non_200_raises_translation_error(server, status):
+    provider = make_provider(server)
+    
+    with pytest.raises(TranslationError):
+        provider.translate(f"status {status}")
+    
+    # 失敗したリクエストは相乗り用の表に残らない
+    assert provider.client._in_flight == {}
+    provider.close()
@@ -0,0 +1,73 @@
+"""
+ProcessOCRExecutor のワーカー側の認識のテスト
+ワーカーで実行する関数をこのプロセスで直接呼ぶため、プロセスプールを起動せずに実行できる
+"""
+
+from multiprocessing import shared_memory
+from typing import List, Optional
+
+from PIL import Image
+
+from src import ocr_executor
+from src.adaptive_resolution import ResolutionController
+from src.ocr_engine import OCREngine
+from src.preprocess import resize_for_ocr
+
+
+class LineHeightEngine(OCREngine):
+    """
+    画像全体を1行の文字として読むエンジン（TesseractOCR と同じように作業解像度を推定する）
+    実際に認識した画像の高さを text に入れて返す
+    """
+    
+    def __init__(self):
+        self.resolution = ResolutionController()
+    
+    def _read(self, image: Image.Image, scale: Optional[float] = None) -> List[dict]:
+        fixed_scale = scale is not None
+        if not fixed_scale:
+            scale = self.resolution.choose_scale(image.size)
+        processed = resize_for_ocr(image, scale)
+        boxes = [{'text': str(processed.height), 'left': 0, 'top': 0,
+                  'width': int(processed.width / scale), 'height': int(processed.height / scale),
+                  'confidence': 95.0}]
+        if not fixed_scale:
+            self.resolution.update([box['height'] for box in boxes], 0.01, processed.width * processed.height)
+        return boxes
+    
+    def recognize_with_boxes(self, image: Image.Image) -> List[dict]:
+        return self._read(image)
+    
+    def recognize_scaled(self, image: Image.Image, scale: float) -> List[dict]:
+        return self._read(image, scale)
+
+
+def recognize_in_worker(memory: shared_memory.SharedMemory, image: Image.Image) -> List[dict]:
+    """親プロセスと同じように共有メモリにフレームを置き、ワーカーの関数で認識する"""
+    data = image.tobytes()
+    memory.buf[:len(data)] = data
+    return ocr_executor._worker_recognize(memory.name, image.size, (0, 0, image.width, image.height))
+
+
+def test_retry_does_not_change_later_frame_scales(monkeypatch):
+    engine = LineHeightEngine()
+    monkeypatch.setattr(ocr_executor, '_worker_engine', engine)
+    monkeypatch.setattr(ocr_executor, '_worker_memory', None)
+    memory = shared_memory.SharedMemory(create=True, size=200 * 96 * 3)
+    try:
+        # 親プロセスが文字の高さ 24px に縮小したフレーム
+        frame = Image.new('RGB', (200, 24), (255, 255, 255))
+        assert recognize_in_worker(memory, frame)[0]['text'] == "24"
+        
+        # 低信頼度の領域を2倍に拡大した再認識
+        retry = Image.new('RGB', (200, 48), (255, 255, 255))
+        for _ in range(3):
+            assert recognize_in_worker(memory, retry)[0]['text'] == "48"
+        
+        # 後のフレームはワーカーでさらに縮小されず、親が決めた倍率のまま認識される
+        assert recognize_in_worker(memory, frame)[0]['text'] == "24"
+        assert engine.resolution.text_height is None
+    finally:
+        ocr_executor._worker_memory.close()
+        memory.close()
+        memory.unlink()
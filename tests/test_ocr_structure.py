@@ -0,0 +1,108 @@
+"""
+エンジンが判定した行・段落の区切りがラッパーエンジンを通しても残ることのテスト
+"""
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from src.ocr_cache import CachingOCR
+from src.ocr_engine import OCREngine
+from src.ocr_result import LINE_KEY
+from src.tile_ocr import TiledOCR
+
+# 色 → (単語, (ブロック, 段落, 行))
+Vocabulary = Dict[Tuple[int, int, int], Tuple[str, Tuple[int, int, int]]]
+
+
+class ColorBlockEngine(OCREngine):
+    """
+    単色の矩形を単語として読むエンジン（Tesseract のように行の番号を付ける）
+    切り抜いた画像でも同じように読めるため、領域ごとの認識もそのまま試せる
+    """
+    
+    def __init__(self, vocabulary: Vocabulary):
+        self.vocabulary = vocabulary
+        self.calls = 0
+    
+    def recognize_with_boxes(self, image: Image.Image) -> List[dict]:
+        self.calls += 1
+        pixels = np.asarray(image.convert('RGB'))
+        boxes = []
+        for color, (text, key) in self.vocabulary.items():
+            ys, xs = np.nonzero((pixels == color).all(axis=2))
+            if len(xs) == 0:
+                continue
+            boxes.append({
+                'text': text,
+                'left': int(xs.min()),
+                'top': int(ys.min()),
+                'width': int(xs.max() - xs.min() + 1),
+                'height': int(ys.max() - ys.min() + 1),
+                'confidence': 95.0,
+                LINE_KEY: key,
+            })
+        boxes.sort(key=lambda box: box[LINE_KEY])
+        return boxes
+
+
+def draw(words: List[Tuple[Tuple[int, int, int], Tuple[int, int, int, int]]]) -> Image.Image:
+    image = Image.new('RGB', (512, 256), (255, 255, 255))
+    canvas = ImageDraw.Draw(image)
+    for color, rect in words:
+        canvas.rectangle(rect, fill=color)
+    return image
+
+
+RED, GREEN, BLUE, YELLOW, PURPLE = (200, 0, 0), (0, 200, 0), (0, 0, 200), (200, 200, 0), (120, 0, 120)
+
+VOCABULARY: Vocabulary = {
+    RED: ("Left", (1, 1, 1)),
+    GREEN: ("column.", (1, 1, 1)),
+    BLUE: ("Right", (2, 1, 1)),
+    YELLOW: ("column.", (2, 1, 1)),
+    PURPLE: ("text.", (1, 1, 2)),
+}
+
+# 2段組みの段落（同じ高さに並ぶが、エンジンは別の段落と判定している）
+TWO_COLUMNS = [
+    (RED, (10, 20, 60, 40)), (GREEN, (70, 20, 130, 40)),
+    (BLUE, (300, 20, 350, 40)), (YELLOW, (360, 20, 420, 40)),
+]
+
+
+def test_wrappers_keep_engine_paragraphs():
+    ocr = TiledOCR(CachingOCR(ColorBlockEngine(VOCABULARY)))
+    
+    result = ocr.recognize_full(draw(TWO_COLUMNS))
+    
+    # 位置だけでまとめると1行「Left column. Right column.」になる
+    assert result.paragraph_texts() == ["Left column.", "Right column."]
+
+
+def test_partial_update_keeps_paragraph_together():
+    engine = ColorBlockEngine(VOCABULARY)
+    ocr = TiledOCR(CachingOCR(engine))
+    ocr.recognize_full(draw(TWO_COLUMNS))
+    
+    # 左の段落に2行目が増えた（変化したタイルは左の段落の一部だけ）
+    result = ocr.recognize_full(draw(TWO_COLUMNS + [(PURPLE, (10, 50, 60, 70))]))
+    
+    assert result.paragraph_texts() == ["Left column.\ntext.", "Right column."]
+    assert [len(paragraph.lines) for paragraph in result.paragraphs] == [2, 1]
+    # 右の段落は認識し直さない
+    assert engine.calls == 2
+    assert ocr.get_stats()['ocr_pixels'] < 2 * 512 * 256
+
+
+def test_unchanged_frame_reuses_structure():
+    engine = ColorBlockEngine(VOCABULARY)
+    ocr = TiledOCR(CachingOCR(engine))
+    image = draw(TWO_COLUMNS)
+    
+    first = ocr.recognize_full(image)
+    second = ocr.recognize_full(image)
+    
+    assert second.paragraph_texts() == first.paragraph_texts()
+    assert engine.calls == 1
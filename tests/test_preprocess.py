@@ -0,0 +1,47 @@
+"""
+OCR前処理のテスト
+"""
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from src.preprocess import Preprocessor, scaled_size
+
+
+def make_image(size=(320, 120)) -> Image.Image:
+    image = Image.new('RGB', size, (230, 230, 230))
+    ImageDraw.Draw(image).text((10, 10), "Preprocess 123", fill=(20, 20, 20))
+    return image
+
+
+@pytest.mark.parametrize('scale', [1.0, 0.6, 0.5, 0.35, 0.2, 1.5])
+def test_output_size_matches_scale(scale):
+    image = make_image()
+    out = Preprocessor().process(image, scale)
+    assert out.shape == scaled_size(image.size, scale)[::-1]
+    assert out.dtype == np.uint8
+
+
+def test_buffers_are_reused_for_same_size():
+    preprocessor = Preprocessor()
+    image = make_image()
+    first = preprocessor.process(image, 0.35)
+    second = preprocessor.process(image, 0.35)
+    assert first is second
+    assert preprocessor.allocations == 1
+    
+    preprocessor.process(image, 0.6)
+    assert preprocessor.allocations == 2
+
+
+def test_histogram_counts_match_full_bincount():
+    # チャンクに分けて数えても、一度に数えた場合と同じテーブルになる
+    preprocessor = Preprocessor(histogram_samples=1000)
+    gray = np.asarray(make_image((640, 200)).convert('L'))
+    buffers = preprocessor._buffers(*gray.shape)
+    
+    class WholeFrame:
+        index = np.empty((1, gray.size), dtype=np.intp)
+    
+    assert (preprocessor._build_lut(gray, buffers) == preprocessor._build_lut(gray, WholeFrame)).all()
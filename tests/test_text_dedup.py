@@ -0,0 +1,59 @@
+"""
+TextDeduplicator のテスト（OCRの揺れは再利用し、文が変わった場合は再利用しない）
+"""
+
+import pytest
+
+from src.text_dedup import TextDeduplicator
+
+ORIGINAL = "Are you sure you want to delete this file?"
+TRANSLATION = "このファイルを削除してもよろしいですか？"
+
+
+@pytest.fixture
+def dedup() -> TextDeduplicator:
+    dedup = TextDeduplicator()
+    dedup.remember(ORIGINAL, TRANSLATION)
+    return dedup
+
+
+@pytest.mark.parametrize('jitter', [
+    "Are you sure you want to delete this fiIe?",
+    "Are you sure you want to de1ete this file?",
+    "Are you sure you want to delete this fi|e?",
+    "Are you sure you want todelete this file?",
+    "ARE YOU SURE YOU WANT TO DELETE THIS FILE?",
+    "Are you sure you want to delete this file?.",
+    "Are you sure, you want to delete this file?",
+])
+def test_ocr_jitter_reuses_translation(dedup, jitter):
+    assert dedup.lookup(jitter) == TRANSLATION
+    assert dedup.matches(ORIGINAL, jitter)
+
+
+@pytest.mark.parametrize('changed', [
+    "Are you sure you want to delete this folder?",
+    "Are you sure you want to delete these files?",
+    "Are you sure you want to delete this files?",
+    "Are you sure you want to delete that file?",
+    "Are you sure you want to delete this file?!.",
+])
+def test_changed_sentence_is_not_reused(dedup, changed):
+    assert dedup.lookup(changed) is None
+    assert not dedup.matches(ORIGINAL, changed)
+
+
+def test_changed_number_is_not_reused():
+    dedup = TextDeduplicator()
+    dedup.remember("Score 120", "スコア 120")
+    
+    assert dedup.lookup("Score 121") is None
+    assert dedup.lookup("Score l20") is None
+
+
+def test_zero_noise_only_ignores_confusable_characters():
+    strict = TextDeduplicator(max_noise=0)
+    strict.remember(ORIGINAL, TRANSLATION)
+    
+    assert strict.lookup("Are you sure you want to delete this fiIe?") == TRANSLATION
+    assert strict.lookup("Are you sure you want to delete this file?.") is None
@@ -0,0 +1,22 @@
+"""
+文字領域検出のテスト
+"""
+
+from src.ocr_engine import EasyOCREngine
+from src.text_detection import DETECT_PARAM_NAMES, EasyOCRDetector, EdgeDensityDetector, create_text_detector
+
+
+def test_easyocr_detector_uses_readtext_detection_params():
+    # モデルを読み込まずに作る（検出器の作成だけを確かめる）
+    engine = EasyOCREngine.__new__(EasyOCREngine)
+    detector = create_text_detector(engine)
+    
+    assert isinstance(detector, EasyOCRDetector)
+    expected = {name: value for name, value in EasyOCREngine.READTEXT_PARAMS.items() if name in DETECT_PARAM_NAMES}
+    assert detector.params == expected
+    assert detector.params['text_threshold'] == EasyOCREngine.READTEXT_PARAMS['text_threshold']
+    assert detector.params['low_text'] == EasyOCREngine.READTEXT_PARAMS['low_text']
+
+
+def test_other_engines_use_edge_density_detector():
+    assert isinstance(create_text_detector(object()), EdgeDensityDetector)
@@ -0,0 +1,89 @@
+"""
+翻訳（翻訳メモリ・サービスの切り替え）のテスト
+"""
+
+from typing import List
+
+import pytest
+
+from src.translation_memory import TranslationMemory
+from src.translation_providers import TranslationError, TranslationProvider
+from src.translation_router import ProviderRouter
+from src.translator import Translator
+
+
+class FakeProvider(TranslationProvider):
+    """訳文の前にサービス名を付けて返すプロバイダ（fail=True の間は失敗する）"""
+    
+    pack_lines = True
+    
+    def __init__(self, name: str, max_chars: int = 4500, fail: bool = False):
+        self.name = name
+        self.max_chars = max_chars
+        self.fail = fail
+        self.requests: List[str] = []
+    
+    def translate(self, text: str) -> str:
+        self.requests.append(text)
+        if self.fail:
+            raise TranslationError(f"{self.name} is down")
+        return '\n'.join(f"{self.name}:{line}" for line in text.split('\n'))
+
+
+def make_translator(primary: FakeProvider, fallback: FakeProvider, memory: TranslationMemory) -> Translator:
+    router = ProviderRouter([primary, fallback], failure_threshold=100)
+    return Translator(provider=router, memory=memory)
+
+
+def test_memory_is_keyed_by_primary_service():
+    memory = TranslationMemory()
+    memory.put("google", "en", "ja", "Hello.", "こんにちは。")
+    primary, fallback = FakeProvider("google"), FakeProvider("mymemory")
+    translator = make_translator(primary, fallback, memory)
+    
+    # 束ねる前に保存した訳もそのまま引ける
+    assert translator.service == "google"
+    assert translator.translate("Hello.") == "こんにちは。"
+    assert primary.requests == []
+    translator.close()
+
+
+def test_fallback_results_are_stored_under_fallback_service():
+    memory = TranslationMemory()
+    primary, fallback = FakeProvider("google", fail=True), FakeProvider("mymemory")
+    translator = make_translator(primary, fallback, memory)
+    
+    assert translator.translate("Hello.") == "mymemory:Hello."
+    assert memory.get("mymemory", "en", "ja", "Hello.") == "mymemory:Hello."
+    assert memory.get("google", "en", "ja", "Hello.") is None
+    
+    # 最優先のサービスが復旧すれば、切り替え先の訳を使い続けずにそちらで翻訳する
+    primary.fail = False
+    assert translator.translate("Hello.") == "google:Hello."
+    assert memory.get("google", "en", "ja", "Hello.") == "google:Hello."
+    translator.close()
+
+
+def test_all_services_failing_raises_translation_error():
+    primary, fallback = FakeProvider("google", fail=True), FakeProvider("mymemory", fail=True)
+    translator = make_translator(primary, fallback, TranslationMemory())
+    
+    with pytest.raises(TranslationError):
+        translator.translate("Hello.")
+    translator.close()
+
+
+def test_batches_are_packed_for_primary_and_repacked_for_fallback():
+    primary, fallback = FakeProvider("google", fail=True), FakeProvider("mymemory", max_chars=20)
+    translator = make_translator(primary, fallback, TranslationMemory())
+    
+    # 最も小さい上限ではなく、最優先のサービスの上限でまとめる
+    assert translator.max_chars == 4500
+    text = "First line here.\nSecond line here.\nThird line here."
+    assert translator.translate(text) == (
+        "mymemory:First line here.\nmymemory:Second line here.\nmymemory:Third line here."
+    )
+    assert len(primary.requests) == 1
+    assert len(fallback.requests) == 3
+    assert all(len(request) <= 20 for request in fallback.requests)
+    translator.close()